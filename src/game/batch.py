@@ -0,0 +1,91 @@
+import numpy as np
+
+from .entities import AGENT, FREE, VICTIM
+from .simulation import ACTIONS, BLOCKING, WALL
+from .walls import GridWorldGenerator
+
+# Cell value -> whether an agent may not enter it: the ``Simulation`` rules
+# (walls, debris and cells held by another entity) as one lookup table
+BLOCKED = np.zeros(256, dtype=bool)
+BLOCKED[[*BLOCKING, AGENT, VICTIM]] = True
+
+
+class BatchedSimulation:
+    """Many independent single-player missions stepped together.
+
+    The ``N`` grids are stored as one ``(N, H, W)`` array and the players as
+    an ``(N, 2)`` array of ``(y, x)`` cells, so a step applies all ``N``
+    actions with array operations and no per-mission Python loop.
+    """
+
+    def __init__(self, grids):
+        self.grids = np.ascontiguousarray(grids, dtype=np.uint8)
+        self.num_envs, self.grid_height, self.grid_width = self.grids.shape
+        self._envs = np.arange(self.num_envs)
+        self.tick = 0
+
+        # Place the players in the center of their grids
+        self.positions = np.empty((self.num_envs, 2), dtype=np.intp)
+        self.positions[:] = self.grid_height // 2, self.grid_width // 2
+        self.grids[self._envs, self.positions[:, 0], self.positions[:, 1]] = AGENT
+
+    @classmethod
+    def generate(cls, num_envs, grid_width, grid_height, seed=None):
+        """Create ``num_envs`` missions on freshly generated worlds.
+
+        Each world gets its own child of ``seed``, so a batch is reproducible.
+        """
+        seeds = np.random.SeedSequence(seed).spawn(num_envs)
+        grids = np.empty((num_envs, grid_height, grid_width), dtype=np.uint8)
+        for i in range(num_envs):
+            grid_generator = GridWorldGenerator(grid_width, grid_height, seeds[i])
+            grid_generator.generate_walls()
+            grids[i] = grid_generator.get_grid()
+        return cls(grids)
+
+    def step(self, actions):
+        """Apply one action per mission; returns the ``moved`` mask."""
+        moves = ACTIONS[actions]
+        y, x = self.positions[:, 0], self.positions[:, 1]
+        new_y = y + moves[:, 1]
+        new_x = x + moves[:, 0]
+
+        in_bounds = (
+            (new_x >= 0)
+            & (new_x < self.grid_width)
+            & (new_y >= 0)
+            & (new_y < self.grid_height)
+        )
+        # Clip so out-of-bounds targets can still be indexed; they are masked
+        target = self.grids[
+            self._envs,
+            np.clip(new_y, 0, self.grid_height - 1),
+            np.clip(new_x, 0, self.grid_width - 1),
+        ]
+        moved = in_bounds & ~BLOCKED[target]
+
+        envs = self._envs[moved]
+        self.grids[envs, y[moved], x[moved]] = FREE
+        self.grids[envs, new_y[moved], new_x[moved]] = AGENT
+        self.positions[moved, 0] = new_y[moved]
+        self.positions[moved, 1] = new_x[moved]
+        self.tick += 1
+        return moved
+
+    def observe(self, radius=2):
+        """Return the ``(N, 2r+1, 2r+1)`` neighbourhood of every player.
+
+        Cells beyond the grid edge read as walls.
+        """
+        offsets = np.arange(-radius, radius + 1)
+        ys = self.positions[:, 0, None, None] + offsets[None, :, None]
+        xs = self.positions[:, 1, None, None] + offsets[None, None, :]
+        inside = (
+            (ys >= 0) & (ys < self.grid_height) & (xs >= 0) & (xs < self.grid_width)
+        )
+        view = self.grids[
+            self._envs[:, None, None],
+            np.clip(ys, 0, self.grid_height - 1),
+            np.clip(xs, 0, self.grid_width - 1),
+        ]
+        return np.where(inside, view, WALL).astype(np.uint8)
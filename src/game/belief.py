@@ -0,0 +1,109 @@
+import numpy as np
+
+from .osm import LAYER_VALUES
+from .roads import ROAD
+
+# Relative prior weight of a victim in a cell of each OSM layer rank: open
+# ground, then each of FEATURE_LAYERS (buildings, then parks)
+LAYER_PRIORS = (1.0, 8.0, 2.0)
+# Prior weight of a road cell (``RoadGraph.rasterize``): people in the open,
+# and in cars, get caught on roads
+ROAD_PRIOR = 3.0
+
+
+def osm_prior(grid_array, victims=10.0, weights=LAYER_PRIORS, road=ROAD_PRIOR):
+    """Per-cell victim probability of an ``osm_to_grid`` grid.
+
+    Each cell gets the weight of its layer, or ``road`` on road cells, scaled
+    so the probabilities add up to ``victims`` expected victims (capped at 1
+    per cell).
+    """
+    table = np.zeros(256, dtype=np.float32)
+    table[LAYER_VALUES] = weights
+    table[ROAD] = road
+    prior = table[grid_array]
+    prior *= victims / max(float(prior.sum(dtype=np.float64)), 1e-12)
+    return np.minimum(prior, 1, out=prior)
+
+
+class BeliefMap:
+    """Probability of a victim in each cell, updated from what agents see.
+
+    Cells are independent. Looking at a cell without finding a victim, with
+    detection probability ``pd``, updates it by Bayes' rule to
+    ``p (1 - pd) / (1 - p pd)``. ``observe`` applies this in place to all
+    the cells every agent saw in a tick at once; a cell seen by several
+    agents in one tick counts as one look.
+
+    Beliefs live in a ``float32`` grid padded to whole ``block_size``
+    blocks, along with the maximum of every block. Only blocks an update
+    touched are rescanned, and ``top`` narrows a query to the best blocks,
+    so queries never scan the whole grid.
+    """
+
+    def __init__(self, prior, detection=0.9, block_size=16):
+        self.detection = detection
+        self.block_size = block_size
+        height, width = prior.shape
+        self.blocks = (-(-height // block_size), -(-width // block_size))
+        # Padding cells hold -1 so they never rank among real cells
+        self._padded = np.full(
+            (self.blocks[0] * block_size, self.blocks[1] * block_size),
+            -1,
+            dtype=np.float32,
+        )
+        self.belief = self._padded[:height, :width]  # View of the real cells
+        self.belief[:] = prior
+        # (block_y, y in block, block_x, x in block) view of the padded grid
+        self._cells = self._padded.reshape(
+            self.blocks[0], block_size, self.blocks[1], block_size
+        )
+        self.block_max = self._cells.max(axis=(1, 3))
+        self._touched = np.zeros(self.blocks, dtype=bool)
+
+    def observe(self, y, x, detection=None):
+        """Apply a negative detection to the cells ``(y, x)`` (index arrays)."""
+        pd = np.float32(self.detection if detection is None else detection)
+        p = self.belief[y, x]
+        # A certain cell missed by a perfect sensor would divide 0 by 0; it
+        # drops to 0 instead. Repeated cells compute the same value, so they
+        # are updated once.
+        norm = np.maximum(1 - p * pd, np.finfo(np.float32).tiny)
+        self.belief[y, x] = p * (1 - pd) / norm
+
+        self._touched[y // self.block_size, x // self.block_size] = True
+        by, bx = np.nonzero(self._touched)
+        self._touched[by, bx] = False
+        self.block_max[by, bx] = self._cells[by, :, bx, :].max(axis=(1, 2))
+
+    def total(self):
+        """Expected number of victims left to find."""
+        return float(self.belief.sum(dtype=np.float64))
+
+    def top(self, k=1):
+        """The ``k`` most likely cells as ``(y, x, p)`` arrays, best first.
+
+        Every one of the ``k`` best cells lies in one of the ``k`` blocks
+        with the highest maxima, so only those blocks are searched.
+        """
+        flat_max = self.block_max.ravel()
+        k = min(k, self.belief.size)
+        blocks = (
+            np.argpartition(-flat_max, k - 1)[:k]
+            if k < flat_max.size
+            else np.arange(flat_max.size)
+        )
+        by, bx = np.divmod(blocks, self.blocks[1])
+        candidates = self._cells[by, :, bx, :]  # (k, block, block)
+        flat = candidates.reshape(-1)
+        best = np.argpartition(-flat, k - 1)[:k] if k < flat.size else flat.argsort()
+        best = best[np.argsort(-flat[best], kind="stable")]
+        block, cy, cx = np.unravel_index(best, candidates.shape)
+        y = by[block] * self.block_size + cy
+        x = bx[block] * self.block_size + cx
+        return y, x, flat[best]
+
+    def argmax(self):
+        """The most likely cell as ``(y, x)``."""
+        y, x, _ = self.top(1)
+        return int(y[0]), int(x[0])
@@ -0,0 +1,600 @@
+"""Performance benchmarks for the game modules.
+
+Run from the ``src`` directory, e.g. ``python -m game.benchmarks osm``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from .osm import osm_to_grid, tiled_osm_to_grid
+
+
+def _best_time(func, repeat=3):
+    """Return the best wall-clock time of ``repeat`` calls to ``func``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func):
+    """Return the peak traced allocation (in MB) of a call to ``func``."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def make_synthetic_osm(src_path, dst_path, copies):
+    """Write an OSM file holding ``copies`` id-shifted copies of ``src_path``.
+
+    All copies share the source bounds, so the rasterized grid is unchanged
+    while the parse workload grows ``copies`` times.
+    """
+    root = ET.parse(src_path).getroot()
+    nodes = root.findall("node")
+    ways = root.findall("way")
+    stride = max(int(e.attrib["id"]) for e in nodes + ways) + 1
+
+    with open(dst_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        f.write(ET.tostring(root.find("bounds"), encoding="unicode"))
+        for k in range(copies):
+            for node in nodes:
+                attrib = dict(node.attrib, id=str(int(node.attrib["id"]) + k * stride))
+                attrs = " ".join(f"{a}={quoteattr(v)}" for a, v in attrib.items())
+                f.write(f" <node {attrs}/>\n")
+        for k in range(copies):
+            for way in ways:
+                f.write(f' <way id="{int(way.attrib["id"]) + k * stride}">\n')
+                for nd in way.iter("nd"):
+                    f.write(f'  <nd ref="{int(nd.attrib["ref"]) + k * stride}"/>\n')
+                for tag in way.iter("tag"):
+                    key, value = quoteattr(tag.attrib["k"]), quoteattr(tag.attrib["v"])
+                    f.write(f"  <tag k={key} v={value}/>\n")
+                f.write(" </way>\n")
+        f.write("</osm>\n")
+
+
+def benchmark_osm(file_path, copies=100, repeat=3):
+    """Compare tree-based and streaming OSM ingestion."""
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, "synthetic.osm")
+        make_synthetic_osm(file_path, synthetic, copies)
+
+        for label, path in [("original", file_path), (f"{copies}x", synthetic)]:
+            size = os.path.getsize(path) / 2**20
+            print(f"{label} ({size:.1f} MB)")
+            for streaming in (False, True):
+                name = "streaming" if streaming else "tree"
+                elapsed = _best_time(
+                    lambda: osm_to_grid(path, streaming=streaming), repeat
+                )
+                peak = _peak_memory(lambda: osm_to_grid(path, streaming=streaming))
+                print(f"  {name:>10}: {elapsed:8.3f} s  peak {peak:8.1f} MB")
+
+
+def benchmark_raster(
+    file_path, size=4000, tile_size=256, max_workers=os.cpu_count(), repeat=3
+):
+    """Scaling of tiled rasterization with the number of worker processes."""
+    serial = tiled_osm_to_grid(file_path, size, size, tile_size)
+    print(f"{size}x{size} grid, {tile_size}x{tile_size} tiles")
+    workers = 1
+    while workers <= max_workers:
+        elapsed = _best_time(
+            lambda: tiled_osm_to_grid(file_path, size, size, tile_size, None, workers),
+            repeat,
+        )
+        grid = tiled_osm_to_grid(file_path, size, size, tile_size, None, workers)
+        identical = np.array_equal(grid, serial)
+        print(f"  {workers:>3} workers: {elapsed:8.3f} s  identical={identical}")
+        workers *= 2
+
+
+def _draw_cells(grid_array, cell_size, batch):
+    """The per-cell renderer ``MainGUI.draw_grid`` used before ``GridRenderer``."""
+    from pyglet import shapes
+
+    from .render import CELL_COLORS
+
+    rects = []
+    for y in range(grid_array.shape[0]):
+        for x in range(grid_array.shape[1]):
+            color = CELL_COLORS.get(grid_array[y, x])
+            if color:
+                rects.append(
+                    shapes.Rectangle(
+                        x * cell_size,
+                        y * cell_size,
+                        cell_size,
+                        cell_size,
+                        color=color,
+                        batch=batch,
+                    )
+                )
+    return rects
+
+
+def _draw_chunks(grid_array, cell_size, batch, screen=None):
+    """Lay out a ``GridRenderer`` for a centered ``screen``-sized view (the
+    whole world when ``None``)."""
+    from .camera import Camera
+    from .render import GridRenderer
+
+    world_height, world_width = np.multiply(grid_array.shape, cell_size)
+    width, height = screen or (world_width, world_height)
+    camera = Camera(width, height)
+    camera.center_player(world_width / 2, world_height / 2)
+    renderer = GridRenderer(grid_array, cell_size, batch=batch)
+    renderer.update_view(camera)
+    return renderer
+
+
+def benchmark_render(sizes=(100, 250, 500, 1000), cell_size=25, repeat=3):
+    """Per-cell shapes versus chunked GridRenderer textures (needs a display)."""
+    import pyglet
+
+    from .walls import GridWorldGenerator
+
+    window = pyglet.window.Window(visible=False)
+    try:
+        for size in sizes:
+            generator = GridWorldGenerator(size, size)
+            generator.generate_walls()
+            grid = generator.get_grid()
+            print(f"{size}x{size} grid ({size * size / 1e6:.2f} M cells)")
+            for name, draw in [
+                ("shapes", _draw_cells),
+                ("texture", _draw_chunks),
+                ("800x800", lambda *args: _draw_chunks(*args, screen=(800, 800))),
+            ]:
+                elapsed = _best_time(
+                    lambda: draw(grid, cell_size, pyglet.graphics.Batch()), repeat
+                )
+                peak = _peak_memory(
+                    lambda: draw(grid, cell_size, pyglet.graphics.Batch())
+                )
+                print(f"  {name:>10}: {elapsed:8.3f} s  peak {peak:8.1f} MB")
+    finally:
+        window.close()
+
+
+def benchmark_sim(sizes=(100, 1000, 2500), steps=100_000, seed=0):
+    """Steps per second of the headless Simulation with random actions."""
+    from .simulation import ACTIONS, Simulation
+
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        simulation = Simulation(size, size)
+        actions = rng.integers(len(ACTIONS), size=steps)
+        start = time.perf_counter()
+        for action in actions:
+            simulation.step(action)
+        elapsed = time.perf_counter() - start
+        print(f"{size}x{size} grid: {steps / elapsed:12,.0f} steps/s")
+
+
+def benchmark_batch(num_envs=(1, 16, 256, 4096), size=50, steps=1000, seed=0):
+    """Environment steps per second of BatchedSimulation as N grows."""
+    from .batch import BatchedSimulation
+    from .simulation import ACTIONS
+
+    rng = np.random.default_rng(seed)
+    for n in num_envs:
+        batch = BatchedSimulation.generate(n, size, size)
+        actions = rng.integers(len(ACTIONS), size=(steps, n))
+        start = time.perf_counter()
+        for tick_actions in actions:
+            batch.step(tick_actions)
+        elapsed = time.perf_counter() - start
+        print(f"N={n:>6}: {n * steps / elapsed:14,.0f} env-steps/s")
+
+
+def benchmark_walls(sizes=(100, 500, 1000, 2500, 5000), seed=0, repeat=3):
+    """World generation time of GridWorldGenerator against grid area."""
+    from .walls import GridWorldGenerator
+
+    def generate(size):
+        GridWorldGenerator(size, size, seed).generate_walls()
+
+    for size in sizes:
+        elapsed = _best_time(lambda: generate(size), repeat)
+        per_cell = elapsed / (size * size) * 1e9
+        print(f"{size}x{size} grid: {elapsed:8.4f} s  {per_cell:6.2f} ns/cell")
+
+
+def benchmark_distance(size=1000, queries=10_000, seed=0):
+    """Cold distance-field build and warm point queries on a generated world."""
+    from .distance import DistanceFields
+    from .walls import GridWorldGenerator
+
+    generator = GridWorldGenerator(size, size, seed)
+    generator.generate_walls()
+    fields = DistanceFields(generator.get_grid())
+    source = (size // 2, size // 2)
+
+    start = time.perf_counter()
+    fields.field(*source)
+    print(f"{size}x{size} grid: field built in {time.perf_counter() - start:.3f} s")
+
+    rng = np.random.default_rng(seed)
+    targets = [tuple(t) for t in rng.integers(1, size - 1, size=(queries, 2))]
+    start = time.perf_counter()
+    for target in targets:
+        fields.distance(source, target)
+    elapsed = time.perf_counter() - start
+    print(f"  warm query: {elapsed / queries * 1e6:.2f} us")
+
+
+def benchmark_paths(
+    file_path, sizes=(100, 200, 400), cluster_size=16, queries=50, seed=0
+):
+    """HPA*-style planner against flat A* on the OSM map at several sizes."""
+    from .distance import passable_mask
+    from .osm import stream_osm_to_grid
+    from .pathfinding import HierarchicalPlanner, astar
+
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        grid = stream_osm_to_grid(file_path, size, size)
+        start = time.perf_counter()
+        planner = HierarchicalPlanner(grid, cluster_size)
+        build = time.perf_counter() - start
+
+        free = np.argwhere(passable_mask(grid))
+        pairs = free[rng.integers(len(free), size=(queries, 2))]
+        pairs = [(tuple(map(int, a)), tuple(map(int, b))) for a, b in pairs]
+        flat_time = hpa_time = 0.0
+        flat_steps = hpa_steps = 0
+        for a, b in pairs:
+            start = time.perf_counter()
+            flat = astar(planner.passable, a, b)
+            flat_time += time.perf_counter() - start
+            start = time.perf_counter()
+            hpa = planner.find_path(a, b)
+            hpa_time += time.perf_counter() - start
+            if flat is not None and hpa is not None:
+                flat_steps += len(flat)
+                hpa_steps += len(hpa)
+        print(f"{size}x{size} grid: hierarchy built in {build:.3f} s")
+        print(f"  flat A*: {flat_time / queries * 1e3:8.2f} ms/query")
+        print(
+            f"     HPA*: {hpa_time / queries * 1e3:8.2f} ms/query"
+            f"  ({hpa_steps / max(flat_steps, 1):.3f}x optimal length)"
+        )
+
+
+def benchmark_replay(size=100, ticks=100_000, keyframe_interval=256, seeks=100, seed=0):
+    """Record a random mission, then time headless replay and seeking."""
+    from .replay import MissionRecorder, MissionReplay
+    from .simulation import Simulation
+
+    rng = np.random.default_rng(seed)
+    # Hold each random action for a while, as a player would
+    actions = np.repeat(rng.integers(5, size=ticks // 8 + 1), 8)[:ticks]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mission.sarr")
+        simulation = Simulation(size, size, seed=seed)
+        start = time.perf_counter()
+        with MissionRecorder(path, simulation, keyframe_interval) as recorder:
+            for action in actions:
+                recorder.step(action)
+        record = time.perf_counter() - start
+        log_bytes = os.path.getsize(path)
+
+        replay = MissionReplay(path)
+        replay_time = _best_time(replay.run)
+        assert (replay.run().grid_array == simulation.grid_array).all()
+        targets = rng.integers(ticks + 1, size=seeks)
+        start = time.perf_counter()
+        for tick in targets:
+            replay.state_at(int(tick))
+        seek = (time.perf_counter() - start) / seeks
+
+    print(f"{ticks} ticks on a {size}x{size} grid, keyframes every {keyframe_interval}")
+    print(f"  log:    {log_bytes} bytes ({log_bytes / ticks:.2f} bytes/tick)")
+    print(f"  record: {ticks / record:12.0f} ticks/s")
+    print(f"  replay: {ticks / replay_time:12.0f} ticks/s")
+    print(f"  seek:   {seek * 1e3:12.3f} ms")
+
+
+def benchmark_swarm(size=1000, num_agents=(10, 100, 1000, 10_000), steps=1000, seed=0):
+    """Multi-agent steps with conflict resolution for growing swarms."""
+    from .swarm import Swarm
+    from .walls import GridWorldGenerator
+
+    generator = GridWorldGenerator(size, size, seed)
+    generator.generate_walls()
+    world = generator.get_grid().astype(np.uint8)
+    rng = np.random.default_rng(seed)
+    for n in num_agents:
+        swarm = Swarm.spawn(world.copy(), n, seed=seed)
+        actions = rng.integers(5, size=(steps, n))
+        moved = 0
+        start = time.perf_counter()
+        for step_actions in actions:
+            moved += swarm.step(step_actions).sum()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{n:6d} agents: {elapsed / steps * 1e6:9.1f} us/step"
+            f"  {n * steps / elapsed:12.0f} agent-steps/s"
+            f"  ({moved / (n * steps):.0%} moved)"
+        )
+
+
+def benchmark_visibility(
+    size=1000, num_agents=(10, 100, 300, 1000), radius=15, steps=20, seed=0
+):
+    """Sensor visibility for many agents, cold and with cached masks."""
+    from .swarm import Swarm
+    from .visibility import VisibilityEngine
+    from .walls import GridWorldGenerator
+
+    generator = GridWorldGenerator(size, size, seed)
+    generator.generate_walls()
+    world = generator.get_grid().astype(np.uint8)
+    start = time.perf_counter()
+    engine = VisibilityEngine(world, radius)
+    print(f"{size}x{size} grid: occlusion built in {time.perf_counter() - start:.3f} s")
+    rng = np.random.default_rng(seed)
+    for n in num_agents:
+        swarm = Swarm.spawn(world.copy(), n, seed=seed)
+        cold = _best_time(lambda: engine.visible(swarm.positions))
+        engine.update(swarm.positions)
+        warm = 0.0
+        for _ in range(steps):
+            swarm.step(rng.integers(5, size=n))
+            start = time.perf_counter()
+            engine.update(swarm.positions)
+            warm += time.perf_counter() - start
+        print(
+            f"{n:6d} agents, radius {radius}: {cold * 1e3:8.2f} ms all agents"
+            f"  {warm / steps * 1e3:8.2f} ms/tick cached"
+        )
+
+
+def benchmark_exploration(size=2000, num_agents=100, radius=15, steps=20, seed=0):
+    """Bit-packed exploration layers: marking, coverage, merges and frontier."""
+    from .distance import passable_mask
+    from .exploration import ExplorationMap
+    from .swarm import Swarm
+    from .visibility import VisibilityEngine
+    from .walls import GridWorldGenerator
+
+    generator = GridWorldGenerator(size, size, seed)
+    generator.generate_walls()
+    world = generator.get_grid().astype(np.uint8)
+    exploration = ExplorationMap(size, size, num_agents, passable_mask(world))
+    swarm = Swarm.spawn(world, num_agents, seed=seed)
+    engine = VisibilityEngine(world, radius)
+    rng = np.random.default_rng(seed)
+    dense = exploration.bits.shape[0] * size * size  # One bool per cell and layer
+    print(
+        f"{size}x{size} grid, {num_agents} agents + team: "
+        f"{exploration.bits.nbytes / 1e6:.1f} MB packed vs {dense / 1e6:.1f} MB as bool"
+    )
+
+    mark = 0.0
+    for _ in range(steps):
+        swarm.step(rng.integers(5, size=num_agents))
+        cells = engine.cells(swarm.positions, engine.update(swarm.positions))
+        start = time.perf_counter()
+        exploration.mark(*cells)
+        mark += time.perf_counter() - start
+    print(f"  mark:     {mark / steps * 1e3:8.2f} ms/tick")
+    for name, func in [
+        ("coverage", exploration.coverage),
+        ("union", lambda: exploration.union(np.arange(num_agents))),
+        ("frontier", exploration.frontier),
+    ]:
+        print(f"  {name + ':':<9} {_best_time(func) * 1e3:8.2f} ms")
+    print(f"  team coverage {exploration.coverage():.2%}")
+
+
+def benchmark_belief(
+    file_path, size=500, num_agents=(12, 24, 48), radius=8, steps=100, seed=0
+):
+    """Victim-belief updates from all agents' sensors and top-k queries."""
+    from .belief import BeliefMap, osm_prior
+    from .osm import stream_osm_to_grid
+    from .swarm import Swarm
+    from .visibility import VisibilityEngine
+
+    world = stream_osm_to_grid(file_path, size, size)
+    engine = VisibilityEngine(world, radius)
+    rng = np.random.default_rng(seed)
+    for n in num_agents:
+        belief = BeliefMap(osm_prior(world))
+        swarm = Swarm.spawn(world.copy(), n, seed=seed)
+        update = 0.0
+        for _ in range(steps):
+            swarm.step(rng.integers(5, size=n))
+            _, y, x = engine.cells(swarm.positions, engine.update(swarm.positions))
+            start = time.perf_counter()
+            belief.observe(y, x)
+            update += time.perf_counter() - start
+        top = _best_time(lambda: belief.top(10))
+        print(
+            f"{size}x{size} grid, {n:3d} agents: {update / steps * 1e3:6.3f} ms/update"
+            f"  top-10 {top * 1e3:6.3f} ms  ({belief.total():.2f} victims expected)"
+        )
+
+
+def benchmark_roads(file_path, copies=100, sources=(1, 10, 100), seed=0):
+    """Road graph extraction, cached load and one-to-many Dijkstra."""
+    from .roads import RoadGraph
+
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, "synthetic.osm")
+        make_synthetic_osm(file_path, synthetic, copies)
+        start = time.perf_counter()
+        graph = RoadGraph.from_osm(synthetic)
+        build = time.perf_counter() - start
+        cached = os.path.join(tmp, "roads.npz")
+        graph.save(cached)
+        load = _best_time(lambda: RoadGraph.load(cached))
+        size = os.path.getsize(cached) / 2**20
+
+    print(f"{copies}x map: {graph.num_nodes} nodes, {graph.num_edges} edges")
+    print(f"  built in {build:.3f} s, loaded in {load * 1e3:.2f} ms ({size:.1f} MB)")
+    for n in sources:
+        nodes = rng.integers(graph.num_nodes, size=n)
+        elapsed = _best_time(lambda: graph.shortest_paths(nodes))
+        print(f"  {n:4d} sources: {elapsed / n * 1e3:8.3f} ms per one-to-all query")
+    nearest = _best_time(lambda: graph.nearest_source(nodes))
+    print(f"  nearest of {n} staging areas: {nearest * 1e3:8.3f} ms")
+
+
+def benchmark_world(size=10_000, updates=10_000, seed=0):
+    """Layered World memory and cached passability against the legacy grid."""
+    from .walls import GridWorldGenerator
+    from .world import WALL, World
+
+    generator = GridWorldGenerator(size, size, seed)
+    generator.generate_walls()
+    world = World.from_grid(generator.get_grid())
+    del generator
+    print(f"{size}x{size} grid: legacy int64 grid {size * size * 8 / 2**20:8.1f} MB")
+    print(f"  layers:             {world.nbytes() / 2**20:8.1f} MB")
+    start = time.perf_counter()
+    world.passable()
+    world.free()
+    cold = time.perf_counter() - start
+    print(f"  with cached masks:  {world.nbytes() / 2**20:8.1f} MB")
+    print(
+        f"  masks built in {cold:.3f} s, read in {_best_time(world.free) * 1e6:.1f} us"
+    )
+
+    rng = np.random.default_rng(seed)
+    y, x = rng.integers(1, size - 1, size=(2, updates))
+    start = time.perf_counter()
+    for i in range(updates):
+        world.set_terrain(y[i], x[i], WALL)
+    elapsed = time.perf_counter() - start
+    print(f"  terrain edit with masks patched: {elapsed / updates * 1e6:.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    osm = subparsers.add_parser("osm", help=benchmark_osm.__doc__)
+    osm.add_argument("file_path", nargs="?", default="../data/map.osm")
+    osm.add_argument("--copies", type=int, default=100)
+    osm.add_argument("--repeat", type=int, default=3)
+
+    raster = subparsers.add_parser("raster", help=benchmark_raster.__doc__)
+    raster.add_argument("file_path", nargs="?", default="../data/map.osm")
+    raster.add_argument("--size", type=int, default=4000)
+    raster.add_argument("--tile-size", type=int, default=256)
+    raster.add_argument("--max-workers", type=int, default=os.cpu_count())
+    raster.add_argument("--repeat", type=int, default=3)
+
+    render = subparsers.add_parser("render", help=benchmark_render.__doc__)
+    render.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    render.add_argument("--cell-size", type=int, default=25)
+    render.add_argument("--repeat", type=int, default=3)
+
+    sim = subparsers.add_parser("sim", help=benchmark_sim.__doc__)
+    sim.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 2500])
+    sim.add_argument("--steps", type=int, default=100_000)
+    sim.add_argument("--seed", type=int, default=0)
+
+    batch = subparsers.add_parser("batch", help=benchmark_batch.__doc__)
+    batch.add_argument("--num-envs", type=int, nargs="+", default=[1, 16, 256, 4096])
+    batch.add_argument("--size", type=int, default=50)
+    batch.add_argument("--steps", type=int, default=1000)
+    batch.add_argument("--seed", type=int, default=0)
+
+    walls = subparsers.add_parser("walls", help=benchmark_walls.__doc__)
+    walls.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 500, 1000, 2500, 5000]
+    )
+    walls.add_argument("--seed", type=int, default=0)
+    walls.add_argument("--repeat", type=int, default=3)
+
+    distance = subparsers.add_parser("distance", help=benchmark_distance.__doc__)
+    distance.add_argument("--size", type=int, default=1000)
+    distance.add_argument("--queries", type=int, default=10_000)
+    distance.add_argument("--seed", type=int, default=0)
+
+    paths = subparsers.add_parser("paths", help=benchmark_paths.__doc__)
+    paths.add_argument("file_path", nargs="?", default="../data/map.osm")
+    paths.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400])
+    paths.add_argument("--cluster-size", type=int, default=16)
+    paths.add_argument("--queries", type=int, default=50)
+    paths.add_argument("--seed", type=int, default=0)
+
+    replay = subparsers.add_parser("replay", help=benchmark_replay.__doc__)
+    replay.add_argument("--size", type=int, default=100)
+    replay.add_argument("--ticks", type=int, default=100_000)
+    replay.add_argument("--keyframe-interval", type=int, default=256)
+    replay.add_argument("--seeks", type=int, default=100)
+    replay.add_argument("--seed", type=int, default=0)
+
+    swarm = subparsers.add_parser("swarm", help=benchmark_swarm.__doc__)
+    swarm.add_argument("--size", type=int, default=1000)
+    swarm.add_argument(
+        "--num-agents", type=int, nargs="+", default=[10, 100, 1000, 10_000]
+    )
+    swarm.add_argument("--steps", type=int, default=1000)
+    swarm.add_argument("--seed", type=int, default=0)
+
+    visibility = subparsers.add_parser("visibility", help=benchmark_visibility.__doc__)
+    visibility.add_argument("--size", type=int, default=1000)
+    visibility.add_argument(
+        "--num-agents", type=int, nargs="+", default=[10, 100, 300, 1000]
+    )
+    visibility.add_argument("--radius", type=int, default=15)
+    visibility.add_argument("--steps", type=int, default=20)
+    visibility.add_argument("--seed", type=int, default=0)
+
+    exploration = subparsers.add_parser(
+        "exploration", help=benchmark_exploration.__doc__
+    )
+    exploration.add_argument("--size", type=int, default=2000)
+    exploration.add_argument("--num-agents", type=int, default=100)
+    exploration.add_argument("--radius", type=int, default=15)
+    exploration.add_argument("--steps", type=int, default=20)
+    exploration.add_argument("--seed", type=int, default=0)
+
+    belief = subparsers.add_parser("belief", help=benchmark_belief.__doc__)
+    belief.add_argument("file_path", nargs="?", default="../data/map.osm")
+    belief.add_argument("--size", type=int, default=500)
+    belief.add_argument("--num-agents", type=int, nargs="+", default=[12, 24, 48])
+    belief.add_argument("--radius", type=int, default=8)
+    belief.add_argument("--steps", type=int, default=100)
+    belief.add_argument("--seed", type=int, default=0)
+
+    roads = subparsers.add_parser("roads", help=benchmark_roads.__doc__)
+    roads.add_argument("file_path", nargs="?", default="../data/map.osm")
+    roads.add_argument("--copies", type=int, default=100)
+    roads.add_argument("--sources", type=int, nargs="+", default=[1, 10, 100])
+    roads.add_argument("--seed", type=int, default=0)
+
+    world = subparsers.add_parser("world", help=benchmark_world.__doc__)
+    world.add_argument("--size", type=int, default=10_000)
+    world.add_argument("--updates", type=int, default=10_000)
+    world.add_argument("--seed", type=int, default=0)
+
+    args = vars(parser.parse_args())
+    benchmark = globals()[f"benchmark_{args.pop('benchmark')}"]
+    benchmark(**args)
+
+
+if __name__ == "__main__":
+    main()
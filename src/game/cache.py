@@ -0,0 +1,266 @@
+"""Content-addressed on-disk cache of rasterized OSM grids.
+
+Grids are rasterized tile by tile straight into ``.npy`` files named after a
+key that covers the source file contents, the grid resolution and the feature
+layers, and are opened with ``np.load(mmap_mode=...)`` so a warm launch only
+maps the file.
+
+Pre-warm a directory of maps from the repository root (where ``main.py`` looks
+for the cache), e.g. ``PYTHONPATH=src python -m game.cache warm data``.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from .osm import (
+    FEATURE_LAYERS,
+    grid_shape_for_resolution,
+    read_bounds,
+    tiled_osm_to_grid,
+)
+from .profiling import profiler
+from .roads import NON_VEHICLE_HIGHWAYS, RoadGraph
+from .spatial import FeatureIndex
+
+# Bump when the rasterizer output changes for the same inputs
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join("data", "interim", "osm_grids")
+
+
+def file_digest(file_path, chunk_size=2**20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GridCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=None, max_age=None):
+        """Cache rasterized grids in ``cache_dir``.
+
+        ``max_bytes`` and ``max_age`` (seconds since last use) bound the cache;
+        they are enforced by ``evict``, which runs after every new entry.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._digests_path = os.path.join(cache_dir, "digests.json")
+
+    def _source_digest(self, file_path):
+        """Hash ``file_path``, reusing the last digest while its stat is unchanged.
+
+        Hashing a large extract costs a full read, so digests are remembered
+        by (path, size, mtime) to keep warm lookups in the millisecond range.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        try:
+            with open(self._digests_path, "r", encoding="utf-8") as f:
+                digests = json.load(f)
+        except (OSError, ValueError):
+            digests = {}
+
+        entry = digests.get(path)
+        if (
+            entry
+            and entry["size"] == stat.st_size
+            and entry["mtime"] == stat.st_mtime_ns
+        ):
+            return entry["sha256"]
+
+        sha256 = file_digest(path)
+        digests[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "sha256": sha256,
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._digests_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(digests, f)
+        os.replace(tmp_path, self._digests_path)
+        return sha256
+
+    def key(self, file_path, grid_width=100, grid_height=100, roads=False):
+        """Return the cache key of ``file_path`` rasterized at the given size,
+        with or without roads drawn in."""
+        params = (CACHE_VERSION, grid_width, grid_height, FEATURE_LAYERS)
+        if roads:
+            params += (NON_VEHICLE_HIGHWAYS,)
+        params = repr(params)
+        digest = hashlib.sha256(self._source_digest(file_path).encode())
+        digest.update(params.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    @staticmethod
+    def features_path(cache_path):
+        """Path of the ``FeatureIndex`` stored alongside a cached grid."""
+        return cache_path[: -len(".npy")] + ".features.npz"
+
+    @staticmethod
+    def roads_path(cache_path):
+        """Path of the ``RoadGraph`` stored alongside a cached grid."""
+        return cache_path[: -len(".npy")] + ".roads.npz"
+
+    def load(
+        self,
+        file_path,
+        grid_width=100,
+        grid_height=100,
+        mmap_mode="c",
+        features=False,
+        roads=False,
+    ):
+        """Return the grid of ``file_path``, rasterizing it on a cache miss.
+
+        The default copy-on-write ``mmap_mode`` gives a writable array whose
+        changes are never written back to the cache. With ``features=True``,
+        also returns the ``FeatureIndex`` built during the same
+        rasterization. With ``roads=True``, roads are drawn into the grid and
+        the ``RoadGraph`` is returned too: ``(grid, index, graph)`` with both.
+        """
+        cache_path = self.path(self.key(file_path, grid_width, grid_height, roads))
+        features_path = self.features_path(cache_path)
+        roads_path = self.roads_path(cache_path)
+        missing = (
+            not os.path.exists(cache_path)
+            or (features and not os.path.exists(features_path))
+            or (roads and not os.path.exists(roads_path))
+        )
+        if missing:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            index = FeatureIndex(grid_width, grid_height) if features else None
+            graph = RoadGraph() if roads else None
+            with profiler.timer("ingest"):
+                tiled_osm_to_grid(
+                    file_path,
+                    grid_width,
+                    grid_height,
+                    out_path=tmp_path,
+                    index=index,
+                    roads=graph,
+                )
+            if index is not None:
+                tmp_features = f"{features_path}.{os.getpid()}.tmp.npz"
+                index.save(tmp_features)
+                os.replace(tmp_features, features_path)
+            if graph is not None:
+                tmp_roads = f"{roads_path}.{os.getpid()}.tmp.npz"
+                graph.save(tmp_roads)
+                os.replace(tmp_roads, roads_path)
+            # Atomic, so readers never see a partially written grid
+            os.replace(tmp_path, cache_path)
+            self.evict(keep=cache_path)
+        else:
+            profiler.count("cache_hits")
+            os.utime(cache_path)  # Mark as recently used
+        grid = np.load(cache_path, mmap_mode=mmap_mode)
+        if not (features or roads):
+            return grid
+        loaded = [grid]
+        if features:
+            loaded.append(FeatureIndex.load(features_path))
+        if roads:
+            loaded.append(RoadGraph.load(roads_path))
+        return tuple(loaded)
+
+    def entries(self):
+        """Return ``(path, size, last_used)`` of every cached grid, oldest first.
+
+        ``size`` includes the grid's stored ``FeatureIndex`` and
+        ``RoadGraph``, if any.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npy")):
+            stat = os.stat(path)
+            size = stat.st_size
+            for extra in (self.features_path(path), self.roads_path(path)):
+                if os.path.exists(extra):
+                    size += os.path.getsize(extra)
+            entries.append((path, size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Drop entries older than ``max_age``, then the least recently used
+        ones until the cache fits in ``max_bytes``. Returns the removed paths."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        removed = []
+        for path, size, last_used in entries:
+            expired = self.max_age is not None and now - last_used > self.max_age
+            oversize = self.max_bytes is not None and total > self.max_bytes
+            if path == keep or not (expired or oversize):
+                continue
+            os.remove(path)
+            for extra in (self.features_path(path), self.roads_path(path)):
+                if os.path.exists(extra):
+                    os.remove(extra)
+            total -= size
+            removed.append(path)
+        return removed
+
+    def warm(self, directory, cell_size_m=1.0, grid_width=None, grid_height=None):
+        """Rasterize every ``.osm`` file under ``directory`` into the cache.
+
+        Each map is sized for ``cell_size_m`` meters per cell, as ``main.py``
+        sizes it from ``OSM_CELL_SIZE_M``, unless ``grid_width`` and
+        ``grid_height`` fix the size of every grid.
+        """
+        paths = sorted(
+            glob.glob(os.path.join(directory, "**", "*.osm"), recursive=True)
+        )
+        for path in paths:
+            start = time.perf_counter()
+            if grid_width and grid_height:
+                shape = grid_width, grid_height
+            else:
+                shape = grid_shape_for_resolution(read_bounds(path), cell_size_m)
+            self.load(path, *shape)
+            print(f"{path}: {time.perf_counter() - start:.3f} s")
+        return paths
+
+
+def cached_osm_to_grid(file_path, grid_width=100, grid_height=100, **kwargs):
+    """Drop-in for ``osm_to_grid`` backed by a ``GridCache``."""
+    return GridCache(**kwargs).load(file_path, grid_width, grid_height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-bytes", type=int, default=None)
+    parser.add_argument("--max-age", type=float, default=None, help="seconds")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm = subparsers.add_parser("warm", help=GridCache.warm.__doc__)
+    warm.add_argument("directory")
+    warm.add_argument("--cell-size", type=float, default=1.0, help="meters")
+    warm.add_argument("--width", type=int, default=None)
+    warm.add_argument("--height", type=int, default=None)
+
+    subparsers.add_parser("evict", help="Apply the size and age limits.")
+
+    args = parser.parse_args()
+    cache = GridCache(args.cache_dir, args.max_bytes, args.max_age)
+    if args.command == "warm":
+        cache.warm(args.directory, args.cell_size, args.width, args.height)
+    else:
+        for path in cache.evict():
+            print(f"removed {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,12 @@ class Camera:
             (y - self.screen_height / 2) / self.zoom + self.cam_y,
         )
 
+    def visible_rect(self):
+        """Return the world rectangle ``(left, bottom, right, top)`` on screen."""
+        left, bottom = self.screen_to_world(0, 0)
+        right, top = self.screen_to_world(self.screen_width, self.screen_height)
+        return left, bottom, right, top
+
     def apply_zoom(self, scroll_y, zoom_speed=0.1):
         self.zoom += scroll_y * zoom_speed
         self.zoom = max(self.min_zoom, min(self.max_zoom, self.zoom))
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .simulation import BLOCKING
+
+UNREACHABLE = -1
+
+
+def passable_mask(grid_array):
+    """Cells an agent may stand on: everything but walls and debris."""
+    return ~np.isin(grid_array, BLOCKING)
+
+
+def distance_field(passable, sources):
+    """Breadth-first step distances from the nearest of ``sources``.
+
+    ``sources`` is an ``(N, 2)`` array of ``(y, x)`` cells; moves are the four
+    ``Simulation`` moves. The frontier is expanded one whole ring at a time as
+    an array of flat indices, so the work per ring is vectorized and the total
+    is proportional to the number of reachable cells. Returns an ``int32``
+    grid with ``UNREACHABLE`` where no source can reach.
+    """
+    height, width = passable.shape
+    # A blocked border removes the bounds checks from the expansion
+    open_cells = np.zeros((height + 2, width + 2), dtype=bool)
+    open_cells[1:-1, 1:-1] = passable
+    open_cells = open_cells.ravel()
+    offsets = np.array([-1, 1, -(width + 2), width + 2])
+
+    sources = np.asarray(sources, dtype=np.intp).reshape(-1, 2)
+    frontier = np.unique((sources[:, 0] + 1) * (width + 2) + sources[:, 1] + 1)
+    frontier = frontier[open_cells[frontier]]
+
+    dist = np.full(open_cells.size, UNREACHABLE, dtype=np.int32)
+    dist[frontier] = 0
+    step = 0
+    while frontier.size:
+        step += 1
+        neighbours = (frontier[:, None] + offsets).ravel()
+        neighbours = neighbours[open_cells[neighbours]]
+        neighbours = np.unique(neighbours[dist[neighbours] == UNREACHABLE])
+        dist[neighbours] = step
+        frontier = neighbours
+    return dist.reshape(height + 2, width + 2)[1:-1, 1:-1]
+
+
+class DistanceFields:
+    """Per-source distance fields over a grid, computed once and cached.
+
+    Fields are kept in an LRU cache of ``max_fields`` entries. When a cell
+    changes, ``invalidate`` drops only the fields the change can affect.
+    """
+
+    def __init__(self, grid_array, max_fields=256):
+        self.grid_array = grid_array
+        self.max_fields = max_fields
+        self.passable = passable_mask(grid_array)
+        self._fields = OrderedDict()  # (y, x) -> distance field
+
+    def field(self, y, x):
+        """Return the distance field of source cell ``(y, x)``."""
+        key = (y, x)
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+        field = distance_field(self.passable, [key])
+        field.flags.writeable = False  # Shared between callers
+        self._fields[key] = field
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def distance(self, source, target):
+        """Steps from ``source`` to ``target`` (``UNREACHABLE`` if cut off)."""
+        return int(self.field(*source)[target])
+
+    def distances(self, source, targets):
+        """Steps from ``source`` to each ``(y, x)`` row of ``targets``."""
+        targets = np.asarray(targets, dtype=np.intp).reshape(-1, 2)
+        return self.field(*source)[targets[:, 0], targets[:, 1]]
+
+    def nearest(self, sources):
+        """Distance from every cell to the closest of ``sources`` (not cached)."""
+        return distance_field(self.passable, sources)
+
+    def invalidate(self, y, x):
+        """Update after cell ``(y, x)`` of the grid changed.
+
+        A field can only change if the cell is, or borders, a cell the source
+        reached: a cell opening up next to its reachable area, or a reachable
+        cell becoming blocked. The one exception is the source cell itself,
+        whose field is all ``UNREACHABLE`` while it is blocked.
+        """
+        passable = not np.isin(self.grid_array[y, x], BLOCKING)
+        if passable == self.passable[y, x]:
+            return
+        self.passable[y, x] = passable
+
+        y0, y1 = max(y - 1, 0), min(y + 2, self.passable.shape[0])
+        x0, x1 = max(x - 1, 0), min(x + 2, self.passable.shape[1])
+        stale = [
+            key
+            for key, field in self._fields.items()
+            if key == (y, x) or (field[y0:y1, x0:x1] != UNREACHABLE).any()
+        ]
+        for key in stale:
+            del self._fields[key]
@@ -0,0 +1,95 @@
+import numpy as np
+
+# Cell value written into the occupancy grid for each entity kind
+AGENT = 2
+VICTIM = 6
+FREE = 0
+
+
+class EntityRegistry:
+    """Positions of agents and victims, kept in step with the occupancy grid.
+
+    Entities live in compact arrays indexed by entity id (``positions`` is
+    ``(N, 2)`` rows/cols, ``kinds`` the cell value) plus a cell -> id map, so
+    finding or moving an entity is O(1) instead of a scan of the whole grid.
+    All moves go through the registry, which writes the grid as it goes.
+    """
+
+    def __init__(self, grid_array, capacity=16):
+        self.grid_array = grid_array
+        self.positions = np.zeros((capacity, 2), dtype=np.int32)
+        self.kinds = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.count = 0  # Ids handed out so far
+        self.cells = {}  # (y, x) -> entity id
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _grow(self):
+        capacity = 2 * len(self.kinds)
+        self.positions = np.resize(self.positions, (capacity, 2))
+        self.kinds = np.resize(self.kinds, capacity)
+        self.alive = np.resize(self.alive, capacity)
+        self.alive[self.count :] = False
+
+    def add(self, kind, y, x):
+        """Place a new entity of ``kind`` on cell ``(y, x)``; returns its id."""
+        if (y, x) in self.cells:
+            raise ValueError(f"Cell {(y, x)} is already occupied")
+        if self.count == len(self.kinds):
+            self._grow()
+        entity = self.count
+        self.count += 1
+        self.positions[entity] = y, x
+        self.kinds[entity] = kind
+        self.alive[entity] = True
+        self.cells[(y, x)] = entity
+        self.grid_array[y, x] = kind
+        return entity
+
+    def _check_alive(self, entity):
+        if not (0 <= entity < self.count and self.alive[entity]):
+            raise ValueError(f"Entity {entity} is not on the grid")
+
+    def remove(self, entity):
+        """Take an entity off the grid, freeing its cell."""
+        self._check_alive(entity)
+        y, x = self.position(entity)
+        del self.cells[(y, x)]
+        self.alive[entity] = False
+        self.grid_array[y, x] = FREE
+
+    def position(self, entity):
+        """Return the ``(y, x)`` cell of an entity."""
+        y, x = self.positions[entity]
+        return int(y), int(x)
+
+    def at(self, y, x):
+        """Return the id of the entity on ``(y, x)``, or ``None``."""
+        return self.cells.get((y, x))
+
+    def move(self, entity, y, x):
+        """Move an entity to ``(y, x)``, freeing the cell it leaves.
+
+        The caller checks that the move is legal; returns the old position.
+        Moving an entity onto its own cell does nothing.
+        """
+        self._check_alive(entity)
+        old_y, old_x = self.position(entity)
+        if (y, x) == (old_y, old_x):
+            return old_y, old_x
+        if (y, x) in self.cells:
+            raise ValueError(f"Cell {(y, x)} is already occupied")
+        del self.cells[(old_y, old_x)]
+        self.cells[(y, x)] = entity
+        self.positions[entity] = y, x
+        self.grid_array[old_y, old_x] = FREE
+        self.grid_array[y, x] = self.kinds[entity]
+        return old_y, old_x
+
+    def of_kind(self, kind):
+        """Return the ids of the live entities of ``kind``."""
+        return np.flatnonzero(
+            self.alive[: self.count] & (self.kinds[: self.count] == kind)
+        )
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Number of set bits in each byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack_mask(mask):
+    """Bit-pack a boolean ``(H, W)`` mask along rows, 8 cells per byte.
+
+    Cell ``(y, x)`` is bit ``x & 7`` of byte ``(y, x >> 3)``; the padding
+    bits at the end of each row are 0.
+    """
+    return np.packbits(mask, axis=1, bitorder="little")
+
+
+def _shift_west(bits):
+    """Move every cell's bit to the cell on its left (``x - 1``)."""
+    out = bits >> 1
+    out[:, :-1] |= bits[:, 1:] << 7
+    return out
+
+
+def _shift_east(bits):
+    """Move every cell's bit to the cell on its right (``x + 1``)."""
+    out = bits << 1
+    out[:, 1:] |= bits[:, :-1] >> 7
+    return out
+
+
+class ExplorationMap:
+    """Which cells each agent, and the team as a whole, has seen.
+
+    Every layer is a bit-packed ``(H, ceil(W / 8))`` array, 1 bit per cell:
+    one layer per agent plus the team union as the last one. Merges are
+    byte-wise ORs and counts are popcount lookups, so coverage statistics
+    never unpack the grid.
+    """
+
+    def __init__(self, grid_height, grid_width, num_agents=1, passable=None):
+        self.grid_height = grid_height
+        self.grid_width = grid_width
+        self.num_agents = num_agents
+        self.team = num_agents  # Layer of the team union
+        self.bits = np.zeros(
+            (num_agents + 1, grid_height, -(-grid_width // 8)), dtype=np.uint8
+        )
+        # Cells that count towards coverage; all of them by default
+        if passable is None:
+            passable = np.ones((grid_height, grid_width), dtype=bool)
+        self.passable = pack_mask(passable)
+        self.num_passable = int(POPCOUNT[self.passable].sum())
+
+    def mark(self, agents, y, x):
+        """Record that each agent in ``agents`` saw cell ``(y, x)`` (arrays).
+
+        Returns the ``(y, x)`` arrays of the cells new to the team, e.g. to
+        redraw only those.
+        """
+        agents, y, x = np.broadcast_arrays(agents, y, x)
+        row = self.bits.shape[2]
+        byte = y.astype(np.int64) * row + (x >> 3)
+        bit = (1 << (x & 7)).astype(np.uint8)
+        # Flat indices make ``ufunc.at`` much faster than index tuples
+        np.bitwise_or.at(self.bits.reshape(-1), agents * self.bits[0].size + byte, bit)
+
+        team = self.bits[self.team].reshape(-1)
+        new = (team[byte] & bit) == 0
+        np.bitwise_or.at(team, byte[new], bit[new])
+        # A cell several agents saw is only new once
+        cells = np.unique(y[new].astype(np.int64) * self.grid_width + x[new])
+        return np.divmod(cells, self.grid_width)
+
+    def merge(self, other):
+        """OR in another map of the same shape, e.g. from another run."""
+        self.bits |= other.bits
+
+    def union(self, agents):
+        """Bit-packed union of the layers of ``agents``."""
+        return np.bitwise_or.reduce(self.bits[np.asarray(agents)], axis=0)
+
+    def count(self, layer=None):
+        """Number of passable cells seen in ``layer`` (the team by default)."""
+        bits = self.bits[self.team if layer is None else layer]
+        return int(POPCOUNT[bits & self.passable].sum())
+
+    def coverage(self, layer=None):
+        """Share of the passable cells seen in ``layer``, from 0 to 1."""
+        return self.count(layer) / max(self.num_passable, 1)
+
+    def frontier(self, layer=None):
+        """Seen passable cells next to unseen passable ones, as ``(y, x)``.
+
+        Worked out on the packed bits; only bytes holding frontier cells are
+        unpacked.
+        """
+        seen = self.bits[self.team if layer is None else layer] & self.passable
+        unseen = ~seen & self.passable
+        near = _shift_west(unseen) | _shift_east(unseen)
+        near[1:] |= unseen[:-1]
+        near[:-1] |= unseen[1:]
+        frontier = seen & near
+        rows, cols = np.nonzero(frontier)
+        bits = np.unpackbits(frontier[rows, cols][:, None], axis=1, bitorder="little")
+        which, bit = np.nonzero(bits)
+        return rows[which], cols[which] * 8 + bit
+
+    def unpack(self, layer=None):
+        """``(H, W)`` uint8 grid of ``layer`` (1 where seen)."""
+        bits = self.bits[self.team if layer is None else layer]
+        return np.unpackbits(bits, axis=1, count=self.grid_width, bitorder="little")
+
+    def view(self, layer=None):
+        """A grid-like view of ``layer`` that unpacks only the blocks sliced
+        from it, for drawing with ``GridRenderer``."""
+        return _LayerView(self, self.team if layer is None else layer)
+
+
+class _LayerView:
+    """Read-only ``(H, W)`` uint8 view of one bit-packed layer."""
+
+    def __init__(self, exploration, layer):
+        self.exploration = exploration
+        self.layer = layer
+        self.shape = (exploration.grid_height, exploration.grid_width)
+
+    def __getitem__(self, key):
+        rows, cols = key
+        x0, x1, _ = cols.indices(self.shape[1])
+        bits = self.exploration.bits[self.layer][rows, x0 // 8 : -(-x1 // 8)]
+        cells = np.unpackbits(bits, axis=1, bitorder="little")
+        return cells[:, x0 % 8 : x0 % 8 + max(x1 - x0, 0)]
@@ -1,16 +1,28 @@
-import numpy as np
 import pyglet
 from pyglet import shapes
+from pyglet.math import Mat4
 from pyglet.window import key
 
 from .camera import Camera
-from .walls import GridWorldGenerator
+from .distance import passable_mask
+from .exploration import ExplorationMap
+from .loop import FixedTimestep
+from .profiling import profiler
+from .render import FOG_TABLE, GridRenderer
+from .replay import MissionRecorder
+from .simulation import DOWN, LEFT, RIGHT, STAY, UP, Simulation
+from .visibility import VisibilityEngine
 
 
 # Main Game Class
 class MainGUI(pyglet.window.Window):
     def __init__(self, width, height, config, grid_array=None):
-        super().__init__(width, height, caption="Grid World with Wall Shapes")
+        super().__init__(
+            width,
+            height,
+            caption="Grid World with Wall Shapes",
+            vsync=config.get("VSYNC", True),
+        )
 
         self.CELL_SIZE = config["CELL_SIZE"]  # Size of each cell in the grid
         self.GRID_WIDTH = config["WIDTH"] // self.CELL_SIZE  # Number of columns
@@ -18,119 +30,208 @@ class MainGUI(pyglet.window.Window):
 
         # Handle keys
         self.keys = key.KeyStateHandler()
+        self.push_handlers(self.keys)
 
-        # Generate the grid with walls
-        grid_generator = GridWorldGenerator(self.GRID_WIDTH, self.GRID_HEIGHT)
-        grid_generator.generate_walls()
-        if grid_array is None:
-            self.grid_array = grid_generator.get_grid()
-        else:
-            self.grid_array = grid_array
-
-        # print(self.grid_array)
-        # print(self.grid_array.shape)
-
-        # Place the player in the center of the grid
-        self.grid_array[self.GRID_HEIGHT // 2, self.GRID_WIDTH // 2] = (
-            2  # Player starts at the center
+        # Game state; the window only draws it and feeds it input
+        self.simulation = Simulation(self.GRID_WIDTH, self.GRID_HEIGHT, grid_array)
+        self.grid_array = self.simulation.grid_array
+        # A supplied grid (e.g. from OSM) sets its own size
+        self.GRID_HEIGHT, self.GRID_WIDTH = self.grid_array.shape
+        self.entities = self.simulation.entities
+        self.player = self.simulation.player
+        # Log the mission for replay when RECORD names a file
+        self.recorder = None
+        if config.get("RECORD"):
+            self.recorder = MissionRecorder(config["RECORD"], self.simulation)
+
+        # What the player's sensor can see, and the cells seen so far
+        self.visibility = VisibilityEngine(
+            self.grid_array, radius=config.get("SENSOR_RADIUS", 8)
+        )
+        self.exploration = ExplorationMap(
+            self.GRID_HEIGHT, self.GRID_WIDTH, passable=passable_mask(self.grid_array)
         )
 
         # Apply the scaling to the window's view matrix
         self.camera = Camera(self.width, self.height, zoom=config["ZOOM_LEVEL"])
+        # Allow zooming out until the whole world fits in the window
+        world_size = max(self.GRID_WIDTH, self.GRID_HEIGHT) * self.CELL_SIZE
+        self.camera.min_zoom = min(
+            self.camera.min_zoom, min(self.width, self.height) / world_size
+        )
         self.change_zoom()
 
         # Create a batch for efficient drawing
         self.batch = pyglet.graphics.Batch()
-        self.shapes = []  # To store all shapes
-        self.player_shapes = []  # To store player shapes separately
+        self.background = pyglet.graphics.Group(order=0)  # Grid cells
+        self.fog = pyglet.graphics.Group(order=1)  # Unexplored cells
+        self.foreground = pyglet.graphics.Group(order=2)  # Player, on top
+        self.grid_renderer = None
+        self.fog_renderer = None
+        self.player_shape = None  # Created once, then only moved
+        self.show_fog = config.get("FOG", True)
+        self.explore()
         self.draw_grid()
         self.draw_player()
 
+        # Ticks run at a fixed rate however fast frames are drawn. The loop
+        # is advanced once per frame interval: a plain ``schedule`` would
+        # keep pyglet from ever sleeping between frames.
+        self.loop = FixedTimestep(
+            self.update,
+            tick_rate=config.get("TICK_RATE", 15),
+            speed=config.get("SIM_SPEED", 1.0),
+            max_lag=config.get("MAX_LAG", 0.5),
+        )
+        pyglet.clock.schedule_interval(self.loop.advance, 1 / config["FPS"])
+
+        # On-screen timings, refreshed twice a second, when profiling
+        self.overlay = None
+        if profiler.enabled:
+            self.overlay = pyglet.text.Label(
+                "",
+                font_name="monospace",
+                font_size=10,
+                x=10,
+                y=self.height - 10,
+                anchor_y="top",
+                width=self.width - 20,
+                multiline=True,
+                color=(255, 255, 0, 255),
+            )
+            pyglet.clock.schedule_interval(self.update_overlay, 0.5)
+
     def change_zoom(self):
-        player_pos = np.argwhere(self.grid_array == 2)[0]
-        player_x = player_pos[1] * self.CELL_SIZE
-        player_y = player_pos[0] * self.CELL_SIZE
+        player_y, player_x = self.entities.position(self.player)
+        player_x *= self.CELL_SIZE
+        player_y *= self.CELL_SIZE
         self.camera.center_player(player_x, player_y)
         self.view = self.camera.get_view_matrix()
 
     def follow_player(self):
-        player_pos = np.argwhere(self.grid_array == 2)[0]
-        player_x = player_pos[1] * self.CELL_SIZE + self.CELL_SIZE / 2
-        player_y = player_pos[0] * self.CELL_SIZE + self.CELL_SIZE / 2
+        player_y, player_x = self.entities.position(self.player)
+        player_x = player_x * self.CELL_SIZE + self.CELL_SIZE / 2
+        player_y = player_y * self.CELL_SIZE + self.CELL_SIZE / 2
         self.camera.keep_target_in_view(player_x, player_y)
         self.view = self.camera.get_view_matrix()
 
     def draw_grid(self):
-        """Draw the grid with walls, roads, buildings, debris, and player."""
-        self.shapes.clear()  # Clear previous shapes
-
-        color_map = {
-            1: (185, 185, 185),  # Wall (light gray)
-            3: (100, 100, 100),  # Debris (dark gray)
-            4: (220, 220, 220),  # Road (light road gray)
-            5: (150, 150, 255),  # Building (blue-ish)
-        }
-
-        for y in range(self.grid_array.shape[0]):
-            for x in range(self.grid_array.shape[1]):
-                cell_value = self.grid_array[y, x]
-                color = color_map.get(cell_value)
-                if color:
-                    rect = shapes.Rectangle(
-                        x * self.CELL_SIZE,
-                        y * self.CELL_SIZE,
-                        self.CELL_SIZE,
-                        self.CELL_SIZE,
-                        color=color,
-                        batch=self.batch,
-                    )
-                    self.shapes.append(rect)
+        """Draw the grid with walls, roads, buildings and debris."""
+        if self.grid_renderer is not None:
+            self.grid_renderer.delete()
+        with profiler.timer("draw_grid"):
+            self.grid_renderer = GridRenderer(
+                self.grid_array,
+                self.CELL_SIZE,
+                batch=self.batch,
+                group=self.background,
+            )
+            self.grid_renderer.update_view(self.camera)
+        if self.fog_renderer is not None:
+            self.fog_renderer.delete()
+            self.fog_renderer = None
+        if self.show_fog:
+            self.fog_renderer = GridRenderer(
+                self.exploration.view(),
+                self.CELL_SIZE,
+                batch=self.batch,
+                group=self.fog,
+                table=FOG_TABLE,
+            )
+            self.fog_renderer.update_view(self.camera)
 
     def draw_player(self):
-        # Draw the player (blue)
-        player_indices = np.argwhere(self.grid_array == 2)
-        player = shapes.Rectangle(
-            player_indices[0][1] * self.CELL_SIZE,
-            player_indices[0][0] * self.CELL_SIZE,
-            self.CELL_SIZE,
-            self.CELL_SIZE,
-            color=(0, 0, 255),
-            batch=self.batch,
+        """Place the player shape (blue) on the player's cell."""
+        player_y, player_x = self.entities.position(self.player)
+        if self.player_shape is None:
+            self.player_shape = shapes.Rectangle(
+                player_x * self.CELL_SIZE,
+                player_y * self.CELL_SIZE,
+                self.CELL_SIZE,
+                self.CELL_SIZE,
+                color=(0, 0, 255),
+                batch=self.batch,
+                group=self.foreground,
+            )
+        else:
+            self.player_shape.position = (
+                player_x * self.CELL_SIZE,
+                player_y * self.CELL_SIZE,
+            )
+
+    def set_cell(self, y, x, value):
+        """Change a cell and schedule it for redraw."""
+        if self.recorder is not None:
+            self.recorder.set_cell(y, x, value)
+        else:
+            self.grid_array[y, x] = value
+        self.grid_renderer.mark_dirty(int(y), int(x))
+        self.visibility.invalidate(y, x)
+
+    def explore(self):
+        """Mark the cells the player sees as explored; redraw the new ones."""
+        positions = [self.entities.position(self.player)]
+        agent, y, x = self.visibility.cells(
+            positions, self.visibility.update(positions)
         )
-        self.player_shapes = [player]  # Store only one player shape
-
-    def move_player(self, dx, dy):
-        """Move player on the grid."""
-        player_pos = np.argwhere(self.grid_array == 2)[0]
-        current_y, current_x = player_pos
-        new_y = current_y + dy
-        new_x = current_x + dx
-
-        # Check bounds and if new position is free
-        if (
-            0 <= new_x < self.GRID_WIDTH
-            and 0 <= new_y < self.GRID_HEIGHT
-            and self.grid_array[new_y, new_x] != 1
-            and self.grid_array[new_y, new_x] != 3
-        ):
-            # Move the player
-            self.grid_array[current_y, current_x] = 0  # Set old position to free
-            self.grid_array[new_y, new_x] = 2  # Set new position to player
-        self.follow_player()
+        new_y, new_x = self.exploration.mark(agent, y, x)
+        if self.fog_renderer is not None:
+            for cell in zip(new_y.tolist(), new_x.tolist()):
+                self.fog_renderer.mark_dirty(*cell)
+
+    def step(self, action):
+        """Advance the simulation one tick, recording it if enabled."""
+        current_y, current_x = self.entities.position(self.player)
+        if self.recorder is not None:
+            moved = self.recorder.step(action)
+        else:
+            moved = self.simulation.step(action)
+        if moved:
+            self.grid_renderer.mark_dirty(current_y, current_x)
+            self.grid_renderer.mark_dirty(*self.entities.position(self.player))
+            self.draw_player()
+            self.follow_player()
+            self.explore()
 
     def update(self, dt):
-        self.push_handlers(self.keys)
-        if self.keys[pyglet.window.key.UP]:
-            self.move_player(0, 1)
-        elif self.keys[pyglet.window.key.DOWN]:
-            self.move_player(0, -1)
-        elif self.keys[pyglet.window.key.LEFT]:
-            self.move_player(-1, 0)
-        elif self.keys[pyglet.window.key.RIGHT]:
-            self.move_player(1, 0)
+        with profiler.timer("tick"):
+            action = STAY
+            if self.keys[pyglet.window.key.UP]:
+                action = UP
+            elif self.keys[pyglet.window.key.DOWN]:
+                action = DOWN
+            elif self.keys[pyglet.window.key.LEFT]:
+                action = LEFT
+            elif self.keys[pyglet.window.key.RIGHT]:
+                action = RIGHT
+            self.step(action)
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        """Zoom in and out around the player."""
+        self.camera.apply_zoom(scroll_y)
+        self.follow_player()
 
     def on_draw(self):
         """Draw everything to the window."""
         self.clear()  # Clear the window
-        self.draw_player()  # Draw the grid (walls and free space)
-        self.batch.draw()  # Draw the player
+        with profiler.timer("upload"):
+            self.grid_renderer.update_view(self.camera)  # Chunks now on screen
+            self.grid_renderer.flush()  # Upload cells changed since last frame
+            if self.fog_renderer is not None:
+                self.fog_renderer.update_view(self.camera)
+                self.fog_renderer.flush()
+        with profiler.timer("draw"):
+            self.batch.draw()  # Draw the grid and the player
+        if self.overlay is not None:
+            # The overlay is fixed to the screen, not the world
+            world_view, self.view = self.view, Mat4()
+            self.overlay.draw()
+            self.view = world_view
+
+    def on_close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+        super().on_close()
+
+    def update_overlay(self, dt):
+        self.overlay.text = "\n".join(profiler.report())
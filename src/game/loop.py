@@ -0,0 +1,38 @@
+import math
+
+
+class FixedTimestep:
+    """Run a simulation at a fixed tick rate, independent of the frame rate.
+
+    ``advance`` is called once per rendered frame with the elapsed time. It
+    runs as many fixed ``1 / tick_rate`` steps as that time covers (times
+    ``speed``, so missions can run faster than real time). Under load it
+    catches up with several steps in one frame. A frame runs at most
+    ``max_steps`` ticks, by default enough for ``max_lag`` seconds of real
+    time at the configured speed; the backlog beyond that is dropped, so a
+    slow frame cannot trigger an ever-growing catch-up. Ticks are therefore
+    only lost when a single frame takes longer than ``max_lag``.
+    """
+
+    def __init__(self, step, tick_rate=15, speed=1.0, max_steps=None, max_lag=0.5):
+        self.step = step  # Called as step(dt) once per tick
+        self.dt = 1 / tick_rate
+        self.speed = speed
+        if max_steps is None:
+            max_steps = max(1, math.ceil(speed * tick_rate * max_lag))
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.ticks = 0
+
+    def advance(self, elapsed):
+        """Run the ticks due after ``elapsed`` seconds; returns how many ran."""
+        self.accumulator += elapsed * self.speed
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            self.step(self.dt)
+            self.accumulator -= self.dt
+            steps += 1
+        if steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.dt)
+        self.ticks += steps
+        return steps
@@ -1,10 +1,391 @@
+import math
 import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from skimage.draw import polygon
 
+# Cell value of each feature layer, in draw order: a later layer overwrites an
+# earlier one where they overlap (parks are drawn over buildings). A way
+# belongs to a layer when any of its tags matches; ``None`` accepts any value.
+FEATURE_LAYERS = (
+    (1, {"building": None}),  # Buildings
+    (
+        3,
+        {
+            "leisure": ("park",),
+            "landuse": ("grass", "forest", "meadow", "recreation_ground"),
+        },
+    ),  # Parks/green spaces
+)
 
-def osm_to_grid(file_path):
+# Cell value for each layer rank (rank 0 is free space)
+LAYER_VALUES = np.array([0] + [value for value, _ in FEATURE_LAYERS], dtype=np.uint8)
+
+EARTH_RADIUS_M = 6371008.8  # Mean radius, for sizing grids in meters
+
+
+def way_layer(tags):
+    """Return the rank of the top-most layer a way is drawn in (0 if none)."""
+    rank = 0
+    for i, (_, rules) in enumerate(FEATURE_LAYERS, start=1):
+        for k, values in rules.items():
+            if k in tags and (values is None or tags[k] in values):
+                rank = i
+                break
+    return rank
+
+
+def _read_way(elem):
+    """Return ``(way_id, refs, tags)`` of a parsed ``<way>`` element."""
+    refs = [int(nd.attrib["ref"]) for nd in elem.iter("nd")]
+    tags = {tag.attrib["k"]: tag.attrib["v"] for tag in elem.iter("tag")}
+    return int(elem.attrib["id"]), refs, tags
+
+
+def iter_osm(file_path):
+    """Stream the top-level elements of an OSM file.
+
+    Yields ``("bounds", (minlat, minlon, maxlat, maxlon))``,
+    ``("node", (node_id, lat, lon))`` and ``("way", (way_id, refs, tags))`` in
+    file order. Only ``start`` events are requested, so each element costs one
+    event: attributes are complete when an element starts, and a way's
+    children are complete once the next top-level element starts. Handled
+    elements are dropped from the root, so memory does not grow with the size
+    of the file.
+    """
+    context = ET.iterparse(file_path, events=("start",))
+    _, root = next(context)
+    way = None  # Way whose children are still being parsed
+    for _, elem in context:
+        if elem.tag in ("nd", "tag", "member"):
+            continue
+        if way is not None:
+            yield "way", _read_way(way)
+            way = None
+        root.clear()  # Drop every earlier sibling
+
+        if elem.tag == "node":
+            attrib = elem.attrib
+            yield "node", (
+                int(attrib["id"]),
+                float(attrib["lat"]),
+                float(attrib["lon"]),
+            )
+        elif elem.tag == "way":
+            way = elem
+        elif elem.tag == "bounds":
+            attrib = elem.attrib
+            yield "bounds", (
+                float(attrib["minlat"]),
+                float(attrib["minlon"]),
+                float(attrib["maxlat"]),
+                float(attrib["maxlon"]),
+            )
+    if way is not None:
+        yield "way", _read_way(way)
+
+
+class NodeIndex:
+    """Compact node-id -> (lat, lon) store backed by sorted NumPy arrays.
+
+    Nodes are appended to typed buffers (24 bytes per node) while the file is
+    streamed. A lookup first sorts the nodes added since the previous one and
+    merges them into the sorted arrays, so the nodes of a file are sorted once
+    even when nodes and ways are interleaved, and a whole way is resolved with
+    a single ``searchsorted``.
+    """
+
+    def __init__(self):
+        self._ids = array("q")  # Nodes added since the last merge
+        self._lats = array("d")
+        self._lons = array("d")
+        self._sorted = (
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.float64),
+            np.zeros(0, dtype=np.float64),
+        )
+
+    def __len__(self):
+        return len(self._sorted[0]) + len(self._ids)
+
+    def add(self, node_id, lat, lon):
+        self._ids.append(node_id)
+        self._lats.append(lat)
+        self._lons.append(lon)
+
+    def _merge(self):
+        """Merge the pending nodes into the sorted arrays and return them."""
+        if self._ids:
+            new_ids = np.frombuffer(self._ids, dtype=np.int64)
+            order = np.argsort(new_ids, kind="stable")
+            new_ids = new_ids[order]
+            ids, lats, lons = self._sorted
+            # After any equal ids, so the first node added for an id wins
+            pos = np.searchsorted(ids, new_ids, side="right")
+            self._sorted = (
+                np.insert(ids, pos, new_ids),
+                np.insert(lats, pos, np.frombuffer(self._lats)[order]),
+                np.insert(lons, pos, np.frombuffer(self._lons)[order]),
+            )
+            self._ids = array("q")
+            self._lats = array("d")
+            self._lons = array("d")
+        return self._sorted
+
+    def find(self, refs):
+        """Return ``(found, lats, lons)``: which of ``refs`` are known, and
+        the coordinates of those that are."""
+        ids, lats, lons = self._merge()
+        refs = np.asarray(refs, dtype=np.int64)
+        pos = np.searchsorted(ids, refs)
+        pos[pos == len(ids)] = 0
+        found = ids[pos] == refs if len(ids) else np.zeros(len(refs), dtype=bool)
+        pos = pos[found]
+        return found, lats[pos], lons[pos]
+
+    def lookup(self, refs):
+        """Return the ``(lat, lon)`` arrays of the known nodes among ``refs``.
+
+        Unknown refs are dropped, as ways in an extract may reference nodes
+        outside it.
+        """
+        _, lats, lons = self.find(refs)
+        return lats, lons
+
+
+def latlon_to_pixel(lat, lon, bounds, grid_width, grid_height):
+    """Project lat/lon (scalars or arrays) onto integer grid coordinates."""
+    minlat, minlon, maxlat, maxlon = bounds
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    x = ((lon - minlon) / (maxlon - minlon) * (grid_width - 1)).astype(np.intp)
+    y = ((1 - (lat - minlat) / (maxlat - minlat)) * (grid_height - 1)).astype(
+        np.intp
+    )  # flip y
+    return x, y
+
+
+def iter_feature_polygons(file_path, grid_width, grid_height, index=None, roads=None):
+    """Stream the feature ways of an OSM file as pixel-space polygons.
+
+    Yields ``(rank, poly_x, poly_y)`` for every way drawn in a feature layer,
+    with its vertices projected onto a ``grid_width`` x ``grid_height`` grid.
+    Each feature is also recorded in ``index`` (a ``FeatureIndex``) if given,
+    and the road network is built into ``roads`` (a ``RoadGraph``) if given.
+    """
+    bounds = None
+    nodes = NodeIndex()
+    items = iter_osm(file_path)
+    if roads is not None:
+        items = _collect_roads(items, roads, nodes)
+
+    for kind, item in items:
+        if kind == "node":
+            nodes.add(*item)
+        elif kind == "way":
+            if bounds is None:
+                raise ValueError(f"{file_path} has no <bounds> before its ways")
+            feature = _way_feature(item, nodes, bounds, grid_width, grid_height)
+            if feature is None:
+                continue
+            if index is not None:
+                rank, poly_x, poly_y = feature
+                index.add(item[0], item[2], LAYER_VALUES[rank], poly_x, poly_y)
+            yield feature
+        elif kind == "bounds":
+            bounds = item
+            if index is not None:
+                index.bounds = bounds
+
+
+def _way_feature(way, nodes, bounds, grid_width, grid_height):
+    """Return ``(rank, poly_x, poly_y)`` of a way drawn in a feature layer, or
+    ``None`` if it is in none or has fewer than 3 known nodes."""
+    _, refs, tags = way
+    rank = way_layer(tags)
+    if not rank:
+        return None
+    lats, lons = nodes.lookup(refs)
+    if len(lats) <= 2:
+        return None
+    poly_x, poly_y = latlon_to_pixel(lats, lons, bounds, grid_width, grid_height)
+    return rank, poly_x, poly_y
+
+
+def _collect_roads(items, roads, nodes):
+    """Pass ``iter_osm`` items through, handing the bounds and ways to
+    ``roads`` on the way. Once the stream ends, and the caller has added every
+    node to ``nodes``, the graph is built from them."""
+    for kind, item in items:
+        if kind == "way":
+            roads.add_way(*item)
+        elif kind == "bounds":
+            roads.bounds = item
+        yield kind, item
+    roads.build(nodes)
+
+
+def read_bounds(file_path):
+    """Return ``(minlat, minlon, maxlat, maxlon)`` of an OSM file."""
+    for kind, item in iter_osm(file_path):
+        if kind == "bounds":
+            return item
+    raise ValueError(f"{file_path} has no <bounds>")
+
+
+def bounds_size_m(bounds):
+    """Return the ``(width, height)`` in meters of a lat/lon box.
+
+    Uses an equirectangular approximation, which is accurate to well under a
+    cell at city scale.
+    """
+    minlat, minlon, maxlat, maxlon = bounds
+    height_m = math.radians(maxlat - minlat) * EARTH_RADIUS_M
+    width_m = (
+        math.radians(maxlon - minlon)
+        * EARTH_RADIUS_M
+        * math.cos(math.radians((minlat + maxlat) / 2))
+    )
+    return width_m, height_m
+
+
+def grid_shape_for_resolution(bounds, cell_size_m):
+    """Return the ``(grid_width, grid_height)`` giving cells of ``cell_size_m``."""
+    width_m, height_m = bounds_size_m(bounds)
+    return (
+        max(2, math.ceil(width_m / cell_size_m)),
+        max(2, math.ceil(height_m / cell_size_m)),
+    )
+
+
+def stream_osm_to_grid(
+    file_path, grid_width=100, grid_height=100, index=None, roads=None
+):
+    """Rasterize an OSM file in a single streaming pass.
+
+    Ways are classified and drawn as soon as they are parsed; only the node
+    coordinates are kept in memory, in a compact ``NodeIndex``. Produces the
+    same grid as the tree-based ``osm_to_grid(file_path, streaming=False)``.
+    Features are added to ``index`` (a ``FeatureIndex``) when one is given.
+    With ``roads`` (an empty ``RoadGraph``), the road network is built too
+    and drawn into the grid.
+    """
+    ranks = np.zeros((grid_height, grid_width), dtype=np.uint8)
+    for rank, poly_x, poly_y in iter_feature_polygons(
+        file_path, grid_width, grid_height, index, roads
+    ):
+        rr, cc = polygon(poly_y, poly_x, ranks.shape)
+        ranks[rr, cc] = np.maximum(ranks[rr, cc], rank)
+    grid = LAYER_VALUES[ranks]
+    if roads is not None:
+        roads.rasterize(grid)
+    return grid
+
+
+def _rasterize_tile(tile):
+    """Draw the features of one tile; returns its top-left corner and cells."""
+    top, left, height, width, features = tile
+    ranks = np.zeros((height, width), dtype=np.uint8)
+    for rank, poly_x, poly_y in features:
+        rr, cc = polygon(poly_y - top, poly_x - left, ranks.shape)
+        ranks[rr, cc] = np.maximum(ranks[rr, cc], rank)
+    return top, left, LAYER_VALUES[ranks]
+
+
+def tiled_osm_to_grid(
+    file_path,
+    grid_width=100,
+    grid_height=100,
+    tile_size=1024,
+    out_path=None,
+    workers=1,
+    index=None,
+    roads=None,
+):
+    """Rasterize an OSM file tile by tile, for grids too large for one array.
+
+    Feature polygons are bucketed by the tiles their bounding box overlaps, so
+    each ``tile_size`` x ``tile_size`` tile only draws the ways that touch it.
+    Tiles are written into a ``.npy`` memory map at ``out_path`` (or an
+    in-memory array when it is ``None``). With ``workers`` > 1 the tiles are
+    drawn in a process pool. Layers are merged with ``np.maximum`` of their
+    rank, so the result does not depend on draw order and always matches
+    ``stream_osm_to_grid``. Features are added to ``index`` and roads to
+    ``roads`` when they are given.
+    """
+    grid = _open_grid(out_path, grid_width, grid_height)
+    polygons = iter_feature_polygons(file_path, grid_width, grid_height, index, roads)
+    tiles = _bucket_tiles(polygons, grid_width, grid_height, tile_size)
+    _draw_tiles(grid, tiles, workers)
+    if roads is not None:
+        roads.rasterize(grid)
+    if out_path is not None:
+        grid.flush()
+    return grid
+
+
+def _open_grid(out_path, grid_width, grid_height):
+    """An empty grid in memory, or in a new ``.npy`` memory map at
+    ``out_path``."""
+    if out_path is None:
+        return np.zeros((grid_height, grid_width), dtype=np.uint8)
+    return np.lib.format.open_memmap(
+        out_path, mode="w+", dtype=np.uint8, shape=(grid_height, grid_width)
+    )
+
+
+def _bucket_tiles(polygons, grid_width, grid_height, tile_size):
+    """Group ``(rank, poly_x, poly_y)`` features by the tiles their bounding
+    box overlaps; returns the tiles to draw, as ``_rasterize_tile`` takes
+    them."""
+    # (tile_row, tile_col) -> features overlapping that tile
+    buckets = {}
+    for rank, poly_x, poly_y in polygons:
+        x0, x1 = max(poly_x.min(), 0), min(poly_x.max(), grid_width - 1)
+        y0, y1 = max(poly_y.min(), 0), min(poly_y.max(), grid_height - 1)
+        if x0 > x1 or y0 > y1:
+            continue  # Entirely off the grid
+        feature = (rank, poly_x.astype(np.int32), poly_y.astype(np.int32))
+        for ty in range(y0 // tile_size, y1 // tile_size + 1):
+            for tx in range(x0 // tile_size, x1 // tile_size + 1):
+                buckets.setdefault((ty, tx), []).append(feature)
+
+    return [
+        (
+            ty * tile_size,
+            tx * tile_size,
+            min(tile_size, grid_height - ty * tile_size),
+            min(tile_size, grid_width - tx * tile_size),
+            features,
+        )
+        for (ty, tx), features in buckets.items()
+    ]
+
+
+def _draw_tiles(grid, tiles, workers=1):
+    """Rasterize ``tiles`` into ``grid``, in a process pool if ``workers`` > 1."""
+    if workers > 1 and len(tiles) > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            chunksize = max(1, len(tiles) // (4 * workers))
+            results = executor.map(_rasterize_tile, tiles, chunksize=chunksize)
+            for top, left, cells in results:
+                grid[top : top + cells.shape[0], left : left + cells.shape[1]] = cells
+    else:
+        for tile in tiles:
+            top, left, cells = _rasterize_tile(tile)
+            grid[top : top + cells.shape[0], left : left + cells.shape[1]] = cells
+
+
+def osm_to_grid(file_path, grid_width=100, grid_height=100, streaming=True):
+    if streaming:
+        return stream_osm_to_grid(file_path, grid_width, grid_height)
+    return tree_osm_to_grid(file_path, grid_width, grid_height)
+
+
+def tree_osm_to_grid(file_path, grid_width=100, grid_height=100):
+    """Legacy rasterizer that parses the whole file into a tree first."""
     # Load OSM file
     with open(file_path, "r", encoding="utf-8") as f:
         osm_data = f.read()
@@ -13,63 +394,51 @@ def osm_to_grid(file_path):
     root = ET.fromstring(osm_data)
 
     # Get map bounds
-    bounds = root.find("bounds")
-    minlat = float(bounds.attrib["minlat"])
-    minlon = float(bounds.attrib["minlon"])
-    maxlat = float(bounds.attrib["maxlat"])
-    maxlon = float(bounds.attrib["maxlon"])
-
-    # Grid size
-    grid_width, grid_height = 100, 100
+    attrib = root.find("bounds").attrib
+    bounds = tuple(float(attrib[k]) for k in ("minlat", "minlon", "maxlat", "maxlon"))
+
     grid = np.zeros(
         (grid_height, grid_width), dtype=np.uint8
     )  # all free space initially
 
-    # Convert lat/lon to pixel coordinates
-    def latlon_to_pixel(lat, lon):
-        x = int((lon - minlon) / (maxlon - minlon) * (grid_width - 1))
-        y = int(
-            (1 - (lat - minlat) / (maxlat - minlat)) * (grid_height - 1)
-        )  # flip y axis
-        return x, y
-
     # Store nodes in a dictionary: node_id -> (lat, lon)
-    nodes = {}
-    for node in root.findall("node"):
-        node_id = node.attrib["id"]
-        lat = float(node.attrib["lat"])
-        lon = float(node.attrib["lon"])
-        nodes[node_id] = (lat, lon)
-
-    def draw_polygon_on_grid(way, value):
-        node_ids = [nd.attrib["ref"] for nd in way.findall("nd")]
-        poly_x = []
-        poly_y = []
-        for nid in node_ids:
-            if nid in nodes:
-                lat, lon = nodes[nid]
-                x, y = latlon_to_pixel(lat, lon)
-                poly_x.append(x)
-                poly_y.append(y)
-        if len(poly_x) > 2:
-            rr, cc = polygon(poly_y, poly_x, grid.shape)
-            grid[rr, cc] = value
-
-    # Draw buildings (1)
-    for way in root.findall("way"):
-        tags = {tag.attrib["k"]: tag.attrib["v"] for tag in way.findall("tag")}
-        if "building" in tags:
-            draw_polygon_on_grid(way, value=1)
-
-    # Draw parks/green spaces (2)
-    for way in root.findall("way"):
-        tags = {tag.attrib["k"]: tag.attrib["v"] for tag in way.findall("tag")}
-        if tags.get("leisure") == "park" or tags.get("landuse") in [
-            "grass",
-            "forest",
-            "meadow",
-            "recreation_ground",
-        ]:
-            draw_polygon_on_grid(way, value=3)
+    nodes = {
+        node.attrib["id"]: (float(node.attrib["lat"]), float(node.attrib["lon"]))
+        for node in root.findall("node")
+    }
+
+    # Draw buildings (1), then parks/green spaces (3)
+    for value, matches in ((1, _is_building), (3, _is_green)):
+        for way in root.findall("way"):
+            tags = {tag.attrib["k"]: tag.attrib["v"] for tag in way.findall("tag")}
+            if matches(tags):
+                _draw_tree_way(grid, way, nodes, bounds, value)
 
     return grid
+
+
+def _is_building(tags):
+    return "building" in tags
+
+
+def _is_green(tags):
+    return tags.get("leisure") == "park" or tags.get("landuse") in [
+        "grass",
+        "forest",
+        "meadow",
+        "recreation_ground",
+    ]
+
+
+def _draw_tree_way(grid, way, nodes, bounds, value):
+    """Fill the polygon of a ``<way>`` element with ``value``."""
+    coords = [
+        nodes[nd.attrib["ref"]] for nd in way.findall("nd") if nd.attrib["ref"] in nodes
+    ]
+    if len(coords) > 2:
+        lats, lons = zip(*coords)
+        poly_x, poly_y = latlon_to_pixel(
+            lats, lons, bounds, grid.shape[1], grid.shape[0]
+        )
+        rr, cc = polygon(poly_y, poly_x, grid.shape)
+        grid[rr, cc] = value
@@ -0,0 +1,259 @@
+import heapq
+
+import numpy as np
+
+from .distance import UNREACHABLE, distance_field, passable_mask
+
+# The four Simulation moves as (dy, dx)
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def astar(passable, start, goal, bounds=None):
+    """Shortest 4-connected path from ``start`` to ``goal`` as a list of cells.
+
+    ``bounds`` = ``(y0, y1, x0, x1)`` restricts the search to a window of the
+    grid (half-open). Returns ``None`` when there is no path.
+    """
+    if bounds is None:
+        bounds = (0, passable.shape[0], 0, passable.shape[1])
+    y0, y1, x0, x1 = bounds
+    goal_y, goal_x = goal
+
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(abs(start[0] - goal_y) + abs(start[1] - goal_x), 0, start)]
+    while heap:
+        _, g, cell = heapq.heappop(heap)
+        if cell == goal:
+            path = []
+            while cell is not None:
+                path.append(cell)
+                cell = came_from[cell]
+            return path[::-1]
+        if g > cost[cell]:
+            continue  # Stale heap entry
+        y, x = cell
+        for dy, dx in STEPS:
+            ny, nx = y + dy, x + dx
+            if not (y0 <= ny < y1 and x0 <= nx < x1) or not passable[ny, nx]:
+                continue
+            neighbour = (ny, nx)
+            if g + 1 < cost.get(neighbour, np.inf):
+                cost[neighbour] = g + 1
+                came_from[neighbour] = cell
+                h = abs(ny - goal_y) + abs(nx - goal_x)
+                heapq.heappush(heap, (g + 1 + h, g + 1, neighbour))
+    return None
+
+
+class HierarchicalPlanner:
+    """HPA*-style path planner over a grid split into square clusters.
+
+    Every run of open cells along the border of two clusters is an entrance,
+    represented by a pair of abstract nodes (one on each side) at its middle.
+    Within a cluster, nodes are linked by their step distance inside that
+    cluster. A query searches this small abstract graph and then refines each
+    abstract edge with an A* confined to one cluster. ``update`` rebuilds only
+    the clusters whose entrances or interior a changed cell touches.
+    """
+
+    def __init__(self, grid_array, cluster_size=16):
+        self.grid_array = grid_array
+        self.cluster_size = cluster_size
+        self.passable = passable_mask(grid_array)
+        height, width = grid_array.shape
+        self.num_clusters = (-(-height // cluster_size), -(-width // cluster_size))
+        self.entrances = {}  # (cluster, cluster) -> [(node, node), ...]
+        self.links = {}  # node -> set of nodes across a cluster border
+        self.intra = {}  # cluster -> {node: {node: cost}}
+
+        rows, cols = self.num_clusters
+        for cy in range(rows):
+            for cx in range(cols):
+                if cx + 1 < cols:
+                    self._build_entrances((cy, cx), (cy, cx + 1))
+                if cy + 1 < rows:
+                    self._build_entrances((cy, cx), (cy + 1, cx))
+        for cy in range(rows):
+            for cx in range(cols):
+                self._build_cluster((cy, cx))
+
+    def cluster_of(self, y, x):
+        return y // self.cluster_size, x // self.cluster_size
+
+    def cluster_bounds(self, cluster):
+        """Half-open ``(y0, y1, x0, x1)`` cell window of a cluster."""
+        cy, cx = cluster
+        height, width = self.passable.shape
+        y0, x0 = cy * self.cluster_size, cx * self.cluster_size
+        return (
+            y0,
+            min(y0 + self.cluster_size, height),
+            x0,
+            min(x0 + self.cluster_size, width),
+        )
+
+    def _neighbour_clusters(self, cluster):
+        cy, cx = cluster
+        rows, cols = self.num_clusters
+        for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+            if 0 <= ny < rows and 0 <= nx < cols:
+                yield ny, nx
+
+    def _border_key(self, a, b):
+        return (a, b) if a < b else (b, a)
+
+    def _build_entrances(self, a, b):
+        """(Re)compute the entrances on the border between clusters a < b."""
+        for node, other in self.entrances.pop((a, b), []):
+            self.links[node].discard(other)
+            self.links[other].discard(node)
+
+        ay0, ay1, ax0, ax1 = self.cluster_bounds(a)
+        if a[0] == b[0]:  # Side by side: a vertical border
+            inner = [(y, ax1 - 1) for y in range(ay0, ay1)]
+            outer = [(y, ax1) for y in range(ay0, ay1)]
+        else:  # Stacked: a horizontal border
+            inner = [(ay1 - 1, x) for x in range(ax0, ax1)]
+            outer = [(ay1, x) for x in range(ax0, ax1)]
+        open_pairs = [
+            self.passable[i] and self.passable[o] for i, o in zip(inner, outer)
+        ]
+
+        entrances = []
+        run_start = None
+        for i, is_open in enumerate(open_pairs + [False]):
+            if is_open and run_start is None:
+                run_start = i
+            elif not is_open and run_start is not None:
+                middle = (run_start + i - 1) // 2
+                entrances.append((inner[middle], outer[middle]))
+                run_start = None
+        for node, other in entrances:
+            self.links.setdefault(node, set()).add(other)
+            self.links.setdefault(other, set()).add(node)
+        self.entrances[(a, b)] = entrances
+
+    def cluster_nodes(self, cluster):
+        """Abstract nodes lying inside ``cluster``."""
+        nodes = set()
+        for other in self._neighbour_clusters(cluster):
+            key = self._border_key(cluster, other)
+            for pair in self.entrances.get(key, []):
+                side = pair[0] if key[0] == cluster else pair[1]
+                nodes.add(side)
+        return nodes
+
+    def _costs_within(self, cluster, source, targets):
+        """Step distances from ``source`` to ``targets`` inside ``cluster``."""
+        y0, y1, x0, x1 = self.cluster_bounds(cluster)
+        field = distance_field(
+            self.passable[y0:y1, x0:x1], [(source[0] - y0, source[1] - x0)]
+        )
+        costs = {}
+        for target in targets:
+            d = field[target[0] - y0, target[1] - x0]
+            if d != UNREACHABLE and target != source:
+                costs[target] = int(d)
+        return costs
+
+    def _build_cluster(self, cluster):
+        nodes = self.cluster_nodes(cluster)
+        self.intra[cluster] = {
+            node: self._costs_within(cluster, node, nodes) for node in nodes
+        }
+
+    def update(self, y, x):
+        """Rebuild the part of the hierarchy that cell ``(y, x)`` affects."""
+        passable = bool(passable_mask(self.grid_array[y, x]))
+        if passable == self.passable[y, x]:
+            return
+        self.passable[y, x] = passable
+
+        cluster = self.cluster_of(y, x)
+        y0, y1, x0, x1 = self.cluster_bounds(cluster)
+        dirty = {cluster}
+        for other in self._neighbour_clusters(cluster):
+            oy, ox = other
+            on_border = (
+                (oy < cluster[0] and y == y0)
+                or (oy > cluster[0] and y == y1 - 1)
+                or (ox < cluster[1] and x == x0)
+                or (ox > cluster[1] and x == x1 - 1)
+            )
+            if on_border:
+                self._build_entrances(*self._border_key(cluster, other))
+                dirty.add(other)
+        for c in dirty:
+            self._build_cluster(c)
+
+    def find_path(self, start, goal):
+        """Return a path from ``start`` to ``goal`` as a list of cells, or
+        ``None`` when they are not connected."""
+        if not (self.passable[start] and self.passable[goal]):
+            return None
+        start_cluster = self.cluster_of(*start)
+        if start_cluster == self.cluster_of(*goal):
+            path = astar(self.passable, start, goal, self.cluster_bounds(start_cluster))
+            if path is not None:
+                return path
+
+        abstract = self._search(start, goal, self._attach(start, goal))
+        if abstract is None:
+            return None
+        path = [start]
+        for u, v in zip(abstract, abstract[1:]):
+            if abs(u[0] - v[0]) + abs(u[1] - v[1]) == 1:
+                path.append(v)
+            else:
+                bounds = self.cluster_bounds(self.cluster_of(*u))
+                path.extend(astar(self.passable, u, v, bounds)[1:])
+        return path
+
+    def _attach(self, start, goal):
+        """Neighbours in the abstract graph with ``start`` and ``goal``
+        temporarily connected to the nodes of their clusters."""
+        start_cluster = self.cluster_of(*start)
+        goal_cluster = self.cluster_of(*goal)
+        start_edges = self._costs_within(
+            start_cluster, start, self.cluster_nodes(start_cluster)
+        )
+        goal_edges = self._costs_within(
+            goal_cluster, goal, self.cluster_nodes(goal_cluster)
+        )
+
+        def neighbours(node):
+            if node == start:
+                yield from start_edges.items()
+            yield from self.intra[self.cluster_of(*node)].get(node, {}).items()
+            for other in self.links.get(node, ()):
+                yield other, 1
+            if node in goal_edges:
+                yield goal, goal_edges[node]
+
+        return neighbours
+
+    @staticmethod
+    def _search(start, goal, neighbours):
+        """A* over the abstract graph; returns its node path or ``None``."""
+        goal_y, goal_x = goal
+        came_from = {start: None}
+        cost = {start: 0}
+        heap = [(0, 0, start)]
+        while heap:
+            _, g, node = heapq.heappop(heap)
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = came_from[node]
+                return path[::-1]
+            if g > cost[node]:
+                continue
+            for other, step in neighbours(node):
+                if g + step < cost.get(other, np.inf):
+                    cost[other] = g + step
+                    came_from[other] = node
+                    h = abs(other[0] - goal_y) + abs(other[1] - goal_x)
+                    heapq.heappush(heap, (g + step + h, g + step, other))
+        return None
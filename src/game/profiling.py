@@ -0,0 +1,109 @@
+import csv
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+_DISABLED = nullcontext()
+
+
+class Profiler:
+    """Named timers and counters with rolling percentiles.
+
+    Each timer keeps its last ``window`` samples in a ring buffer, from which
+    ``summary`` reports p50/p95/p99. While disabled, ``timer`` hands out one
+    shared no-op context and ``count`` returns at once, so instrumented code
+    costs next to nothing.
+    """
+
+    def __init__(self, enabled=False, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # name -> ring buffer of seconds
+        self.totals = {}  # name -> number of samples ever recorded
+        self.counters = {}  # name -> running count
+
+    def timer(self, name):
+        """Context manager timing a block under ``name``."""
+        if not self.enabled:
+            return _DISABLED
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        if name not in self.samples:
+            self.samples[name] = np.zeros(self.window)
+            self.totals[name] = 0
+        self.samples[name][self.totals[name] % self.window] = seconds
+        self.totals[name] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Return ``{name: {count, p50, p95, p99, max}}`` (times in ms) for
+        every timer, plus the counters under ``"counters"``."""
+        stats = {}
+        for name, samples in self.samples.items():
+            total = self.totals[name]
+            recent = samples[: min(total, self.window)] * 1e3
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            stats[name] = {
+                "count": total,
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(recent.max()),
+            }
+        stats["counters"] = dict(self.counters)
+        return stats
+
+    def report(self):
+        """Return the summary as lines of text, e.g. for an overlay."""
+        stats = self.summary()
+        counters = stats.pop("counters")
+        lines = [
+            f"{name:<14} p50 {s['p50']:7.2f}  p95 {s['p95']:7.2f}  "
+            f"p99 {s['p99']:7.2f} ms"
+            for name, s in sorted(stats.items())
+        ]
+        lines += [f"{name:<14} {n}" for name, n in sorted(counters.items())]
+        return lines
+
+    def export(self, path):
+        """Write the summary to ``path`` as JSON, or as CSV if it ends in .csv."""
+        stats = self.summary()
+        if path.endswith(".csv"):
+            counters = stats.pop("counters")
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["name", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+                )
+                for name, s in sorted(stats.items()):
+                    writer.writerow(
+                        [name, s["count"], s["p50"], s["p95"], s["p99"], s["max"]]
+                    )
+                for name, n in sorted(counters.items()):
+                    writer.writerow([name, n, "", "", "", ""])
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+
+    def reset(self):
+        self.samples.clear()
+        self.totals.clear()
+        self.counters.clear()
+
+
+# Shared by the game modules; enable it to start collecting
+profiler = Profiler()
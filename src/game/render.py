@@ -0,0 +1,189 @@
+import numpy as np
+import pyglet
+from pyglet.gl import GL_NEAREST
+from pyglet.image import ImageData, Texture
+
+from .profiling import profiler
+
+# Color of each cell value; values without a color are left transparent
+CELL_COLORS = {
+    1: (185, 185, 185),  # Wall (light gray)
+    3: (100, 100, 100),  # Debris (dark gray)
+    4: (220, 220, 220),  # Road (light road gray)
+    5: (150, 150, 255),  # Building (blue-ish)
+}
+
+
+def color_table(colors=CELL_COLORS):
+    """Return a ``(256, 4)`` RGBA lookup table indexed by cell value."""
+    table = np.zeros((256, 4), dtype=np.uint8)
+    for value, color in colors.items():
+        table[value] = (*color, 255)
+    return table
+
+
+CELL_TABLE = color_table()
+
+# Exploration overlay: unexplored cells (0) are shaded, explored ones clear
+FOG_TABLE = np.zeros((256, 4), dtype=np.uint8)
+FOG_TABLE[0] = (0, 0, 0, 160)
+
+
+def grid_to_rgba(grid_array, table=CELL_TABLE):
+    """Color a whole grid (or a block of it) in one lookup: ``(H, W, 4)``."""
+    return table[grid_array]
+
+
+def downsample_rgba(rgba, factor):
+    """Average ``factor`` x ``factor`` blocks of an RGBA image into one texel.
+
+    Colors are weighted by alpha, and the alpha of a block is the share of
+    its cells that are drawn, so sparse blocks fade rather than darken.
+    Edges that do not fill a whole block are padded with transparent cells.
+    """
+    if factor == 1:
+        return rgba
+    height, width = rgba.shape[:2]
+    padded = np.zeros(
+        (-(-height // factor) * factor, -(-width // factor) * factor, 4),
+        dtype=np.float32,
+    )
+    padded[:height, :width] = rgba
+    blocks = padded.reshape(
+        padded.shape[0] // factor, factor, padded.shape[1] // factor, factor, 4
+    )
+    alpha = blocks[..., 3:].sum(axis=(1, 3))
+    rgb = (blocks[..., :3] * blocks[..., 3:]).sum(axis=(1, 3)) / np.maximum(alpha, 1)
+    out = np.concatenate([rgb, alpha / (factor * factor)], axis=-1)
+    return out.astype(np.uint8)
+
+
+# Cells per texel of each level of detail
+LOD_FACTORS = (1, 4, 16)
+
+
+class GridRenderer:
+    """Draw the grid as textured chunks, only where the camera looks.
+
+    The grid is split into chunks of ``chunk_size`` x ``chunk_size`` texels.
+    Each chunk's RGBA image is built with one vectorized lookup and drawn as
+    a single sprite. ``update_view`` keeps sprites only for the chunks that
+    intersect the camera's visible rectangle. When cells shrink below a
+    pixel, it switches to a coarser level of detail, with one texel per 4x4
+    or 16x16 block of cells. A chunk then covers ``factor`` times more cells,
+    so the number of chunks drawn depends on the screen size, not the world
+    size. Changes to ``grid_array`` are reported with ``mark_dirty``, and
+    ``flush`` re-uploads only those texels. ``table`` maps cell values to
+    colors; any object with a ``shape`` that can be sliced into blocks of
+    cell values can stand in for ``grid_array``.
+    """
+
+    def __init__(
+        self,
+        grid_array,
+        cell_size,
+        batch=None,
+        group=None,
+        chunk_size=256,
+        table=CELL_TABLE,
+    ):
+        self.grid_array = grid_array
+        self.table = table
+        self.cell_size = cell_size
+        self.batch = batch
+        self.group = group
+        self.chunk_size = chunk_size
+        self.factor = 1  # Cells per texel of the current level of detail
+        self.chunks = {}  # (factor, chunk_y, chunk_x) -> (sprite, texture)
+        self.dirty = set()  # (y, x) of cells changed since the last flush
+        self._view = None  # Last (factor, chunk range) laid out
+
+    def _texels(self, factor, y, x, height, width):
+        """RGBA texels of the ``height`` x ``width`` texel block whose first
+        cell is ``(y, x)``."""
+        cells = self.grid_array[y : y + height * factor, x : x + width * factor]
+        return downsample_rgba(grid_to_rgba(cells, self.table), factor)
+
+    def _build_chunk(self, key):
+        factor, chunk_y, chunk_x = key
+        span = self.chunk_size * factor  # Cells per chunk side
+        y, x = chunk_y * span, chunk_x * span
+        rgba = self._texels(factor, y, x, self.chunk_size, self.chunk_size)
+        height, width = rgba.shape[:2]
+        texture = Texture.create(
+            width, height, min_filter=GL_NEAREST, mag_filter=GL_NEAREST
+        )
+        # Row 0 of the grid is the bottom row, as in pyglet's image data
+        image = ImageData(width, height, "RGBA", rgba.tobytes(), pitch=width * 4)
+        texture.blit_into(image, 0, 0, 0)
+        sprite = pyglet.sprite.Sprite(
+            texture,
+            x * self.cell_size,
+            y * self.cell_size,
+            batch=self.batch,
+            group=self.group,
+        )
+        sprite.scale = self.cell_size * factor
+        self.chunks[key] = (sprite, texture)
+        profiler.count("chunks_built")
+
+    def _delete_chunk(self, key):
+        sprite, texture = self.chunks.pop(key)
+        sprite.delete()
+        texture.delete()
+
+    def update_view(self, camera):
+        """Lay out the chunks (and level of detail) the camera can see."""
+        pixels_per_cell = camera.zoom * self.cell_size
+        factor = max(f for f in LOD_FACTORS if f == 1 or f * pixels_per_cell <= 1)
+        span = self.chunk_size * factor * self.cell_size  # World units per chunk
+        left, bottom, right, top = camera.visible_rect()
+        rows = -(-self.grid_array.shape[0] // (self.chunk_size * factor))
+        cols = -(-self.grid_array.shape[1] // (self.chunk_size * factor))
+        view = (
+            factor,
+            max(int(bottom // span), 0),
+            min(int(top // span), rows - 1),
+            max(int(left // span), 0),
+            min(int(right // span), cols - 1),
+        )
+        if view == self._view:
+            return
+        self._view = view
+        self.factor = factor
+
+        _, y0, y1, x0, x1 = view
+        wanted = {
+            (factor, cy, cx) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)
+        }
+        for key in self.chunks.keys() - wanted:
+            self._delete_chunk(key)
+        for key in wanted - self.chunks.keys():
+            self._build_chunk(key)
+
+    def mark_dirty(self, y, x):
+        self.dirty.add((y, x))
+
+    def flush(self):
+        """Upload the dirty cells of visible chunks; a no-op when nothing
+        changed. Chunks out of view are rebuilt from the grid when they
+        reappear, so their changes need no upload."""
+        if not self.dirty:
+            return
+        factor = self.factor
+        span = self.chunk_size * factor
+        texels = {((y // factor), (x // factor)) for y, x in self.dirty}
+        self.dirty.clear()
+        for ty, tx in texels:
+            key = (factor, ty * factor // span, tx * factor // span)
+            if key not in self.chunks:
+                continue
+            _, texture = self.chunks[key]
+            rgba = self._texels(factor, ty * factor, tx * factor, 1, 1)
+            image = ImageData(1, 1, "RGBA", rgba.tobytes(), pitch=4)
+            texture.blit_into(image, tx % self.chunk_size, ty % self.chunk_size, 0)
+            profiler.count("texels_uploaded")
+
+    def delete(self):
+        for key in list(self.chunks):
+            self._delete_chunk(key)
@@ -0,0 +1,253 @@
+"""Record missions to compact binary logs and replay them deterministically.
+
+A log is a header holding the initial grid, followed by a stream of records:
+
+- ``A``: an action and how many ticks in a row it was taken (run-length),
+- ``C``: a cell edit made between ticks (e.g. by the GUI's ``set_cell``),
+- ``K``: a keyframe every ``keyframe_interval`` ticks, holding the player
+  position and the grid XOR the initial grid (mostly zeros, so it compresses
+  to almost nothing).
+
+Integers are LEB128 varints, so a log costs a few bytes per change of input
+rather than per tick. Since ``Simulation`` is deterministic, replaying the
+actions from the nearest keyframe reproduces the state at any tick.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+from .simulation import STAY, Simulation
+
+MAGIC = b"SARR"
+VERSION = 1
+_HEADER = struct.Struct("<4sBIII")  # magic, version, height, width, interval
+ACTION, CELL, KEYFRAME = b"A", b"C", b"K"
+
+
+def _varint(value):
+    """Encode a non-negative int as a LEB128 varint."""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data, pos):
+    """Decode the varint at ``data[pos]``; returns ``(value, next_pos)``."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _grid_bytes(grid_array):
+    return np.ascontiguousarray(grid_array, dtype=np.uint8).tobytes()
+
+
+class MissionRecorder:
+    """Log a ``Simulation`` as it is stepped.
+
+    Step the mission through ``step`` (and edit cells through ``set_cell``)
+    instead of calling the simulation directly; ``close`` flushes the log.
+    """
+
+    def __init__(self, path, simulation, keyframe_interval=256):
+        self.simulation = simulation
+        self.keyframe_interval = keyframe_interval
+        self.initial = np.frombuffer(_grid_bytes(simulation.grid_array), np.uint8)
+        self.start_tick = simulation.tick
+        self.file = open(path, "wb")
+        height, width = simulation.grid_array.shape
+        self.file.write(_HEADER.pack(MAGIC, VERSION, height, width, keyframe_interval))
+        y, x = simulation.entities.position(simulation.player)
+        self.file.write(_varint(self.start_tick) + _varint(y) + _varint(x))
+        self._write_blob(zlib.compress(self.initial.tobytes(), 1))
+        self._action = None  # Action of the pending run
+        self._run = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_blob(self, data):
+        self.file.write(_varint(len(data)))
+        self.file.write(data)
+
+    def _flush_run(self):
+        if self._run:
+            self.file.write(ACTION + bytes([self._action]) + _varint(self._run))
+            self._action, self._run = None, 0
+
+    def _keyframe(self):
+        self._flush_run()
+        grid = np.frombuffer(_grid_bytes(self.simulation.grid_array), np.uint8)
+        y, x = self.simulation.entities.position(self.simulation.player)
+        self.file.write(
+            KEYFRAME + _varint(self.simulation.tick) + _varint(y) + _varint(x)
+        )
+        self._write_blob(zlib.compress((grid ^ self.initial).tobytes(), 1))
+
+    def step(self, action):
+        """Step the simulation with ``action`` and log it."""
+        moved = self.simulation.step(action)
+        if action != self._action:
+            self._flush_run()
+            self._action = int(action)
+        self._run += 1
+        if (self.simulation.tick - self.start_tick) % self.keyframe_interval == 0:
+            self._keyframe()
+        return moved
+
+    def set_cell(self, y, x, value):
+        """Change a cell of the grid between ticks and log it."""
+        self._flush_run()
+        self.simulation.grid_array[y, x] = value
+        self.file.write(CELL + _varint(y) + _varint(x) + bytes([int(value)]))
+
+    def close(self):
+        if not self.file.closed:
+            self._flush_run()
+            self.file.close()
+
+
+class MissionReplay:
+    """A recorded mission, loaded for seeking and headless replay.
+
+    ``actions[i]`` is the action taken on tick ``start_tick + i``; cell edits
+    are applied before the tick they precede.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, height, width, interval = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} mission log")
+        self.grid_height, self.grid_width = height, width
+        self.keyframe_interval = interval
+
+        pos = _HEADER.size
+        self.start_tick, pos = _read_varint(data, pos)
+        player_y, pos = _read_varint(data, pos)
+        player_x, pos = _read_varint(data, pos)
+        self.start_player = player_y, player_x
+        length, pos = _read_varint(data, pos)
+        self.initial = np.frombuffer(
+            zlib.decompress(data[pos : pos + length]), np.uint8
+        ).reshape(height, width)
+        pos += length
+
+        run_actions, run_lengths = [], []
+        tick = self.start_tick
+        self.edits = []  # (tick, y, x, value), in order
+        self.keyframes = {}  # tick -> (player (y, x), compressed grid delta)
+        while pos < len(data):
+            kind = data[pos : pos + 1]
+            if kind == ACTION:
+                run_actions.append(data[pos + 1])
+                run, pos = _read_varint(data, pos + 2)
+                run_lengths.append(run)
+                tick += run
+            elif kind == CELL:
+                y, pos = _read_varint(data, pos + 1)
+                x, pos = _read_varint(data, pos)
+                self.edits.append((tick, y, x, data[pos]))
+                pos += 1
+            elif kind == KEYFRAME:
+                key_tick, pos = _read_varint(data, pos + 1)
+                y, pos = _read_varint(data, pos)
+                x, pos = _read_varint(data, pos)
+                length, pos = _read_varint(data, pos)
+                self.keyframes[key_tick] = ((y, x), data[pos : pos + length])
+                pos += length
+            else:
+                raise ValueError(f"Corrupt mission log at byte {pos}")
+        self.actions = np.repeat(
+            np.array(run_actions, dtype=np.uint8), np.array(run_lengths, dtype=np.intp)
+        )
+        self.end_tick = self.start_tick + len(self.actions)
+        # Tick each run of one action starts on, plus the end tick
+        self._run_starts = self.start_tick + np.concatenate(
+            [[0], np.cumsum(run_lengths, dtype=np.int64)]
+        )
+        self._keyframe_ticks = np.array(sorted(self.keyframes), dtype=np.int64)
+        self._edit_ticks = np.array([e[0] for e in self.edits], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def initial_state(self):
+        """A fresh ``Simulation`` at the start of the mission."""
+        return self._simulation(self.initial.copy(), self.start_tick, self.start_player)
+
+    def _simulation(self, grid, tick, player):
+        simulation = Simulation(self.grid_width, self.grid_height, grid, player=player)
+        simulation.tick = tick
+        return simulation
+
+    def state_at(self, tick):
+        """The ``Simulation`` as it was at ``tick``.
+
+        Starts from the nearest keyframe at or before ``tick``, so seeking
+        costs at most ``keyframe_interval`` steps plus one decompression.
+        """
+        if not self.start_tick <= tick <= self.end_tick:
+            raise IndexError(f"Tick {tick} outside {self.start_tick}..{self.end_tick}")
+        i = np.searchsorted(self._keyframe_ticks, tick, side="right") - 1
+        if i < 0:
+            simulation = self.initial_state()
+        else:
+            key_tick = int(self._keyframe_ticks[i])
+            player, delta = self.keyframes[key_tick]
+            grid = np.frombuffer(zlib.decompress(delta), np.uint8).reshape(
+                self.grid_height, self.grid_width
+            )
+            simulation = self._simulation(grid ^ self.initial, key_tick, player)
+        return self.run(simulation, tick)
+
+    def run(self, simulation=None, until=None):
+        """Replay headlessly, as fast as possible, up to tick ``until``.
+
+        Picks up from ``simulation.tick`` (a fresh start by default) and
+        returns the simulation, including the cell edits made at ``until``.
+        A run of ``STAY`` is skipped whole, and a run of one move stops being
+        stepped once the move is blocked: until a cell is edited, the rest of
+        the run cannot change anything.
+        """
+        if simulation is None:
+            simulation = self.initial_state()
+        until = self.end_tick if until is None else until
+        tick = simulation.tick
+        # Edits are logged after their tick's step (and keyframe)
+        e = int(np.searchsorted(self._edit_ticks, tick, side="left"))
+        while True:
+            while e < len(self.edits) and self.edits[e][0] == tick:
+                _, y, x, value = self.edits[e]
+                simulation.grid_array[y, x] = value
+                e += 1
+            if tick >= until:
+                break
+            stop = min(until, self.edits[e][0] if e < len(self.edits) else until)
+            while tick < stop:
+                r = np.searchsorted(self._run_starts, tick, side="right") - 1
+                run_end = min(stop, int(self._run_starts[r + 1]))
+                action = self.actions[tick - self.start_tick]
+                if action != STAY:
+                    while tick < run_end and simulation.step(action):
+                        tick += 1
+                tick = run_end
+        simulation.tick = tick
+        return simulation
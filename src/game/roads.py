@@ -0,0 +1,245 @@
+import math
+
+import numpy as np
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import dijkstra
+
+from .osm import EARTH_RADIUS_M, LAYER_VALUES, NodeIndex, iter_osm, latlon_to_pixel
+
+# Cell value of a road; drawn over everything but buildings
+ROAD = 4
+# ``highway`` values ground vehicles cannot use
+NON_VEHICLE_HIGHWAYS = (
+    "footway",
+    "path",
+    "steps",
+    "pedestrian",
+    "cycleway",
+    "bridleway",
+    "corridor",
+    "elevator",
+    "proposed",
+    "construction",
+    "platform",
+)
+
+
+def is_road(tags):
+    """Whether a way with ``tags`` is a road a vehicle can drive on."""
+    return "highway" in tags and tags["highway"] not in NON_VEHICLE_HIGHWAYS
+
+
+def _direction(tags):
+    """1 for a one-way road, -1 for one-way against its node order, else 0."""
+    oneway = tags.get("oneway")
+    if oneway in ("yes", "true", "1") or tags.get("junction") == "roundabout":
+        return 1
+    if oneway == "-1":
+        return -1
+    return 0
+
+
+class RoadGraph:
+    """Directed road graph in compressed sparse row (CSR) form.
+
+    Node ``i`` is OSM node ``osm_ids[i]`` at ``(lats[i], lons[i])``. Its
+    outgoing edges go to ``indices[indptr[i]:indptr[i + 1]]``, and are
+    ``lengths`` meters long. Two-way roads have an edge in each direction.
+
+    Fill one from an OSM file with ``from_osm``, or pass an empty graph as
+    ``roads=`` to ``stream_osm_to_grid`` or ``tiled_osm_to_grid`` to build it
+    during rasterization and draw the roads into the grid.
+    """
+
+    def __init__(self):
+        self.bounds = None
+        self.osm_ids = np.zeros(0, dtype=np.int64)
+        self.lats = np.zeros(0)
+        self.lons = np.zeros(0)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self._ways = []  # (refs, direction) while the file is read
+
+    @property
+    def num_nodes(self):
+        return len(self.osm_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_osm(cls, file_path):
+        """Build the road graph of an OSM file in one streaming pass."""
+        graph = cls()
+        nodes = NodeIndex()
+        for kind, item in iter_osm(file_path):
+            if kind == "node":
+                nodes.add(*item)
+            elif kind == "way":
+                graph.add_way(*item)
+            elif kind == "bounds":
+                graph.bounds = item
+        graph.build(nodes)
+        return graph
+
+    def add_way(self, way_id, refs, tags):
+        """Keep the node refs of a way if it is a road."""
+        if is_road(tags) and len(refs) > 1:
+            self._ways.append((np.asarray(refs, dtype=np.int64), _direction(tags)))
+
+    def build(self, nodes):
+        """Turn the collected ways into the CSR arrays, given a ``NodeIndex``.
+
+        Segments touching a node missing from the extract are dropped.
+        """
+        src, dst = [], []
+        for refs, direction in self._ways:
+            a, b = refs[:-1], refs[1:]
+            if direction >= 0:
+                src.append(a)
+                dst.append(b)
+            if direction <= 0:
+                src.append(b)
+                dst.append(a)
+        self._ways = []
+        src = np.concatenate(src) if src else np.zeros(0, dtype=np.int64)
+        dst = np.concatenate(dst) if dst else np.zeros(0, dtype=np.int64)
+
+        ids = np.unique(np.concatenate([src, dst]))
+        found, self.lats, self.lons = nodes.find(ids)
+        self.osm_ids = ids[found]
+        a = np.searchsorted(self.osm_ids, src)
+        b = np.searchsorted(self.osm_ids, dst)
+        a[a == self.num_nodes] = 0
+        b[b == self.num_nodes] = 0
+        if self.num_nodes:
+            valid = (self.osm_ids[a] == src) & (self.osm_ids[b] == dst) & (a != b)
+        else:
+            valid = np.zeros(len(src), dtype=bool)
+        a, b = a[valid], b[valid]
+
+        # Equirectangular lengths, as in ``bounds_size_m``
+        lat0 = np.radians((self.lats[a] + self.lats[b]) / 2)
+        dy = np.radians(self.lats[b] - self.lats[a]) * EARTH_RADIUS_M
+        dx = np.radians(self.lons[b] - self.lons[a]) * EARTH_RADIUS_M * np.cos(lat0)
+        # Zero-length edges would read as missing in a sparse matrix
+        lengths = np.maximum(np.hypot(dx, dy), 1e-3).astype(np.float32)
+
+        # Sort by (source, target, length) and keep the shortest of any
+        # parallel edges, which a sparse matrix would otherwise add up
+        order = np.lexsort((lengths, b, a))
+        a, b, lengths = a[order], b[order], lengths[order]
+        first = np.ones(len(a), dtype=bool)
+        first[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+        a, b, lengths = a[first], b[first], lengths[first]
+
+        self.indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(a, minlength=self.num_nodes), out=self.indptr[1:])
+        self.indices = b.astype(np.int32)
+        self.lengths = lengths
+
+    def neighbours(self, node):
+        """Return the ``(targets, lengths)`` of the edges leaving ``node``."""
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end], self.lengths[start:end]
+
+    def matrix(self):
+        """The graph as a SciPy sparse adjacency matrix of edge lengths."""
+        return csr_array(
+            (self.lengths, self.indices, self.indptr),
+            shape=(self.num_nodes, self.num_nodes),
+        )
+
+    def nearest_node(self, lat, lon):
+        """Index of the graph node closest to ``(lat, lon)``."""
+        scale = math.cos(math.radians(lat))
+        d2 = (self.lats - lat) ** 2 + ((self.lons - lon) * scale) ** 2
+        return int(np.argmin(d2))
+
+    def shortest_paths(self, sources, limit=np.inf, predecessors=False):
+        """Road distances in meters from each of ``sources`` to every node.
+
+        Runs one Dijkstra per source in compiled code and returns a
+        ``(len(sources), num_nodes)`` array, ``inf`` where unreachable or
+        beyond ``limit``. With ``predecessors=True`` also returns the
+        predecessor of every node on each tree (-9999 at the roots), for
+        ``path``.
+        """
+        return dijkstra(
+            self.matrix(),
+            indices=np.atleast_1d(sources),
+            limit=limit,
+            return_predecessors=predecessors,
+        )
+
+    def nearest_source(self, sources, limit=np.inf):
+        """Distance from the closest of ``sources`` (e.g. staging areas) to
+        every node; returns ``(distances, predecessors, source)``."""
+        return dijkstra(
+            self.matrix(),
+            indices=np.atleast_1d(sources),
+            limit=limit,
+            return_predecessors=True,
+            min_only=True,
+        )
+
+    @staticmethod
+    def path(predecessors, target):
+        """Node path from the root of a predecessor array to ``target``.
+
+        Check that ``target`` was reached (a finite distance) first.
+        """
+        path = [int(target)]
+        while predecessors[path[-1]] >= 0:
+            path.append(int(predecessors[path[-1]]))
+        return path[::-1]
+
+    def rasterize(self, grid_array, bounds=None):
+        """Draw every edge into ``grid_array`` as ``ROAD`` cells, leaving
+        buildings in place. All segments are drawn in one vectorized pass."""
+        bounds = self.bounds if bounds is None else bounds
+        height, width = grid_array.shape
+        x, y = latlon_to_pixel(self.lats, self.lons, bounds, width, height)
+        starts = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        x0, y0 = x[starts], y[starts]
+        x1, y1 = x[self.indices], y[self.indices]
+
+        # Points along each segment: one per cell of its longer axis
+        steps = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)) + 1
+        segment = np.repeat(np.arange(len(steps)), steps)
+        t = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = t / np.maximum(steps[segment] - 1, 1)
+        xs = np.rint(x0[segment] + t * (x1 - x0)[segment]).astype(np.intp)
+        ys = np.rint(y0[segment] + t * (y1 - y0)[segment]).astype(np.intp)
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        ys, xs = ys[inside], xs[inside]
+        drawn = grid_array[ys, xs] != LAYER_VALUES[1]  # Not a building
+        grid_array[ys[drawn], xs[drawn]] = ROAD
+        return grid_array
+
+    def save(self, path):
+        """Write the graph to an uncompressed ``.npz`` file, which loads in
+        milliseconds."""
+        np.savez(
+            path,
+            bounds=np.array(self.bounds if self.bounds else [np.nan] * 4),
+            osm_ids=self.osm_ids,
+            lats=self.lats,
+            lons=self.lons,
+            indptr=self.indptr,
+            indices=self.indices,
+            lengths=self.lengths,
+        )
+
+    @classmethod
+    def load(cls, path):
+        graph = cls()
+        with np.load(path) as data:
+            bounds = data["bounds"]
+            if not np.isnan(bounds).any():
+                graph.bounds = tuple(bounds.tolist())
+            for name in ("osm_ids", "lats", "lons", "indptr", "indices", "lengths"):
+                setattr(graph, name, data[name])
+        return graph
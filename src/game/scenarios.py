@@ -0,0 +1,184 @@
+"""Bulk pre-generation of seeded worlds into a compact scenario store.
+
+Scenario ``i`` of a store is generated from ``SeedSequence(seed,
+spawn_key=(i,))``, so any scenario can be regenerated (or loaded) by id alone.
+Grids are bit-packed at 2 bits per cell, compressed, and appended to chunk
+files, with an index recording where each one lives.
+
+Generate a store from the ``src`` directory, e.g.
+``python -m game.scenarios generate ../data/interim/scenarios --count 100000``.
+"""
+
+import argparse
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .walls import GridWorldGenerator
+
+# Index row of each scenario: which chunk file holds it, where and how long
+INDEX_DTYPE = np.dtype([("chunk", "<u4"), ("offset", "<u8"), ("length", "<u4")])
+BITS_PER_CELL = 2  # Generated worlds only hold 0 (free), 1 (wall), 3 (debris)
+_SHIFTS = np.arange(0, 8, BITS_PER_CELL, dtype=np.uint8)
+
+
+def pack_grid(grid_array):
+    """Bit-pack and compress a grid whose cell values are below 4."""
+    cells = np.ascontiguousarray(grid_array, dtype=np.uint8).ravel()
+    if cells.size and cells.max() >= 1 << BITS_PER_CELL:
+        raise ValueError(f"Cell values must fit in {BITS_PER_CELL} bits")
+    padded = np.zeros(-(-cells.size // len(_SHIFTS)) * len(_SHIFTS), np.uint8)
+    padded[: cells.size] = cells
+    packed = np.bitwise_or.reduce(padded.reshape(-1, len(_SHIFTS)) << _SHIFTS, axis=1)
+    return zlib.compress(packed.astype(np.uint8).tobytes(), 1)
+
+
+def unpack_grid(data, grid_width, grid_height):
+    """Inverse of ``pack_grid``."""
+    packed = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    cells = (packed[:, None] >> _SHIFTS) & ((1 << BITS_PER_CELL) - 1)
+    return cells.ravel()[: grid_width * grid_height].reshape(grid_height, grid_width)
+
+
+def scenario_seed(seed, scenario_id):
+    """Return the seed of one scenario of a store seeded with ``seed``.
+
+    ``seed`` must be fixed: with ``None`` every process would draw its own
+    entropy and scenario ``scenario_id`` would not be reproducible.
+    """
+    if seed is None:
+        raise ValueError("Scenario seeds need a fixed base seed")
+    return np.random.SeedSequence(seed, spawn_key=(scenario_id,))
+
+
+def generate_scenario(scenario_id, grid_width, grid_height, seed):
+    """Generate the world of one scenario."""
+    grid_generator = GridWorldGenerator(
+        grid_width, grid_height, scenario_seed(seed, scenario_id)
+    )
+    grid_generator.generate_walls()
+    return grid_generator.get_grid()
+
+
+def _write_chunk(job):
+    """Generate one chunk of scenarios into its own file; returns its index."""
+    path, chunk, first, count, grid_width, grid_height, seed = job
+    index = np.zeros(count, dtype=INDEX_DTYPE)
+    with open(path, "wb") as f:
+        for i in range(count):
+            data = pack_grid(
+                generate_scenario(first + i, grid_width, grid_height, seed)
+            )
+            index[i] = chunk, f.tell(), len(data)
+            f.write(data)
+    return first, index
+
+
+class ScenarioStore:
+    """A directory of chunk files plus ``index.npy`` and ``meta.json``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.index = np.load(os.path.join(directory, "index.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def chunk_path(directory, chunk):
+        return os.path.join(directory, f"chunk_{chunk:06d}.bin")
+
+    @classmethod
+    def create(
+        cls,
+        directory,
+        count,
+        grid_width=100,
+        grid_height=100,
+        seed=0,
+        chunk_size=1024,
+        workers=None,
+    ):
+        """Generate ``count`` scenarios in a process pool and store them.
+
+        With ``seed=None`` a base seed is drawn once, here, and recorded in
+        ``meta.json`` like a given one.
+        """
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        os.makedirs(directory, exist_ok=True)
+        jobs = [
+            (
+                cls.chunk_path(directory, chunk),
+                chunk,
+                first,
+                min(chunk_size, count - first),
+                grid_width,
+                grid_height,
+                seed,
+            )
+            for chunk, first in enumerate(range(0, count, chunk_size))
+        ]
+        index = np.zeros(count, dtype=INDEX_DTYPE)
+        with ProcessPoolExecutor(workers) as executor:
+            for first, chunk_index in executor.map(_write_chunk, jobs):
+                index[first : first + len(chunk_index)] = chunk_index
+
+        np.save(os.path.join(directory, "index.npy"), index)
+        meta = {
+            "count": count,
+            "grid_width": grid_width,
+            "grid_height": grid_height,
+            "seed": seed,
+            "bits_per_cell": BITS_PER_CELL,
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return cls(directory)
+
+    def load(self, scenario_id):
+        """Return the grid of a scenario without regenerating it."""
+        chunk, offset, length = self.index[scenario_id]
+        with open(self.chunk_path(self.directory, chunk), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return unpack_grid(data, self.meta["grid_width"], self.meta["grid_height"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help=ScenarioStore.create.__doc__)
+    generate.add_argument("directory")
+    generate.add_argument("--count", type=int, required=True)
+    generate.add_argument("--width", type=int, default=100)
+    generate.add_argument("--height", type=int, default=100)
+    generate.add_argument("--seed", type=int, default=0, help="-1 for a random one")
+    generate.add_argument("--chunk-size", type=int, default=1024)
+    generate.add_argument("--workers", type=int, default=None)
+
+    args = parser.parse_args()
+    store = ScenarioStore.create(
+        args.directory,
+        args.count,
+        args.width,
+        args.height,
+        None if args.seed < 0 else args.seed,
+        args.chunk_size,
+        args.workers,
+    )
+    size = sum(
+        os.path.getsize(ScenarioStore.chunk_path(args.directory, chunk))
+        for chunk in np.unique(store.index["chunk"])
+    )
+    print(f"{len(store)} scenarios, {size / len(store):.0f} bytes each")
+
+
+if __name__ == "__main__":
+    main()
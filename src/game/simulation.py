@@ -0,0 +1,69 @@
+import numpy as np
+
+from .entities import AGENT, EntityRegistry
+from .profiling import profiler
+from .walls import GridWorldGenerator
+
+# Cell values an agent cannot move into
+WALL = 1
+DEBRIS = 3
+BLOCKING = (WALL, DEBRIS)
+
+# Action id -> (dx, dy); +y is up, as on screen
+STAY, UP, DOWN, LEFT, RIGHT = range(5)
+ACTIONS = np.array([(0, 0), (0, 1), (0, -1), (-1, 0), (1, 0)], dtype=np.int32)
+
+
+class Simulation:
+    """Headless mission state: the grid, its entities and the movement rules.
+
+    Nothing here depends on pyglet, so missions can be stepped as fast as the
+    CPU allows; ``MainGUI`` wraps a ``Simulation`` as an optional viewer.
+    """
+
+    def __init__(
+        self, grid_width, grid_height, grid_array=None, seed=None, player=None
+    ):
+        if grid_array is None:
+            grid_generator = GridWorldGenerator(grid_width, grid_height, seed)
+            with profiler.timer("generate"):
+                grid_generator.generate_walls()
+            grid_array = grid_generator.get_grid()
+        self.grid_array = grid_array
+        self.grid_height, self.grid_width = grid_array.shape
+        self.tick = 0
+
+        # Place the player on its (y, x) cell, by default the center
+        if player is None:
+            player = (self.grid_height // 2, self.grid_width // 2)
+        self.entities = EntityRegistry(self.grid_array)
+        self.player = self.entities.add(AGENT, *player)
+
+    def is_free(self, y, x):
+        """Whether an agent may enter cell ``(y, x)``."""
+        return (
+            0 <= x < self.grid_width
+            and 0 <= y < self.grid_height
+            and self.grid_array[y, x] not in BLOCKING
+            and self.entities.at(y, x) is None
+        )
+
+    def move_player(self, dx, dy):
+        """Move the player one cell if the target is in bounds and free.
+
+        Returns whether the player moved.
+        """
+        current_y, current_x = self.entities.position(self.player)
+        new_y = current_y + dy
+        new_x = current_x + dx
+        if not self.is_free(new_y, new_x):
+            return False
+        self.entities.move(self.player, new_y, new_x)
+        return True
+
+    def step(self, action):
+        """Advance one tick with the player taking ``action``."""
+        dx, dy = ACTIONS[action]
+        moved = self.move_player(int(dx), int(dy)) if action != STAY else False
+        self.tick += 1
+        return moved
@@ -0,0 +1,149 @@
+import json
+
+import numpy as np
+from skimage.measure import points_in_poly
+
+from .osm import bounds_size_m
+
+
+class FeatureIndex:
+    """Grid-bucket spatial index of OSM features in grid-cell coordinates.
+
+    Every feature keeps its OSM way id, tags, cell value and polygon (as
+    ``(x, y)`` cell vertices). Features are filed in square buckets of
+    ``bucket_size`` cells under every bucket their bounding box overlaps, so
+    a query only tests the features near it. Fill it by passing it as
+    ``index=`` to ``stream_osm_to_grid`` or ``tiled_osm_to_grid``.
+    """
+
+    def __init__(self, grid_width, grid_height, bucket_size=32):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.bucket_size = bucket_size
+        self.bounds = None  # Lat/lon bounds of the map, for metric queries
+        self.osm_ids = []
+        self.tags = []
+        self.values = []
+        self.polygons = []
+        self.bboxes = []  # (x0, y0, x1, y1) per feature
+        self.buckets = {}  # (bucket_y, bucket_x) -> feature positions
+
+    def __len__(self):
+        return len(self.osm_ids)
+
+    def add(self, osm_id, tags, value, poly_x, poly_y):
+        feature = len(self.osm_ids)
+        polygon = np.column_stack([poly_x, poly_y]).astype(np.float64)
+        x0, y0 = polygon.min(axis=0)
+        x1, y1 = polygon.max(axis=0)
+        self.osm_ids.append(int(osm_id))
+        self.tags.append(dict(tags))
+        self.values.append(int(value))
+        self.polygons.append(polygon)
+        self.bboxes.append((x0, y0, x1, y1))
+        for key in self._bucket_keys(x0, y0, x1, y1):
+            self.buckets.setdefault(key, []).append(feature)
+
+    def _bucket_keys(self, x0, y0, x1, y1):
+        size = self.bucket_size
+        for by in range(int(y0) // size, int(y1) // size + 1):
+            for bx in range(int(x0) // size, int(x1) // size + 1):
+                yield by, bx
+
+    def _candidates(self, x0, y0, x1, y1, value=None):
+        """Features whose bounding box overlaps the box, optionally of one
+        cell ``value``."""
+        found = set()
+        for key in self._bucket_keys(x0, y0, x1, y1):
+            found.update(self.buckets.get(key, ()))
+        return [
+            f
+            for f in sorted(found)
+            if (value is None or self.values[f] == value)
+            and self.bboxes[f][0] <= x1
+            and self.bboxes[f][2] >= x0
+            and self.bboxes[f][1] <= y1
+            and self.bboxes[f][3] >= y0
+        ]
+
+    def at_cell(self, y, x, value=None):
+        """Features whose polygon contains cell ``(y, x)``."""
+        return [
+            f
+            for f in self._candidates(x, y, x, y, value)
+            if points_in_poly([[x, y]], self.polygons[f])[0]
+        ]
+
+    def in_box(self, y0, x0, y1, x1, value=None):
+        """Features whose bounding box overlaps the cell box (inclusive)."""
+        return self._candidates(x0, y0, x1, y1, value)
+
+    def cell_size_m(self):
+        """Return the ``(x, y)`` size of a cell in meters."""
+        width_m, height_m = bounds_size_m(self.bounds)
+        return width_m / (self.grid_width - 1), height_m / (self.grid_height - 1)
+
+    def within(self, y, x, radius_m, value=None):
+        """Features within ``radius_m`` meters of cell ``(y, x)``.
+
+        Returns ``(features, distances_m)`` sorted by distance; a feature
+        containing the cell is at distance 0.
+        """
+        sx, sy = self.cell_size_m()
+        rx, ry = radius_m / sx, radius_m / sy
+        features, distances = [], []
+        for f in self._candidates(x - rx, y - ry, x + rx, y + ry, value):
+            polygon = self.polygons[f] * (sx, sy)
+            point = np.array([x * sx, y * sy])
+            if points_in_poly([point], polygon)[0]:
+                distance = 0.0
+            else:
+                distance = _distance_to_outline(point, polygon)
+            if distance <= radius_m:
+                features.append(f)
+                distances.append(distance)
+        order = np.argsort(distances, kind="stable")
+        return [features[i] for i in order], np.asarray(distances)[order]
+
+    def save(self, path):
+        """Write the index to an ``.npz`` file (e.g. next to a cached grid)."""
+        lengths = [len(polygon) for polygon in self.polygons]
+        np.savez_compressed(
+            path,
+            shape=np.array([self.grid_width, self.grid_height, self.bucket_size]),
+            bounds=np.array(self.bounds if self.bounds else [np.nan] * 4),
+            osm_ids=np.array(self.osm_ids, dtype=np.int64),
+            values=np.array(self.values, dtype=np.uint8),
+            offsets=np.cumsum([0] + lengths),
+            vertices=(
+                np.concatenate(self.polygons) if self.polygons else np.zeros((0, 2))
+            ),
+            tags=np.array(json.dumps(self.tags)),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            grid_width, grid_height, bucket_size = data["shape"].tolist()
+            index = cls(grid_width, grid_height, bucket_size)
+            bounds = data["bounds"]
+            if not np.isnan(bounds).any():
+                index.bounds = tuple(bounds.tolist())
+            offsets = data["offsets"]
+            vertices = data["vertices"]
+            tags = json.loads(str(data["tags"]))
+            for i, (osm_id, value) in enumerate(zip(data["osm_ids"], data["values"])):
+                polygon = vertices[offsets[i] : offsets[i + 1]]
+                index.add(osm_id, tags[i], value, polygon[:, 0], polygon[:, 1])
+        return index
+
+
+def _distance_to_outline(point, polygon):
+    """Shortest distance from ``point`` to the edges of a closed polygon."""
+    start = polygon
+    end = np.roll(polygon, -1, axis=0)
+    edge = end - start
+    length2 = np.maximum((edge**2).sum(axis=1), 1e-12)
+    t = np.clip(((point - start) * edge).sum(axis=1) / length2, 0, 1)
+    nearest = start + t[:, None] * edge
+    return float(np.sqrt(((point - nearest) ** 2).sum(axis=1)).min())
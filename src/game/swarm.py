@@ -0,0 +1,117 @@
+import numpy as np
+
+from .batch import BLOCKED
+from .entities import AGENT, FREE
+from .simulation import ACTIONS
+
+NO_AGENT = -1
+
+
+class Swarm:
+    """Many agents moving together on one grid.
+
+    Positions are an ``(N, 2)`` array of ``(y, x)`` cells and an ``occupant``
+    grid maps each cell to the agent on it, so a step proposes, resolves and
+    applies all ``N`` moves with array operations. Its cost grows with the
+    number of agents, never with the size of the grid.
+
+    Conflicts are settled deterministically, conservatively and all at once:
+
+    - several agents heading for one cell: the lowest id goes, the rest stay;
+    - two agents trading places: both stay;
+    - an agent heading for a cell whose agent stays: it stays too, so a
+      queue moves up only if the agent at its head moves.
+
+    Agents going round a cycle of three or more cells all move.
+    """
+
+    def __init__(self, grid_array, positions):
+        if not grid_array.flags.c_contiguous:
+            raise ValueError("The grid must be C-contiguous to be updated in place")
+        self.grid_array = grid_array
+        self.grid_height, self.grid_width = grid_array.shape
+        self.positions = np.array(positions, dtype=np.intp).reshape(-1, 2)
+        self.num_agents = len(self.positions)
+        self._ids = np.arange(self.num_agents)
+        self.tick = 0
+
+        self.occupant = np.full(grid_array.shape, NO_AGENT, dtype=np.int32)
+        cells = self._flat(self.positions[:, 0], self.positions[:, 1])
+        if np.unique(cells).size != cells.size:
+            raise ValueError("Two agents share a cell")
+        if BLOCKED[grid_array.ravel()[cells]].any():
+            raise ValueError("An agent starts on a blocked cell")
+        self.occupant.ravel()[cells] = self._ids
+        grid_array.ravel()[cells] = AGENT
+        # Scratch grid for claims; only the claimed cells are ever touched
+        self._claims = np.full(grid_array.size, self.num_agents, dtype=np.int32)
+
+    @classmethod
+    def spawn(cls, grid_array, num_agents, seed=None):
+        """Place ``num_agents`` agents on distinct random free cells."""
+        free = np.flatnonzero(~BLOCKED[grid_array.ravel()])
+        if num_agents > free.size:
+            raise ValueError(f"Only {free.size} free cells for {num_agents} agents")
+        rng = np.random.default_rng(seed)
+        cells = rng.choice(free, size=num_agents, replace=False)
+        return cls(grid_array, np.column_stack(np.divmod(cells, grid_array.shape[1])))
+
+    def _flat(self, y, x):
+        return y * self.grid_width + x
+
+    def step(self, actions):
+        """Apply one action per agent; returns the ``moved`` mask."""
+        moves = ACTIONS[actions]
+        y, x = self.positions[:, 0], self.positions[:, 1]
+        new_y = y + moves[:, 1]
+        new_x = x + moves[:, 0]
+        in_bounds = (
+            (new_x >= 0)
+            & (new_x < self.grid_width)
+            & (new_y >= 0)
+            & (new_y < self.grid_height)
+        )
+        current = self._flat(y, x)
+        target = np.where(in_bounds, self._flat(new_y, new_x), current)
+
+        grid = self.grid_array.ravel()
+        occupant = self.occupant.ravel()
+        ahead = occupant[target]  # Agent on the target cell, if any
+        # Cells our own agents hold are settled below; anything else blocking
+        # (walls, debris, victims, agents of other swarms) stops the move
+        moving = (target != current) & ((ahead != NO_AGENT) | ~BLOCKED[grid[target]])
+
+        # Several agents heading for one cell: the lowest id wins
+        heading = target[moving]
+        np.minimum.at(self._claims, heading, self._ids[moving])
+        moving[moving] = self._claims[heading] == self._ids[moving]
+        self._claims[heading] = self.num_agents
+
+        # Swaps: the agent ahead is heading for this agent's cell
+        has_ahead = moving & (ahead != NO_AGENT)
+        swap = np.zeros_like(moving)
+        swap[has_ahead] = target[ahead[has_ahead]] == current[has_ahead]
+        moving &= ~swap
+
+        # Queues: an agent moving into an occupied cell follows the agents
+        # ahead to the head of its queue, and moves only if the head does.
+        # Pointer jumping finds every head in log2(N) vectorized steps.
+        queued = moving & (ahead != NO_AGENT)
+        if queued.any():
+            head = self._ids.copy()
+            head[queued] = ahead[queued]
+            for _ in range(int(self.num_agents).bit_length()):
+                head = head[head]
+            # Agents on a cycle have a moving agent as their "head", so the
+            # whole cycle moves
+            moving[queued] = moving[head[queued]]
+
+        movers = self._ids[moving]
+        grid[current[movers]] = FREE
+        occupant[current[movers]] = NO_AGENT
+        grid[target[movers]] = AGENT
+        occupant[target[movers]] = movers
+        self.positions[movers, 0] = new_y[movers]
+        self.positions[movers, 1] = new_x[movers]
+        self.tick += 1
+        return moving
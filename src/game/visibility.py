@@ -0,0 +1,147 @@
+import numpy as np
+
+from .simulation import BLOCKING
+
+
+def opaque_mask(grid_array):
+    """Cells that block line of sight: walls and debris."""
+    return np.isin(grid_array, BLOCKING)
+
+
+def sensor_offsets(radius):
+    """Offsets within ``radius`` of an agent and the ray each one lies on.
+
+    Returns ``(offsets, parents, rings)``: the ``(M, 2)`` ``(dy, dx)``
+    offsets of the disk, ordered by Chebyshev ring, the position of the
+    previous cell on the straight line from the agent to each offset, and
+    the ring of each offset. The origin is first and is its own parent.
+    """
+    span = np.arange(-radius, radius + 1)
+    dy, dx = np.meshgrid(span, span, indexing="ij")
+    inside = dy**2 + dx**2 <= radius**2
+    dy, dx = dy[inside], dx[inside]
+    rings = np.maximum(np.abs(dy), np.abs(dx))
+    order = np.lexsort((dx, dy, rings))
+    dy, dx, rings = dy[order], dx[order], rings[order]
+
+    # One step back along the line, rounded half away from zero so the rays
+    # are symmetric about both axes
+    scale = np.where(rings > 0, (rings - 1) / np.maximum(rings, 1), 0)
+    py = np.sign(dy) * np.floor(np.abs(dy) * scale + 0.5)
+    px = np.sign(dx) * np.floor(np.abs(dx) * scale + 0.5)
+    position = {(y, x): i for i, (y, x) in enumerate(zip(dy.tolist(), dx.tolist()))}
+    parents = np.array(
+        [
+            position[(y, x)]
+            for y, x in zip(py.astype(int).tolist(), px.astype(int).tolist())
+        ]
+    )
+    return np.column_stack([dy, dx]), parents, rings
+
+
+class VisibilityEngine:
+    """What agents can see within a sensor radius, for many agents at once.
+
+    Every offset in the sensor disk hangs off a parent one step closer to the
+    agent on the straight line towards it, which makes a tree of rays. A cell
+    is visible when its parent is visible and transparent, so a whole swarm
+    is resolved ring by ring with ``radius`` vectorized passes of ``(agents,
+    offsets)`` gathers. Opaque cells themselves are visible.
+
+    The occlusion grid is built once, with a ``radius``-wide opaque border so
+    lookups need no bounds checks. ``invalidate`` patches it for one changed
+    cell, and ``update`` only recomputes the agents that moved or whose
+    sensor disk holds a changed cell.
+    """
+
+    def __init__(self, grid_array, radius=8):
+        self.grid_array = grid_array
+        self.radius = radius
+        self.offsets, self.parents, rings = sensor_offsets(radius)
+        # Slices of ``offsets`` by ring, innermost first
+        bounds = np.searchsorted(rings, np.arange(radius + 2))
+        self._rings = [slice(a, b) for a, b in zip(bounds[1:-1], bounds[2:])]
+
+        height, width = grid_array.shape
+        self.opaque = np.ones((height + 2 * radius, width + 2 * radius), dtype=bool)
+        self.opaque[radius:-radius, radius:-radius] = opaque_mask(grid_array)
+        self._positions = np.zeros((0, 2), dtype=np.intp)
+        self._visible = np.zeros((0, len(self.offsets)), dtype=bool)
+        self._changed = []  # Cells invalidated since the last update
+
+    def invalidate(self, y, x):
+        """Update after cell ``(y, x)`` of the grid changed."""
+        opaque = bool(np.isin(self.grid_array[y, x], BLOCKING))
+        r = self.radius
+        if opaque != self.opaque[y + r, x + r]:
+            self.opaque[y + r, x + r] = opaque
+            self._changed.append((y, x))
+
+    def visible(self, positions):
+        """``(N, M)`` mask of the ``offsets`` each agent at ``positions`` sees.
+
+        Offsets beyond the grid edge are never visible.
+        """
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        ys = positions[:, 0, None] + self.offsets[:, 0] + self.radius
+        xs = positions[:, 1, None] + self.offsets[:, 1] + self.radius
+        opaque = self.opaque[ys, xs]
+        # Light passes a cell when it is lit and does not block it
+        passes = np.zeros_like(opaque)
+        passes[:, 0] = ~opaque[:, 0]
+        visible = np.zeros_like(opaque)
+        visible[:, 0] = True
+        for ring in self._rings:
+            parents = self.parents[ring]
+            visible[:, ring] = passes[:, parents]
+            passes[:, ring] = visible[:, ring] & ~opaque[:, ring]
+
+        height, width = self.grid_array.shape
+        r = self.radius
+        visible &= (ys >= r) & (ys < height + r) & (xs >= r) & (xs < width + r)
+        return visible
+
+    def update(self, positions):
+        """Like ``visible``, reusing the previous call's masks where possible.
+
+        Only agents that moved, are new, or have a cell changed through
+        ``invalidate`` within their sensor radius are recomputed.
+        """
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        n = len(positions)
+        stale = np.ones(n, dtype=bool)
+        kept = min(n, len(self._positions))
+        stale[:kept] = (positions[:kept] != self._positions[:kept]).any(axis=1)
+        if self._changed:
+            changed = np.array(self._changed)
+            near = np.abs(positions[:, None, :] - changed[None, :, :]).max(axis=2)
+            stale |= (near <= self.radius).any(axis=1)
+            self._changed.clear()
+
+        visible = np.zeros((n, len(self.offsets)), dtype=bool)
+        visible[:kept] = self._visible[:kept]
+        if stale.any():
+            visible[stale] = self.visible(positions[stale])
+        self._positions = positions.copy()
+        self._visible = visible
+        return visible
+
+    def cells(self, positions, visible=None):
+        """Visible cells as index arrays ``(agent, y, x)``."""
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        if visible is None:
+            visible = self.visible(positions)
+        agent, offset = np.nonzero(visible)
+        y = positions[agent, 0] + self.offsets[offset, 0]
+        x = positions[agent, 1] + self.offsets[offset, 1]
+        return agent, y, x
+
+    def windows(self, visible):
+        """Turn ``(N, M)`` masks into ``(N, 2r+1, 2r+1)`` masks centred on
+        each agent."""
+        size = 2 * self.radius + 1
+        windows = np.zeros((len(visible), size, size), dtype=bool)
+        windows[
+            :, self.offsets[:, 0] + self.radius, self.offsets[:, 1] + self.radius
+        ] = visible
+        return windows
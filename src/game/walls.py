@@ -1,13 +1,21 @@
-import random
-
 import numpy as np
 
+# Cell offsets (dy, dx) of each wall stamp, relative to its top-left cell
+WALL_STAMPS = {
+    "U": ((0, 0), (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 2)),
+    "T": ((0, 0), (0, 1), (0, 2), (1, 1)),
+    "L": ((0, 0), (0, 1), (0, 2), (1, 0)),
+    "I": ((0, 0), (0, 1), (0, 2)),  # Horizontal
+    "I|": ((0, 0), (1, 0), (2, 0)),  # Vertical
+}
+
 
 class GridWorldGenerator:
-    def __init__(self, grid_width, grid_height):
+    def __init__(self, grid_width, grid_height, seed=None):
         self.grid_width = grid_width
         self.grid_height = grid_height
-        self.grid_array = np.zeros((grid_height, grid_width), dtype=int)
+        self.grid_array = np.zeros((grid_height, grid_width), dtype=np.uint8)
+        self.rng = np.random.default_rng(seed)  # Same seed, same world
 
     def _add_outer_boundary(self):
         """Add a wall around the edges of the grid."""
@@ -20,59 +28,54 @@ class GridWorldGenerator:
         """Generate different types of walls in the grid."""
         self._add_outer_boundary()
 
-        wall_types = ["U", "T", "L", "I"]
-        for _ in range(random.randint(20, 30)):
-            wall_type = random.choice(wall_types)
-            y = random.randint(1, self.grid_height - 4)
-            x = random.randint(1, self.grid_width - 4)
-
-            if wall_type == "U":
-                self.place_u_wall(x, y)
-            elif wall_type == "T":
-                self.place_t_wall(x, y)
-            elif wall_type == "L":
-                self.place_l_wall(x, y)
-            elif wall_type == "I":
-                self.place_straight_wall(x, y)
+        num_walls = self.rng.integers(20, 31)
+        wall_types = np.array(["U", "T", "L", "I"], dtype="<U2")[
+            self.rng.integers(4, size=num_walls)
+        ]
+        # Straight walls are vertical half of the time
+        vertical = (wall_types == "I") & (self.rng.random(num_walls) < 0.5)
+        wall_types[vertical] = "I|"
+        y = self.rng.integers(1, self.grid_height - 3, size=num_walls)
+        x = self.rng.integers(1, self.grid_width - 3, size=num_walls)
+        self._stamp_walls(wall_types, x, y)
 
         self._decay_walls()
         self._scatter_debris()
 
+    def _stamp_walls(self, wall_types, x, y):
+        """Place many walls at once: one indexed write per wall type."""
+        for wall_type, offsets in WALL_STAMPS.items():
+            selected = wall_types == wall_type
+            if selected.any():
+                dy, dx = np.array(offsets).T
+                self.grid_array[y[selected, None] + dy, x[selected, None] + dx] = 1
+
     def place_u_wall(self, x, y):
-        self.grid_array[y, x : x + 3] = 1
-        self.grid_array[y + 1, x] = 1
-        self.grid_array[y + 1, x + 2] = 1
-        self.grid_array[y + 2, x] = 1
-        self.grid_array[y + 2, x + 2] = 1
+        self._stamp_walls(np.array(["U"]), np.array([x]), np.array([y]))
 
     def place_t_wall(self, x, y):
-        self.grid_array[y, x : x + 3] = 1
-        self.grid_array[y + 1, x + 1] = 1
+        self._stamp_walls(np.array(["T"]), np.array([x]), np.array([y]))
 
     def place_l_wall(self, x, y):
-        self.grid_array[y, x : x + 3] = 1
-        self.grid_array[y + 1, x] = 1
+        self._stamp_walls(np.array(["L"]), np.array([x]), np.array([y]))
 
     def place_straight_wall(self, x, y):
-        if random.choice([True, False]):
-            self.grid_array[y, x : x + 3] = 1
-        else:
-            self.grid_array[y : y + 3, x] = 1
+        wall_type = "I|" if self.rng.random() < 0.5 else "I"
+        self._stamp_walls(np.array([wall_type]), np.array([x]), np.array([y]))
 
     def _decay_walls(self, decay_chance=0.3):
         """Randomly remove wall blocks to simulate damage."""
-        for y in range(1, self.grid_height - 1):
-            for x in range(1, self.grid_width - 1):
-                if self.grid_array[y, x] == 1 and random.random() < decay_chance:
-                    self.grid_array[y, x] = 0
+        interior = self.grid_array[1:-1, 1:-1]  # A view; the boundary stays
+        walls = np.flatnonzero(interior == 1)
+        decayed = walls[self.rng.random(len(walls)) < decay_chance]
+        interior.flat[decayed] = 0
 
     def _scatter_debris(self, num_debris=50):
         """Randomly place debris blocks (value 3) around the grid."""
-        for _ in range(num_debris):
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if self.grid_array[y, x] == 0:
-                self.grid_array[y, x] = 3  # 3 = debris
+        x = self.rng.integers(1, self.grid_width - 1, size=num_debris)
+        y = self.rng.integers(1, self.grid_height - 1, size=num_debris)
+        free = self.grid_array[y, x] == 0
+        self.grid_array[y[free], x[free]] = 3  # 3 = debris
 
     def get_grid(self):
         return self.grid_array
@@ -0,0 +1,165 @@
+import numpy as np
+
+from .entities import AGENT, FREE, VICTIM, EntityRegistry
+
+# Terrain class codes. They keep the legacy cell values where those were
+# unambiguous, so ``CELL_TABLE`` colors terrain as before, and move the OSM
+# classes that clashed with them (buildings were 1 like walls, parks 3 like
+# debris) to codes of their own.
+OPEN = 0
+WALL = 1
+DEBRIS = 3
+ROAD = 4
+BUILDING = 5
+PARK = 7
+
+# Terrain code -> whether it stops movement
+TERRAIN_BLOCKING = np.zeros(256, dtype=bool)
+TERRAIN_BLOCKING[[WALL, DEBRIS, BUILDING]] = True
+
+# Legacy single-array cell value -> terrain code, for each kind of source.
+# Entity cells (agents, victims) become open terrain.
+GENERATED_TERRAIN = np.zeros(256, dtype=np.uint8)
+GENERATED_TERRAIN[[WALL, DEBRIS, ROAD]] = WALL, DEBRIS, ROAD
+OSM_TERRAIN = np.zeros(256, dtype=np.uint8)
+OSM_TERRAIN[[1, 3, ROAD]] = BUILDING, PARK, ROAD
+SOURCES = {"generated": GENERATED_TERRAIN, "osm": OSM_TERRAIN}
+
+HAZARD_LIMIT = 128  # Hazard level from which a cell is impassable
+
+
+class World:
+    """The world as separate compact layers instead of one overloaded grid.
+
+    - ``terrain``: static ``uint8`` class codes (it may be a memory map);
+    - ``hazard``: a ``uint8`` level per cell, only allocated once set;
+    - ``occupied``: which cells hold an entity, bit-packed like the
+      ``ExplorationMap`` layers;
+    - ``entities``: an ``EntityRegistry`` whose writes land in ``occupied``.
+
+    At 10k x 10k cells that is 100 MB of terrain and 12.5 MB of occupancy,
+    against 800 MB for a single ``int64`` grid. ``passable`` and ``free``
+    masks are built on first use and then patched cell by cell as the layers
+    change, so reading them is free.
+
+    Nothing runs on a ``World`` yet: ``Simulation``, ``Swarm`` and the replay
+    log still read and write the single grid. It is the layout they are meant
+    to move to, with ``free()`` for passability and ``to_grid()`` for the
+    renderer.
+    """
+
+    def __init__(self, terrain, hazard_limit=HAZARD_LIMIT):
+        self.terrain = terrain
+        self.grid_height, self.grid_width = terrain.shape
+        self.hazard_limit = hazard_limit
+        self.hazard = None
+        self.occupied = np.zeros(
+            (self.grid_height, -(-self.grid_width // 8)), dtype=np.uint8
+        )
+        self.entities = EntityRegistry(_OccupancyPlane(self))
+        self._passable = None
+        self._free = None
+
+    @classmethod
+    def from_grid(cls, grid_array, source="generated", **kwargs):
+        """Split a legacy single-array grid into layers.
+
+        ``source`` is ``"generated"`` (``GridWorldGenerator``) or ``"osm"``
+        (``osm_to_grid``), which use the same values for different things.
+        Agents and victims on the grid become entities.
+        """
+        world = cls(SOURCES[source][grid_array], **kwargs)
+        for kind in (AGENT, VICTIM):
+            for y, x in np.argwhere(grid_array == kind).tolist():
+                world.entities.add(kind, y, x)
+        return world
+
+    def nbytes(self):
+        """Memory held by the layers and cached masks."""
+        arrays = [self.terrain, self.hazard, self.occupied, self._passable, self._free]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def _cell_passable(self, y, x):
+        passable = ~TERRAIN_BLOCKING[self.terrain[y, x]]
+        if self.hazard is not None:
+            passable &= self.hazard[y, x] < self.hazard_limit
+        return passable
+
+    def set_terrain(self, y, x, code):
+        """Change the terrain of cells ``(y, x)`` (scalars or arrays)."""
+        self.terrain[y, x] = code
+        self._patch(y, x)
+
+    def set_hazard(self, y, x, level):
+        """Set the hazard level of cells ``(y, x)`` (scalars or arrays)."""
+        if self.hazard is None:
+            self.hazard = np.zeros(self.terrain.shape, dtype=np.uint8)
+        self.hazard[y, x] = level
+        self._patch(y, x)
+
+    def _patch(self, y, x):
+        """Update the cached masks at changed cells."""
+        if self._passable is not None:
+            self._passable[y, x] = self._cell_passable(y, x)
+        if self._free is not None:
+            self._free[y, x] = self._cell_passable(y, x) & ~self.is_occupied(y, x)
+
+    def passable(self):
+        """Cells whose terrain and hazard let an agent through.
+
+        A read-only view, kept up to date in place.
+        """
+        if self._passable is None:
+            self._passable = ~TERRAIN_BLOCKING[self.terrain]
+            if self.hazard is not None:
+                self._passable &= self.hazard < self.hazard_limit
+        return _read_only(self._passable)
+
+    def free(self):
+        """Passable cells that no entity holds; a read-only view, kept up
+        to date in place."""
+        if self._free is None:
+            occupied = np.unpackbits(
+                self.occupied, axis=1, count=self.grid_width, bitorder="little"
+            )
+            self._free = self.passable() & (occupied == 0)
+        return _read_only(self._free)
+
+    def is_occupied(self, y, x):
+        return (self.occupied[y, x >> 3] >> (x & 7)) & 1 == 1
+
+    def to_grid(self):
+        """A single ``uint8`` grid of terrain with entities drawn on top, in
+        the cell values ``GridRenderer`` colors."""
+        grid = np.array(self.terrain, dtype=np.uint8)
+        entities = self.entities
+        alive = np.flatnonzero(entities.alive[: entities.count])
+        y, x = entities.positions[alive].T
+        grid[y, x] = entities.kinds[alive]
+        return grid
+
+
+def _read_only(mask):
+    """A read-only view of a cached mask, which still sees its updates."""
+    view = mask.view()
+    view.flags.writeable = False
+    return view
+
+
+class _OccupancyPlane:
+    """Stands in for the grid an ``EntityRegistry`` writes kinds into: any
+    kind sets the cell's occupancy bit, ``FREE`` clears it."""
+
+    def __init__(self, world):
+        self.world = world
+
+    def __setitem__(self, key, kind):
+        y, x = key
+        world = self.world
+        bit = np.uint8(1 << (x & 7))
+        if kind == FREE:
+            world.occupied[y, x >> 3] &= ~bit
+        else:
+            world.occupied[y, x >> 3] |= bit
+        if world._free is not None:
+            world._free[y, x] = kind == FREE and world._cell_passable(y, x)
@@ -2,7 +2,9 @@ import pyglet
 import yaml
 
 from game.gui import MainGUI
-from game.osm import osm_to_grid
+from game.cache import cached_osm_to_grid
+from game.osm import grid_shape_for_resolution, read_bounds
+from game.profiling import profiler
 from utils import skip_run
 
 # Load config
@@ -10,20 +12,30 @@ config_path = "configs/config.yml"
 with open(config_path, "r") as file:
     config = yaml.safe_load(file)
 
+# Collect timings (shown on screen and exported on exit) when PROFILE is set
+profiler.enabled = config.get("PROFILE", False)
+
 
 with skip_run("skip", "main_gui") as check, check():
     # Initialize the game and run with dynamic window size
     window_width, window_height = 800, 800  # Example window size
     game = MainGUI(window_width, window_height, config)  # Pass dynamic window size
-    pyglet.clock.schedule_interval(game.update, 1 / 15)
-    pyglet.app.run()
+    pyglet.app.run(1 / config["FPS"])
+    if profiler.enabled:
+        profiler.export(config["PROFILE_OUTPUT"])
 
 with skip_run("run", "osm_to_grid") as check, check():
     # Initialize the game and run with dynamic window size
-    grid = osm_to_grid("data/map.osm")
+    # Size the grid for OSM_CELL_SIZE_M meters per cell
+    map_path = "data/map.osm"
+    grid_width, grid_height = grid_shape_for_resolution(
+        read_bounds(map_path), config["OSM_CELL_SIZE_M"]
+    )
+    grid = cached_osm_to_grid(map_path, grid_width, grid_height)
     window_width, window_height = 800, 800  # Example window size
     game = MainGUI(
         window_width, window_height, config, grid
     )  # Pass dynamic window size
-    pyglet.clock.schedule_interval(game.update, 1 / 15)
-    pyglet.app.run()
+    pyglet.app.run(1 / config["FPS"])
+    if profiler.enabled:
+        profiler.export(config["PROFILE_OUTPUT"])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+# Tags of the synthetic ways, cycled through: two feature layers, drivable
+# and non-drivable roads, and a way that is drawn in no layer
+WAY_TAGS = (
+    {"building": "yes"},
+    {"leisure": "park"},
+    {"highway": "residential"},
+    {"landuse": "forest", "building": "yes"},
+    {"highway": "footway"},
+    {"amenity": "bench"},
+)
+
+
+def write_osm(path, num_ways=60, seed=0):
+    """Write a small OSM file of random rectangles.
+
+    Some rectangles stick out of the bounds, every fifth way also references
+    a node missing from the file, and a relation follows the ways, as in real
+    extracts.
+    """
+    rng = np.random.default_rng(seed)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<osm version="0.6" generator="tests">',
+        ' <bounds minlat="0.0000000" minlon="0.0000000" '
+        'maxlat="0.0100000" maxlon="0.0200000"/>',
+    ]
+    ways = []
+    node_id = 1
+    for way_id in range(1, num_ways + 1):
+        lat0, lon0 = rng.uniform(-0.001, 0.0095), rng.uniform(-0.002, 0.019)
+        dlat, dlon = rng.uniform(0.0003, 0.003, 2)
+        refs = []
+        for lat, lon in [
+            (lat0, lon0),
+            (lat0, lon0 + dlon),
+            (lat0 + dlat, lon0 + dlon),
+            (lat0 + dlat, lon0),
+        ]:
+            lines.append(f' <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}"/>')
+            refs.append(node_id)
+            node_id += 1
+        refs.append(refs[0])
+        if way_id % 5 == 0:
+            refs.insert(2, 10**9 + way_id)
+        ways.append((way_id, refs, WAY_TAGS[way_id % len(WAY_TAGS)]))
+
+    for way_id, refs, tags in ways:
+        lines.append(f' <way id="{way_id}">')
+        lines.extend(f'  <nd ref="{ref}"/>' for ref in refs)
+        lines.extend(f'  <tag k="{k}" v="{v}"/>' for k, v in tags.items())
+        lines.append(" </way>")
+    lines.append(' <relation id="1">')
+    lines.append('  <member type="way" ref="1" role="outer"/>')
+    lines.append('  <tag k="type" v="multipolygon"/>')
+    lines.append(" </relation>")
+    lines.append("</osm>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def osm_file(tmp_path):
+    return str(write_osm(tmp_path / "map.osm"))
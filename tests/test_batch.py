@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from game.batch import BatchedSimulation
+from game.entities import VICTIM
+from game.simulation import WALL, Simulation
+
+
+@pytest.mark.parametrize("grid_width, grid_height", [(23, 17), (8, 31)])
+def test_rollouts_match_simulation(grid_width, grid_height):
+    num_envs, seed = 6, grid_width
+    batch = BatchedSimulation.generate(num_envs, grid_width, grid_height, seed)
+    simulations = [
+        Simulation(grid_width, grid_height, seed=child)
+        for child in np.random.SeedSequence(seed).spawn(num_envs)
+    ]
+    rng = np.random.default_rng(seed)
+    for i, simulation in enumerate(simulations):
+        assert np.array_equal(batch.grids[i], simulation.grid_array)
+        # Victims are entities the player may not walk onto
+        for _ in range(10):
+            y, x = rng.integers(grid_height), rng.integers(grid_width)
+            if simulation.is_free(y, x):
+                simulation.entities.add(VICTIM, y, x)
+                batch.grids[i, y, x] = VICTIM
+
+    for _ in range(300):
+        # Runs of one action, so players reach walls and grid edges
+        if rng.random() < 0.2 or batch.tick == 0:
+            actions = rng.integers(5, size=num_envs)
+        moved = batch.step(actions)
+        for i, simulation in enumerate(simulations):
+            assert moved[i] == simulation.step(actions[i])
+            assert np.array_equal(batch.grids[i], simulation.grid_array)
+            position = simulation.entities.position(simulation.player)
+            assert tuple(batch.positions[i]) == position
+    assert batch.tick == 300
+
+
+def test_observe_pads_edges_with_walls():
+    rng = np.random.default_rng(0)
+    grids = rng.choice([0, 0, 1, 3], size=(4, 9, 13)).astype(np.uint8)
+    batch = BatchedSimulation(grids)
+    # Corners, an edge and the middle
+    batch.positions[:] = [(0, 0), (8, 12), (4, 1), (4, 6)]
+    for radius in (1, 2, 4):
+        view = batch.observe(radius)
+        assert view.shape == (4, 2 * radius + 1, 2 * radius + 1)
+        assert view.dtype == np.uint8
+        for i, (y, x) in enumerate(batch.positions):
+            padded = np.pad(batch.grids[i], radius, constant_values=WALL)
+            expected = padded[y : y + 2 * radius + 1, x : x + 2 * radius + 1]
+            assert np.array_equal(view[i], expected)
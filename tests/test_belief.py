@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from game.belief import LAYER_PRIORS, ROAD_PRIOR, BeliefMap, osm_prior
+from game.osm import stream_osm_to_grid
+from game.roads import ROAD, RoadGraph
+
+
+def test_observe_matches_bayes_rule():
+    rng = np.random.default_rng(0)
+    prior = rng.random((37, 50)).astype(np.float32) * 0.5
+    belief = BeliefMap(prior, detection=0.8, block_size=8)
+    expected = prior.astype(np.float64)
+    for _ in range(20):
+        y = rng.integers(37, size=100)
+        x = rng.integers(50, size=100)
+        belief.observe(y, x)
+        seen = np.zeros(prior.shape, dtype=bool)
+        seen[y, x] = True  # A cell seen twice in a tick is one look
+        p = expected[seen]
+        expected[seen] = p * 0.2 / (1 - p * 0.8)
+    assert np.allclose(belief.belief, expected, rtol=1e-4)
+    assert belief.total() == pytest.approx(expected.sum(), rel=1e-4)
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_top_matches_a_full_sort(k):
+    rng = np.random.default_rng(k)
+    belief = BeliefMap(rng.random((45, 30)).astype(np.float32), block_size=16)
+    for _ in range(5):
+        belief.observe(rng.integers(45, size=200), rng.integers(30, size=200))
+        y, x, p = belief.top(k)
+        order = np.argsort(-belief.belief, axis=None, kind="stable")[:k]
+        assert np.array_equal(p, belief.belief.ravel()[order])
+        assert np.array_equal(belief.belief[y, x], p)
+    assert belief.argmax() == tuple(
+        int(i) for i in np.unravel_index(np.argmax(belief.belief), (45, 30))
+    )
+
+
+def test_certain_cell_and_perfect_detection_stay_finite():
+    prior = np.full((4, 4), 0.5, dtype=np.float32)
+    prior[1, 2] = 1.0
+    belief = BeliefMap(prior, detection=1.0, block_size=2)
+    belief.observe(np.array([1, 0]), np.array([2, 0]))
+    assert np.isfinite(belief.belief).all()
+    assert belief.belief[1, 2] == 0
+    assert belief.belief[0, 0] == 0
+    assert belief.belief[3, 3] == 0.5
+    assert belief.argmax() != (1, 2)
+    assert np.isfinite(belief.block_max).all()
+
+
+def test_osm_prior_weights_road_cells(osm_file):
+    grid = stream_osm_to_grid(osm_file, 60, 50, roads=RoadGraph())
+    assert (grid == ROAD).any()
+    prior = osm_prior(grid, victims=5.0)
+    assert np.isclose(prior.sum(dtype=np.float64), 5.0)
+    assert (prior[grid == ROAD] > 0).all()
+    ratio = prior[grid == ROAD][0] / prior[grid == 0][0]
+    assert np.isclose(ratio, ROAD_PRIOR / LAYER_PRIORS[0])
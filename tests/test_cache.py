@@ -0,0 +1,137 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from game import cache
+from game.cache import GridCache
+from game.osm import stream_osm_to_grid
+
+
+@pytest.fixture
+def grid_cache(tmp_path):
+    return GridCache(str(tmp_path / "cache"))
+
+
+def test_load_matches_rasterizer_and_hits(grid_cache, osm_file, monkeypatch):
+    grid = grid_cache.load(osm_file, 40, 30)
+    assert np.array_equal(grid, stream_osm_to_grid(osm_file, 40, 30))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache hit rasterized again")
+
+    monkeypatch.setattr(cache, "tiled_osm_to_grid", fail)
+    assert np.array_equal(grid_cache.load(osm_file, 40, 30), grid)
+
+
+def test_key_changes_with_size(grid_cache, osm_file):
+    key = grid_cache.key(osm_file, 40, 30)
+    assert grid_cache.key(osm_file, 40, 30) == key
+    assert grid_cache.key(osm_file, 30, 40) != key
+    assert grid_cache.key(osm_file, 40, 31) != key
+    assert grid_cache.key(osm_file, 40, 30, roads=True) != key
+
+
+def test_key_changes_with_feature_layers(grid_cache, osm_file, monkeypatch):
+    key = grid_cache.key(osm_file)
+    monkeypatch.setattr(cache, "FEATURE_LAYERS", cache.FEATURE_LAYERS[:1])
+    assert grid_cache.key(osm_file) != key
+
+
+def test_key_changes_with_cache_version(grid_cache, osm_file, monkeypatch):
+    key = grid_cache.key(osm_file)
+    monkeypatch.setattr(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1)
+    assert grid_cache.key(osm_file) != key
+
+
+def test_key_changes_with_contents(grid_cache, osm_file):
+    key = grid_cache.key(osm_file)
+    stat = os.stat(osm_file)
+    with open(osm_file, "a", encoding="utf-8") as f:
+        f.write("<!-- edited -->\n")
+    # Same mtime, different size: the stored digest must not be reused
+    os.utime(osm_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert grid_cache.key(osm_file) != key
+
+
+def _fill(grid_cache, osm_file, sizes):
+    """Cache ``osm_file`` at each size; returns the paths, oldest first."""
+    paths = []
+    for i, size in enumerate(sizes):
+        grid_cache.load(osm_file, size, size)
+        path = grid_cache.path(grid_cache.key(osm_file, size, size))
+        last_used = time.time() - 1000 + i * 100
+        os.utime(path, (last_used, last_used))
+        paths.append(path)
+    return paths
+
+
+def test_evict_by_age(grid_cache, osm_file):
+    paths = _fill(grid_cache, osm_file, (20, 21, 22))
+    grid_cache.max_age = 850  # Only the newest was used within that
+    assert grid_cache.evict() == paths[:2]
+    assert [path for path, _, _ in grid_cache.entries()] == paths[2:]
+
+
+def test_evict_least_recently_used(grid_cache, osm_file):
+    paths = _fill(grid_cache, osm_file, (20, 21, 22))
+    # Loading marks the first entry as the most recently used one
+    grid_cache.load(osm_file, 20, 20)
+    sizes = {path: size for path, size, _ in grid_cache.entries()}
+    grid_cache.max_bytes = sizes[paths[0]] + sizes[paths[2]]
+    assert grid_cache.evict() == [paths[1]]
+    assert sorted(p for p, _, _ in grid_cache.entries()) == sorted([paths[0], paths[2]])
+
+
+def test_evict_removes_sidecars(grid_cache, osm_file):
+    grid_cache.load(osm_file, 20, 20, features=True, roads=True)
+    path = grid_cache.path(grid_cache.key(osm_file, 20, 20, roads=True))
+    grid_cache.max_bytes = 0
+    assert grid_cache.evict() == [path]
+    assert os.listdir(grid_cache.cache_dir) == ["digests.json"]
+
+
+def test_new_entry_is_kept_by_its_own_eviction(grid_cache, osm_file):
+    grid_cache.max_bytes = 1
+    grid_cache.load(osm_file, 20, 20)
+    grid_cache.load(osm_file, 21, 21)
+    ((path, _, _),) = grid_cache.entries()
+    assert path == grid_cache.path(grid_cache.key(osm_file, 21, 21))
+
+
+def test_grid_is_published_with_atomic_replace(grid_cache, osm_file, monkeypatch):
+    final = grid_cache.path(grid_cache.key(osm_file, 40, 30))
+    replaced = []
+    os_replace = os.replace
+
+    def replace(src, dst):
+        if dst == final:
+            # The complete grid is in the tmp file before it is published
+            assert not os.path.exists(final)
+            assert np.array_equal(np.load(src), stream_osm_to_grid(osm_file, 40, 30))
+        replaced.append((src, dst))
+        os_replace(src, dst)
+
+    monkeypatch.setattr(cache.os, "replace", replace)
+    grid_cache.load(osm_file, 40, 30)
+    assert (f"{final}.{os.getpid()}.tmp", final) in replaced
+    assert not [name for name in os.listdir(grid_cache.cache_dir) if ".tmp" in name]
+
+
+def test_failed_rasterization_leaves_no_entry(grid_cache, osm_file, monkeypatch):
+    def crash(file_path, grid_width, grid_height, out_path, **kwargs):
+        grid = np.lib.format.open_memmap(
+            out_path, mode="w+", dtype=np.uint8, shape=(grid_height, grid_width)
+        )
+        grid[:1] = 1  # Partly written
+        grid.flush()
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(cache, "tiled_osm_to_grid", crash)
+    with pytest.raises(RuntimeError):
+        grid_cache.load(osm_file, 40, 30)
+    assert grid_cache.entries() == []
+    monkeypatch.undo()
+    grid = grid_cache.load(osm_file, 40, 30)
+    assert np.array_equal(grid, stream_osm_to_grid(osm_file, 40, 30))
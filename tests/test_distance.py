@@ -0,0 +1,112 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from game.distance import UNREACHABLE, DistanceFields, distance_field, passable_mask
+from game.simulation import DEBRIS, WALL
+
+
+def random_grid(rng, height, width, density):
+    grid = np.zeros((height, width), dtype=np.uint8)
+    blocked = rng.random((height, width)) < density
+    grid[blocked] = rng.choice([WALL, DEBRIS], size=blocked.sum())
+    return grid
+
+
+def reference_field(passable, sources):
+    """Scalar breadth-first search, one cell at a time."""
+    height, width = passable.shape
+    dist = np.full(passable.shape, UNREACHABLE, dtype=np.int32)
+    queue = deque()
+    for y, x in sources:
+        if passable[y, x] and dist[y, x] == UNREACHABLE:
+            dist[y, x] = 0
+            queue.append((y, x))
+    while queue:
+        y, x = queue.popleft()
+        for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+            if (
+                0 <= ny < height
+                and 0 <= nx < width
+                and passable[ny, nx]
+                and dist[ny, nx] == UNREACHABLE
+            ):
+                dist[ny, nx] = dist[y, x] + 1
+                queue.append((ny, nx))
+    return dist
+
+
+@pytest.mark.parametrize("height, width", [(1, 1), (1, 17), (23, 31), (40, 9)])
+@pytest.mark.parametrize("num_sources", [1, 5])
+def test_matches_scalar_bfs(height, width, num_sources):
+    rng = np.random.default_rng(height * width + num_sources)
+    passable = passable_mask(random_grid(rng, height, width, 0.3))
+    for _ in range(5):
+        sources = np.stack(
+            [
+                rng.integers(height, size=num_sources),
+                rng.integers(width, size=num_sources),
+            ],
+            axis=1,
+        )
+        field = distance_field(passable, sources)
+        assert field.dtype == np.int32
+        assert np.array_equal(field, reference_field(passable, sources))
+
+
+def test_blocked_source_reaches_nothing():
+    passable = np.ones((5, 5), dtype=bool)
+    passable[2, 2] = False
+    assert (distance_field(passable, [(2, 2)]) == UNREACHABLE).all()
+
+
+def test_invalidate_reopens_blocked_source():
+    grid = np.zeros((5, 5), dtype=np.uint8)
+    grid[2, 2] = WALL
+    fields = DistanceFields(grid)
+    assert (fields.field(2, 2) == UNREACHABLE).all()
+    grid[2, 2] = 0
+    fields.invalidate(2, 2)
+    field = fields.field(2, 2)
+    assert field.max() == 4
+    assert np.array_equal(field, distance_field(passable_mask(grid), [(2, 2)]))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_invalidate_matches_fresh_build(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(rng, 18, 25, 0.35)
+    fields = DistanceFields(grid, max_fields=12)
+    for _ in range(30):
+        # Half the queries go to blocked cells, so blocked sources get cached
+        blocked = np.argwhere(grid != 0)
+        for _ in range(6):
+            if blocked.size and rng.random() < 0.5:
+                source = tuple(blocked[rng.integers(len(blocked))])
+            else:
+                source = (rng.integers(18), rng.integers(25))
+            fields.field(*source)
+
+        for _ in range(rng.integers(1, 4)):
+            y, x = rng.integers(18), rng.integers(25)
+            grid[y, x] = WALL if grid[y, x] == 0 else 0
+            fields.invalidate(y, x)
+
+        passable = passable_mask(grid)
+        assert np.array_equal(fields.passable, passable)
+        for source in list(fields._fields):
+            expected = reference_field(passable, [source])
+            assert np.array_equal(fields.field(*source), expected), source
+
+
+def test_cache_is_lru_and_read_only():
+    fields = DistanceFields(np.zeros((6, 6), dtype=np.uint8), max_fields=2)
+    first = fields.field(0, 0)
+    fields.field(1, 1)
+    assert fields.field(0, 0) is first  # A hit marks it recently used
+    fields.field(2, 2)
+    assert list(fields._fields) == [(0, 0), (2, 2)]
+    assert not first.flags.writeable
+    assert fields.distance((0, 0), (5, 5)) == 10
+    assert fields.distances((0, 0), [(0, 1), (3, 4)]).tolist() == [1, 7]
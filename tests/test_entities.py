@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from game.entities import AGENT, FREE, VICTIM, EntityRegistry
+
+
+@pytest.fixture
+def registry():
+    return EntityRegistry(np.zeros((4, 5), dtype=np.uint8), capacity=1)
+
+
+def test_add_move_remove_keep_grid_in_step(registry):
+    agent = registry.add(AGENT, 1, 2)
+    victim = registry.add(VICTIM, 3, 4)
+    assert registry.move(agent, 0, 2) == (1, 2)
+    assert registry.grid_array[1, 2] == FREE
+    assert registry.grid_array[0, 2] == AGENT
+    assert registry.at(0, 2) == agent
+    registry.remove(victim)
+    assert registry.grid_array[3, 4] == FREE
+    assert registry.at(3, 4) is None
+    assert len(registry) == 1
+    assert registry.of_kind(AGENT).tolist() == [agent]
+    assert registry.of_kind(VICTIM).tolist() == []
+
+
+def test_move_onto_own_cell_does_nothing(registry):
+    agent = registry.add(AGENT, 1, 2)
+    assert registry.move(agent, 1, 2) == (1, 2)
+    assert registry.at(1, 2) == agent
+    assert registry.grid_array[1, 2] == AGENT
+
+
+def test_move_onto_occupied_cell_raises(registry):
+    agent = registry.add(AGENT, 1, 2)
+    registry.add(VICTIM, 1, 3)
+    with pytest.raises(ValueError):
+        registry.move(agent, 1, 3)
+    assert registry.position(agent) == (1, 2)
+
+
+@pytest.mark.parametrize("entity", [0, 5, -1])
+def test_dead_or_unknown_entity_raises(registry, entity):
+    registry.add(AGENT, 1, 2)
+    registry.remove(0)
+    with pytest.raises(ValueError, match="not on the grid"):
+        registry.remove(entity)
+    with pytest.raises(ValueError, match="not on the grid"):
+        registry.move(entity, 0, 0)
+    assert registry.grid_array.sum() == 0
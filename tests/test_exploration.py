@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from game.exploration import ExplorationMap, _shift_east, _shift_west, pack_mask
+
+WIDTHS = [1, 7, 8, 9, 13, 31, 64]
+
+
+def unpack(bits, width):
+    return np.unpackbits(bits, axis=1, count=width, bitorder="little").astype(bool)
+
+
+def random_map(rng, height, width, num_agents=3):
+    passable = rng.random((height, width)) < 0.8
+    exploration = ExplorationMap(height, width, num_agents, passable)
+    for _ in range(4):
+        n = rng.integers(1, 2 * width)
+        exploration.mark(
+            rng.integers(num_agents, size=n),
+            rng.integers(height, size=n),
+            rng.integers(width, size=n),
+        )
+    return exploration, passable
+
+
+def reference_seen(exploration, layer):
+    """The seen mask of ``layer`` rebuilt cell by cell from ``bits``."""
+    height, width = exploration.grid_height, exploration.grid_width
+    seen = np.zeros((height, width), dtype=bool)
+    for y in range(height):
+        for x in range(width):
+            seen[y, x] = exploration.bits[layer, y, x // 8] >> (x % 8) & 1
+    return seen
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_shifts_carry_across_bytes(width):
+    mask = np.random.default_rng(width).random((5, width)) < 0.5
+    west = np.zeros_like(mask)
+    west[:, :-1] = mask[:, 1:]
+    east = np.zeros_like(mask)
+    east[:, 1:] = mask[:, :-1]
+    assert np.array_equal(unpack(_shift_west(pack_mask(mask)), width), west)
+    assert np.array_equal(unpack(_shift_east(pack_mask(mask)), width), east)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_mark_and_counts_match_unpacked(width):
+    rng = np.random.default_rng(width)
+    exploration, passable = random_map(rng, 6, width)
+    layers = [reference_seen(exploration, layer) for layer in range(4)]
+    assert np.array_equal(layers[3], layers[0] | layers[1] | layers[2])
+    for layer, seen in enumerate(layers):
+        assert np.array_equal(exploration.unpack(layer).astype(bool), seen)
+        assert exploration.count(layer) == (seen & passable).sum()
+    assert exploration.coverage() == (layers[3] & passable).sum() / passable.sum()
+    assert np.array_equal(
+        unpack(exploration.union([0, 2]), width), layers[0] | layers[2]
+    )
+    # Padding bits past the last column stay clear
+    pad = exploration.bits.shape[2] * 8 - width
+    if pad:
+        assert not (exploration.bits[:, :, -1] >> (8 - pad)).any()
+
+
+def test_mark_returns_cells_new_to_the_team():
+    exploration = ExplorationMap(4, 11, num_agents=2)
+    y, x = exploration.mark([0, 1, 1], [1, 1, 3], [9, 9, 10])
+    assert sorted(zip(y.tolist(), x.tolist())) == [(1, 9), (3, 10)]
+    y, x = exploration.mark([1, 0], [1, 2], [9, 0])
+    assert list(zip(y.tolist(), x.tolist())) == [(2, 0)]
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_frontier_matches_unpacked(width):
+    rng = np.random.default_rng(width + 100)
+    exploration, passable = random_map(rng, 7, width)
+    for layer in (None, 0):
+        seen = reference_seen(exploration, 3 if layer is None else layer) & passable
+        unseen = ~seen & passable
+        near = np.zeros_like(unseen)
+        near[:, :-1] |= unseen[:, 1:]
+        near[:, 1:] |= unseen[:, :-1]
+        near[:-1] |= unseen[1:]
+        near[1:] |= unseen[:-1]
+        y, x = exploration.frontier(layer)
+        frontier = np.zeros_like(seen)
+        frontier[y, x] = True
+        assert len(y) == frontier.sum()  # No cell twice
+        assert np.array_equal(frontier, seen & near)
+
+
+def test_frontier_ignores_padding():
+    # A fully seen row whose padding bits are unseen has no frontier
+    exploration = ExplorationMap(1, 13)
+    exploration.mark(0, np.zeros(13, dtype=int), np.arange(13))
+    assert exploration.frontier()[0].size == 0
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_view_slices_match_unpack(width):
+    rng = np.random.default_rng(width + 200)
+    exploration, _ = random_map(rng, 6, width)
+    full = exploration.unpack()
+    view = exploration.view()
+    assert view.shape == (6, width)
+    for _ in range(40):
+        y0, y1 = sorted(rng.integers(0, 7, size=2))
+        x0, x1 = sorted(rng.integers(0, width + 1, size=2))
+        cells = view[y0:y1, x0:x1]
+        assert cells.shape == (y1 - y0, x1 - x0)
+        assert np.array_equal(cells, full[y0:y1, x0:x1])
+    # Open-ended and out-of-range slices, as the renderer's chunks may be
+    assert np.array_equal(view[:, :], full)
+    assert np.array_equal(view[2:, 3 % width :], full[2:, 3 % width :])
+    assert np.array_equal(view[:, : width + 5], full)
+    layer = exploration.view(1)
+    assert np.array_equal(layer[1:5, 0:width], exploration.unpack(1)[1:5])
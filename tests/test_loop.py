@@ -0,0 +1,25 @@
+import pytest
+
+from game.loop import FixedTimestep
+
+
+@pytest.mark.parametrize("speed", [1.0, 10.0, 200.0])
+def test_runs_every_tick_at_any_speed(speed):
+    ticks = []
+    loop = FixedTimestep(ticks.append, tick_rate=15, speed=speed)
+    for _ in range(600):  # Ten seconds at 60 frames per second
+        loop.advance(1 / 60)
+    assert loop.ticks == len(ticks)
+    assert abs(loop.ticks - 10 * 15 * speed) <= 1
+
+
+def test_drops_backlog_beyond_max_lag():
+    loop = FixedTimestep(lambda dt: None, tick_rate=10, speed=4.0, max_lag=0.5)
+    assert loop.max_steps == 20
+    assert loop.advance(3.0) == 20  # A 3 s stall runs 0.5 s worth of ticks
+    assert loop.advance(0.0) <= 1
+
+
+def test_explicit_max_steps():
+    loop = FixedTimestep(lambda dt: None, tick_rate=10, max_steps=3)
+    assert loop.advance(1.0) == 3
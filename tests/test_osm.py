@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from game.osm import (
+    osm_to_grid,
+    stream_osm_to_grid,
+    tiled_osm_to_grid,
+    tree_osm_to_grid,
+)
+
+MAP = os.path.join(os.path.dirname(__file__), os.pardir, "data", "map.osm")
+SIZES = [(100, 100), (37, 211), (211, 37), (64, 48)]
+
+
+@pytest.mark.parametrize("grid_width, grid_height", SIZES)
+def test_stream_matches_tree(osm_file, grid_width, grid_height):
+    tree = tree_osm_to_grid(osm_file, grid_width, grid_height)
+    assert np.isin(tree, [1, 3]).any()
+    assert np.array_equal(stream_osm_to_grid(osm_file, grid_width, grid_height), tree)
+    assert np.array_equal(
+        osm_to_grid(osm_file, grid_width, grid_height, streaming=False), tree
+    )
+
+
+@pytest.mark.parametrize("grid_width, grid_height", SIZES)
+@pytest.mark.parametrize("tile_size", [1, 7, 16, 1024])
+def test_tiled_matches_tree(osm_file, grid_width, grid_height, tile_size):
+    tree = tree_osm_to_grid(osm_file, grid_width, grid_height)
+    tiled = tiled_osm_to_grid(osm_file, grid_width, grid_height, tile_size)
+    assert tiled.dtype == tree.dtype
+    assert np.array_equal(tiled, tree)
+
+
+@pytest.mark.parametrize("grid_width, grid_height", [(37, 211), (100, 100)])
+def test_parallel_matches_tree(osm_file, grid_width, grid_height):
+    tree = tree_osm_to_grid(osm_file, grid_width, grid_height)
+    parallel = tiled_osm_to_grid(
+        osm_file, grid_width, grid_height, tile_size=16, workers=3
+    )
+    assert np.array_equal(parallel, tree)
+
+
+def test_tiled_memory_map(osm_file, tmp_path):
+    out_path = str(tmp_path / "grid.npy")
+    grid = tiled_osm_to_grid(osm_file, 37, 211, tile_size=16, out_path=out_path)
+    assert isinstance(grid, np.memmap)
+    assert np.array_equal(np.load(out_path), tree_osm_to_grid(osm_file, 37, 211))
+
+
+def test_real_map():
+    tree = tree_osm_to_grid(MAP, 37, 211)
+    assert np.array_equal(stream_osm_to_grid(MAP, 37, 211), tree)
+    assert np.array_equal(tiled_osm_to_grid(MAP, 37, 211, 16, workers=2), tree)
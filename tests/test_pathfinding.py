@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from game.distance import passable_mask
+from game.pathfinding import HierarchicalPlanner, astar
+from game.simulation import DEBRIS, WALL
+
+
+def random_grid(rng, height, width, density):
+    grid = np.zeros((height, width), dtype=np.uint8)
+    blocked = rng.random((height, width)) < density
+    grid[blocked] = rng.choice([WALL, DEBRIS], size=blocked.sum())
+    return grid
+
+
+def check_path(passable, path, start, goal):
+    assert path[0] == start
+    assert path[-1] == goal
+    for (y0, x0), (y1, x1) in zip(path, path[1:]):
+        assert abs(y0 - y1) + abs(x0 - x1) == 1
+    for cell in path:
+        assert passable[cell]
+
+
+def check_queries(planner, rng, queries):
+    passable = passable_mask(planner.grid_array)
+    assert np.array_equal(planner.passable, passable)
+    open_cells = np.argwhere(passable)
+    for _ in range(queries):
+        start, goal = (
+            tuple(c) for c in open_cells[rng.integers(len(open_cells), size=2)]
+        )
+        expected = astar(passable, start, goal)
+        path = planner.find_path(start, goal)
+        if expected is None:
+            assert path is None
+        else:
+            assert path is not None
+            check_path(passable, path, start, goal)
+            # Refined paths are never shorter than the optimum
+            assert len(path) >= len(expected)
+
+
+@pytest.mark.parametrize(
+    "height, width, cluster_size, density",
+    [(20, 20, 4, 0.3), (37, 45, 8, 0.35), (33, 17, 5, 0.25), (24, 40, 16, 0.4)],
+)
+def test_matches_flat_astar(height, width, cluster_size, density):
+    rng = np.random.default_rng(height * width)
+    grid = random_grid(rng, height, width, density)
+    planner = HierarchicalPlanner(grid, cluster_size)
+    check_queries(planner, rng, 150)
+
+
+@pytest.mark.parametrize("cluster_size", [4, 7])
+def test_matches_flat_astar_after_updates(cluster_size):
+    rng = np.random.default_rng(cluster_size)
+    grid = random_grid(rng, 30, 35, 0.3)
+    planner = HierarchicalPlanner(grid, cluster_size)
+    for _ in range(8):
+        cells = rng.integers((30, 35), size=(25, 2))
+        for y, x in cells:
+            grid[y, x] = WALL if grid[y, x] == 0 else 0
+            planner.update(y, x)
+        check_queries(planner, rng, 60)
+
+
+def test_blocked_endpoints_and_same_cell():
+    grid = np.zeros((10, 10), dtype=np.uint8)
+    grid[5, 5] = WALL
+    planner = HierarchicalPlanner(grid, 4)
+    assert planner.find_path((0, 0), (5, 5)) is None
+    assert planner.find_path((5, 5), (0, 0)) is None
+    assert planner.find_path((2, 3), (2, 3)) == [(2, 3)]
+
+
+def test_detour_out_of_the_cluster():
+    # Two cells of one cluster are only connected through its neighbours
+    grid = np.zeros((8, 12), dtype=np.uint8)
+    grid[:, 2] = WALL
+    grid[7, 2] = 0
+    grid[0:7, 1] = 0
+    grid[0, 0:3] = WALL
+    planner = HierarchicalPlanner(grid, 4)
+    start, goal = (1, 0), (1, 3)
+    assert astar(planner.passable, start, goal, planner.cluster_bounds((0, 0))) is None
+    path = planner.find_path(start, goal)
+    check_path(planner.passable, path, start, goal)
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from game.replay import (
+    MissionRecorder,
+    MissionReplay,
+    _read_varint,
+    _varint,
+)
+from game.simulation import DOWN, LEFT, RIGHT, STAY, UP, WALL, Simulation
+
+
+@pytest.mark.parametrize(
+    "value", [0, 1, 127, 128, 255, 300, 16383, 16384, 2**32 - 1, 2**32, 2**63 + 5]
+)
+def test_varint_round_trip(value):
+    data = _varint(value)
+    assert len(data) == max(1, -(-value.bit_length() // 7))
+    assert _read_varint(data, 0) == (value, len(data))
+
+
+def test_varint_stream():
+    values = np.random.default_rng(0).integers(0, 2**40, size=200).tolist()
+    data = b"".join(_varint(v) for v in values)
+    pos, decoded = 0, []
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        decoded.append(value)
+    assert decoded == values
+
+
+def snapshot(simulation):
+    position = simulation.entities.position(simulation.player)
+    return simulation.grid_array.copy(), position
+
+
+def record_mission(path, rng, ticks=400, warmup=0, keyframe_interval=16):
+    """Record a random mission; returns the state before every tick and at
+    the end, keyed by tick."""
+    simulation = Simulation(30, 20, seed=1)
+    for _ in range(warmup):  # The recorder may start mid-mission
+        simulation.step(RIGHT)
+    states = {}
+    with MissionRecorder(path, simulation, keyframe_interval) as recorder:
+        action, run = STAY, 0
+        for _ in range(ticks):
+            # Edit a few cells between some ticks, never the player's
+            if rng.random() < 0.1:
+                for _ in range(rng.integers(1, 4)):
+                    y, x = rng.integers(20), rng.integers(30)
+                    if (y, x) != simulation.entities.position(simulation.player):
+                        recorder.set_cell(y, x, rng.choice([0, WALL]))
+            states[simulation.tick] = snapshot(simulation)
+            # Long runs of one action, so moves run into walls and get
+            # blocked, and STAY runs span keyframes
+            if run == 0:
+                action = rng.choice([STAY, STAY, UP, DOWN, LEFT, RIGHT])
+                run = rng.integers(1, 40)
+            recorder.step(action)
+            run -= 1
+        states[simulation.tick] = snapshot(simulation)
+    return states
+
+
+@pytest.mark.parametrize("warmup, keyframe_interval", [(0, 16), (5, 7), (3, 1000)])
+def test_state_at_matches_live_run(tmp_path, warmup, keyframe_interval):
+    path = tmp_path / "mission.sarr"
+    states = record_mission(
+        path, np.random.default_rng(warmup), 400, warmup, keyframe_interval
+    )
+    replay = MissionReplay(path)
+    assert replay.start_tick == warmup
+    assert replay.end_tick == warmup + 400
+    assert len(replay) == 400
+    assert replay.edits
+    if keyframe_interval < 400:
+        assert len(replay.keyframes) == 400 // keyframe_interval
+
+    for tick, (grid, position) in states.items():
+        simulation = replay.state_at(tick)
+        assert simulation.tick == tick
+        assert simulation.entities.position(simulation.player) == position
+        assert np.array_equal(simulation.grid_array, grid), tick
+
+
+def test_run_replays_whole_mission(tmp_path):
+    path = tmp_path / "mission.sarr"
+    states = record_mission(path, np.random.default_rng(9))
+    replay = MissionReplay(path)
+    grid, position = states[replay.end_tick]
+    simulation = replay.run()
+    assert simulation.tick == replay.end_tick
+    assert simulation.entities.position(simulation.player) == position
+    assert np.array_equal(simulation.grid_array, grid)
+
+    # Picking up from a seek gives the same end state
+    simulation = replay.run(replay.state_at(123))
+    assert np.array_equal(simulation.grid_array, grid)
+
+
+def test_actions_are_run_length_encoded(tmp_path):
+    path = tmp_path / "mission.sarr"
+    simulation = Simulation(30, 20, seed=1)
+    with MissionRecorder(path, simulation, keyframe_interval=10**6) as recorder:
+        for action in [STAY] * 5000 + [LEFT] * 3000:
+            recorder.step(action)
+    replay = MissionReplay(path)
+    assert replay.actions.tolist() == [STAY] * 5000 + [LEFT] * 3000
+    assert path.stat().st_size < replay.initial.size + 100
+
+
+def test_out_of_range_and_corrupt_logs(tmp_path):
+    path = tmp_path / "mission.sarr"
+    record_mission(path, np.random.default_rng(0), ticks=20)
+    replay = MissionReplay(path)
+    with pytest.raises(IndexError):
+        replay.state_at(21)
+    with pytest.raises(IndexError):
+        replay.state_at(-1)
+
+    data = path.read_bytes()
+    path.write_bytes(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        MissionReplay(path)
+    path.write_bytes(data + b"Z")
+    with pytest.raises(ValueError):
+        MissionReplay(path)
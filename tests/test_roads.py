@@ -0,0 +1,163 @@
+import math
+
+import numpy as np
+import pytest
+
+from game.osm import EARTH_RADIUS_M, LAYER_VALUES, NodeIndex, stream_osm_to_grid
+from game.roads import ROAD, RoadGraph
+
+# A millidegree of longitude on the equator, in meters
+STEP_M = math.radians(0.001) * EARTH_RADIUS_M
+BUILDING = LAYER_VALUES[1]
+
+
+def make_graph(ways, num_nodes=10):
+    """Build a graph over nodes ``1..num_nodes`` spaced 0.001 degrees apart
+    along the equator from ``(refs, tags)`` ways."""
+    nodes = NodeIndex()
+    for node_id in range(num_nodes, 0, -1):
+        nodes.add(node_id, 0.0, node_id * 0.001)
+    graph = RoadGraph()
+    for way_id, (refs, tags) in enumerate(ways):
+        graph.add_way(way_id, refs, {"highway": "residential", **tags})
+    graph.build(nodes)
+    return graph
+
+
+def edges(graph):
+    """``{(from_osm_id, to_osm_id): length}`` of every edge."""
+    result = {}
+    for node in range(graph.num_nodes):
+        targets, lengths = graph.neighbours(node)
+        for target, length in zip(targets, lengths):
+            key = (int(graph.osm_ids[node]), int(graph.osm_ids[target]))
+            assert key not in result
+            result[key] = float(length)
+    return result
+
+
+@pytest.mark.parametrize(
+    "tags, expected",
+    [
+        ({}, {(1, 2), (2, 1), (2, 3), (3, 2)}),
+        ({"oneway": "yes"}, {(1, 2), (2, 3)}),
+        ({"oneway": "1"}, {(1, 2), (2, 3)}),
+        ({"oneway": "-1"}, {(2, 1), (3, 2)}),
+        ({"junction": "roundabout"}, {(1, 2), (2, 3)}),
+        ({"oneway": "no"}, {(1, 2), (2, 1), (2, 3), (3, 2)}),
+    ],
+)
+def test_edge_directions(tags, expected):
+    graph = make_graph([([1, 2, 3], tags)])
+    assert set(edges(graph)) == expected
+
+
+def test_only_drivable_roads_are_kept():
+    graph = RoadGraph()
+    graph.add_way(1, [1, 2], {"highway": "footway"})
+    graph.add_way(2, [2, 3], {"building": "yes"})
+    graph.add_way(3, [3], {"highway": "residential"})
+    graph.add_way(4, [4, 5], {"highway": "service"})
+    nodes = NodeIndex()
+    for node_id in range(1, 6):
+        nodes.add(node_id, 0.0, node_id * 0.001)
+    graph.build(nodes)
+    assert set(edges(graph)) == {(4, 5), (5, 4)}
+    assert graph.osm_ids.tolist() == [4, 5]
+
+
+def test_parallel_edges_keep_one_length():
+    # The same segment in three ways, one of them one-way: the matrix must
+    # hold one length per direction, not their sum
+    graph = make_graph(
+        [([1, 2], {}), ([2, 1], {}), ([1, 2], {"oneway": "yes"}), ([1, 2, 4], {})]
+    )
+    lengths = edges(graph)
+    assert set(lengths) == {(1, 2), (2, 1), (2, 4), (4, 2)}
+    assert lengths[(1, 2)] == pytest.approx(STEP_M, rel=1e-5)
+    assert lengths[(2, 4)] == pytest.approx(2 * STEP_M, rel=1e-5)
+    matrix = graph.matrix().toarray()
+    assert matrix[0, 1] == pytest.approx(STEP_M, rel=1e-5)
+    assert graph.num_edges == 4
+
+
+def test_segments_to_missing_nodes_are_dropped():
+    graph = make_graph([([1, 2, 99, 3, 4], {}), ([5, 5, 6], {"oneway": "yes"})])
+    assert set(edges(graph)) == {(1, 2), (2, 1), (3, 4), (4, 3), (5, 6)}
+    assert 99 not in graph.osm_ids
+    assert np.all(np.diff(graph.osm_ids) > 0)
+    assert graph.indptr[-1] == graph.num_edges
+    # A node whose every segment was dropped stays, without edges
+    graph = make_graph([([1, 99], {})])
+    assert graph.osm_ids.tolist() == [1]
+    assert graph.num_edges == 0
+
+
+def test_empty_graph():
+    graph = make_graph([([98, 99], {})])
+    assert graph.num_nodes == 0
+    assert graph.num_edges == 0
+    assert graph.indptr.tolist() == [0]
+
+
+def test_shortest_paths():
+    # 1 - 2 - 3 - 4 two-way, then one-way on to 7 and back to 1
+    graph = make_graph([([1, 2, 3, 4], {}), ([4, 7, 1], {"oneway": "yes"})])
+    assert graph.osm_ids.tolist() == [1, 2, 3, 4, 7]
+    dist, predecessors = graph.shortest_paths([0, 3, 4], predecessors=True)
+    expected = [[0, 1, 2, 3, 6], [3, 2, 1, 0, 3], [6, 7, 8, 9, 0]]
+    assert np.allclose(dist, np.array(expected) * STEP_M, rtol=1e-5)
+    path = RoadGraph.path(predecessors[0], 4)
+    assert graph.osm_ids[path].tolist() == [1, 2, 3, 4, 7]
+    path = RoadGraph.path(predecessors[1], 0)
+    assert graph.osm_ids[path].tolist() == [4, 3, 2, 1]
+
+    limited = graph.shortest_paths(0, limit=1.5 * STEP_M)
+    assert np.isfinite(limited[0]).tolist() == [True, True, False, False, False]
+    distances, _, sources = graph.nearest_source([0, 3])
+    assert sources.tolist() == [0, 0, 3, 3, 3]
+    assert np.allclose(distances, np.array([0, 1, 1, 0, 3]) * STEP_M, rtol=1e-5)
+
+
+def test_rasterize_keeps_buildings():
+    # A road across the middle row of an 11 x 5 grid
+    graph = make_graph([([1, 11], {})], num_nodes=11)
+    graph.bounds = (-0.001, 0.001, 0.001, 0.011)
+    grid = np.zeros((5, 11), dtype=np.uint8)
+    grid[2, 5] = BUILDING
+    grid[2, 7] = LAYER_VALUES[2]  # Parks are paved over
+    graph.rasterize(grid)
+    assert grid[2].tolist() == [ROAD] * 5 + [BUILDING] + [ROAD] * 5
+    assert not grid[[0, 1, 3, 4]].any()
+
+
+def test_rasterize_clips_to_grid():
+    graph = make_graph([([1, 3], {})])
+    grid = np.zeros((5, 5), dtype=np.uint8)
+    graph.rasterize(grid, bounds=(-0.001, 0.0015, 0.001, 0.0025))
+    assert grid[2].tolist() == [ROAD] * 5
+    assert (grid == ROAD).sum() == 5
+
+
+@pytest.mark.parametrize("bounds", [None, (0.0, 0.0, 0.01, 0.02)])
+def test_save_load_round_trip(tmp_path, bounds):
+    graph = make_graph([([1, 2, 3], {}), ([3, 5, 8], {"oneway": "-1"})])
+    graph.bounds = bounds
+    path = tmp_path / "roads.npz"
+    graph.save(path)
+    loaded = RoadGraph.load(path)
+    assert loaded.bounds == bounds
+    for name in ("osm_ids", "lats", "lons", "indptr", "indices", "lengths"):
+        assert np.array_equal(getattr(loaded, name), getattr(graph, name)), name
+        assert getattr(loaded, name).dtype == getattr(graph, name).dtype
+    assert edges(loaded) == edges(graph)
+
+
+def test_built_while_rasterizing_matches_from_osm(osm_file):
+    graph = RoadGraph.from_osm(osm_file)
+    assert graph.num_edges
+    roads = RoadGraph()
+    grid = stream_osm_to_grid(osm_file, 60, 50, roads=roads)
+    assert roads.bounds == graph.bounds
+    assert edges(roads) == edges(graph)
+    assert (grid == ROAD).any()
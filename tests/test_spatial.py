@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+from skimage.measure import points_in_poly
+
+from game.cache import GridCache
+from game.osm import LAYER_VALUES, stream_osm_to_grid
+from game.spatial import FeatureIndex, _distance_to_outline
+
+GRID_WIDTH, GRID_HEIGHT = 60, 45
+
+
+@pytest.fixture
+def index(osm_file):
+    index = FeatureIndex(GRID_WIDTH, GRID_HEIGHT, bucket_size=8)
+    stream_osm_to_grid(osm_file, GRID_WIDTH, GRID_HEIGHT, index=index)
+    return index
+
+
+def matches(index, value, f):
+    return value is None or index.values[f] == value
+
+
+def test_index_holds_every_feature_way(index):
+    assert len(index) > 20
+    assert set(index.values) == set(LAYER_VALUES[1:].tolist())
+    assert index.bounds == (0.0, 0.0, 0.01, 0.02)
+    # Every feature is filed under each bucket its bounding box touches
+    for f, (x0, y0, x1, y1) in enumerate(index.bboxes):
+        for key in index._bucket_keys(x0, y0, x1, y1):
+            assert f in index.buckets[key]
+
+
+@pytest.mark.parametrize("value", [None, LAYER_VALUES[1]])
+def test_at_cell_matches_brute_force(index, value):
+    for y in range(-2, GRID_HEIGHT + 2):
+        for x in range(-2, GRID_WIDTH + 2):
+            expected = [
+                f
+                for f, polygon in enumerate(index.polygons)
+                if matches(index, value, f) and points_in_poly([[x, y]], polygon)[0]
+            ]
+            assert index.at_cell(y, x, value) == expected, (y, x)
+
+
+@pytest.mark.parametrize("value", [None, LAYER_VALUES[2]])
+def test_in_box_matches_brute_force(index, value):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        y0, y1 = sorted(rng.integers(-5, GRID_HEIGHT + 5, size=2))
+        x0, x1 = sorted(rng.integers(-5, GRID_WIDTH + 5, size=2))
+        expected = [
+            f
+            for f, (bx0, by0, bx1, by1) in enumerate(index.bboxes)
+            if matches(index, value, f)
+            and bx0 <= x1
+            and bx1 >= x0
+            and by0 <= y1
+            and by1 >= y0
+        ]
+        assert index.in_box(y0, x0, y1, x1, value) == expected
+
+
+@pytest.mark.parametrize("value", [None, LAYER_VALUES[1]])
+def test_within_matches_brute_force(index, value):
+    sx, sy = index.cell_size_m()
+    rng = np.random.default_rng(1)
+    for _ in range(60):
+        y, x = rng.integers(GRID_HEIGHT), rng.integers(GRID_WIDTH)
+        radius_m = rng.uniform(0, 150)
+        point = np.array([x * sx, y * sy])
+        expected = {}
+        for f, polygon in enumerate(index.polygons):
+            if not matches(index, value, f):
+                continue
+            polygon = polygon * (sx, sy)
+            if points_in_poly([point], polygon)[0]:
+                expected[f] = 0.0
+            else:
+                distance = _distance_to_outline(point, polygon)
+                if distance <= radius_m:
+                    expected[f] = distance
+        features, distances = index.within(y, x, radius_m, value)
+        assert dict(zip(features, distances.tolist())) == pytest.approx(expected)
+        assert len(features) == len(expected)
+        assert np.all(np.diff(distances) >= 0)
+
+
+def test_within_distances_in_meters():
+    # A 4 x 4 cell square on a grid whose cells are twice as wide as high
+    index = FeatureIndex(11, 21, bucket_size=4)
+    index.bounds = (0.0, 0.0, 0.002, 0.002)
+    sx, sy = index.cell_size_m()
+    assert sx == pytest.approx(2 * sy)
+    index.add(7, {"building": "yes"}, 1, [2, 6, 6, 2, 2], [2, 2, 6, 6, 2])
+    assert index.within(4, 4, 0.0) == ([0], pytest.approx([0.0]))
+    features, distances = index.within(4, 9, 100.0)
+    assert features == [0]
+    assert distances[0] == pytest.approx(3 * sx)  # 3 cells east
+    assert index.within(4, 9, 2.9 * sx)[0] == []
+    assert index.within(12, 4, 100.0)[1] == pytest.approx([6 * sy])  # 6 south
+    assert index.within(4, 9, 100.0, value=3)[0] == []
+
+
+@pytest.mark.parametrize("empty", [False, True])
+def test_save_load_round_trip(index, tmp_path, empty):
+    if empty:
+        index = FeatureIndex(10, 20, bucket_size=5)
+    path = tmp_path / "features.npz"
+    index.save(path)
+    loaded = FeatureIndex.load(path)
+    assert (loaded.grid_width, loaded.grid_height, loaded.bucket_size) == (
+        index.grid_width,
+        index.grid_height,
+        index.bucket_size,
+    )
+    assert loaded.bounds == index.bounds
+    assert loaded.osm_ids == index.osm_ids
+    assert loaded.tags == index.tags
+    assert loaded.values == index.values
+    assert loaded.bboxes == index.bboxes
+    assert loaded.buckets == index.buckets
+    for a, b in zip(loaded.polygons, index.polygons):
+        assert np.array_equal(a, b)
+
+
+def test_cache_persists_the_index(index, osm_file, tmp_path):
+    grid_cache = GridCache(str(tmp_path / "cache"))
+    for _ in range(2):  # A miss, then a hit
+        grid, loaded = grid_cache.load(osm_file, GRID_WIDTH, GRID_HEIGHT, features=True)
+        assert np.array_equal(
+            grid, stream_osm_to_grid(osm_file, GRID_WIDTH, GRID_HEIGHT)
+        )
+        assert loaded.osm_ids == index.osm_ids
+        assert loaded.tags == index.tags
+        for a, b in zip(loaded.polygons, index.polygons):
+            assert np.array_equal(a, b)
+        assert loaded.at_cell(20, 30) == index.at_cell(20, 30)
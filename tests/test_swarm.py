@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from game.batch import BLOCKED
+from game.entities import AGENT, FREE, VICTIM
+from game.simulation import ACTIONS, DOWN, LEFT, RIGHT, STAY, UP, WALL
+from game.swarm import NO_AGENT, Swarm
+
+# UP and DOWN move along +y and -y
+
+
+def make_swarm(positions, shape=(5, 6), walls=()):
+    grid = np.zeros(shape, dtype=np.uint8)
+    for cell in walls:
+        grid[cell] = WALL
+    return Swarm(grid, positions)
+
+
+def test_claims_go_to_lowest_id():
+    # Four agents heading for (2, 2) from every side
+    swarm = make_swarm([(2, 3), (1, 2), (3, 2), (2, 1)])
+    moved = swarm.step([LEFT, UP, DOWN, RIGHT])
+    assert moved.tolist() == [True, False, False, False]
+    assert swarm.positions.tolist() == [[2, 2], [1, 2], [3, 2], [2, 1]]
+
+
+def test_swaps_cancel():
+    swarm = make_swarm([(2, 2), (2, 3), (0, 0)])
+    moved = swarm.step([RIGHT, LEFT, RIGHT])
+    assert moved.tolist() == [False, False, True]
+    assert swarm.positions[:2].tolist() == [[2, 2], [2, 3]]
+
+
+def test_queue_follows_its_head():
+    # A row moving right into free space moves as a whole
+    swarm = make_swarm([(1, 0), (1, 1), (1, 2), (1, 3)])
+    assert swarm.step([RIGHT] * 4).all()
+    assert swarm.positions[:, 1].tolist() == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("head_action", [STAY, UP])
+def test_queue_stays_when_its_head_does(head_action):
+    # The head (id 0) stays put, or runs into a wall
+    swarm = make_swarm([(1, 3), (1, 2), (1, 1), (1, 0)], walls=[(2, 3)])
+    moved = swarm.step([head_action, RIGHT, RIGHT, RIGHT])
+    assert not moved.any()
+
+
+def test_queue_stays_when_its_head_loses_a_claim():
+    # Agent 0 takes (1, 4) ahead of agent 2, the head of the queue 3 -> 2
+    swarm = make_swarm([(0, 4), (4, 4), (1, 3), (1, 2)])
+    moved = swarm.step([UP, STAY, RIGHT, RIGHT])
+    assert moved.tolist() == [True, False, False, False]
+
+
+def test_long_queue_uses_pointer_jumping():
+    n = 40
+    swarm = make_swarm([(0, x) for x in range(n)], shape=(2, n + 1))
+    assert swarm.step([RIGHT] * n).all()
+    swarm = make_swarm([(0, x) for x in range(n)], shape=(2, n))
+    # The head is at the edge of the grid, so nobody moves
+    assert not swarm.step([RIGHT] * n).any()
+
+
+def test_cycles_move():
+    # Four agents rotating round a 2x2 square
+    swarm = make_swarm([(1, 1), (1, 2), (2, 2), (2, 1)])
+    assert swarm.step([RIGHT, UP, LEFT, DOWN]).all()
+    assert swarm.positions.tolist() == [[1, 2], [2, 2], [2, 1], [1, 1]]
+
+
+def test_blocked_moves():
+    grid = np.zeros((3, 3), dtype=np.uint8)
+    grid[1, 2] = WALL
+    grid[0, 1] = VICTIM
+    grid[2, 1] = AGENT  # An agent of another swarm
+    swarm = Swarm(grid, [(1, 1), (0, 0)])
+    for action in (RIGHT, DOWN, UP):
+        assert not swarm.step([action, LEFT]).any()
+    assert swarm.step([LEFT, STAY]).tolist() == [True, False]
+
+
+def reference_step(grid, positions, actions):
+    """Scalar version of the ``Swarm`` rules; returns the ``moved`` list."""
+    height, width = grid.shape
+    n = len(positions)
+    current = [tuple(p) for p in positions]
+    occupant = {cell: i for i, cell in enumerate(current)}
+    target = []
+    for (y, x), action in zip(current, actions):
+        dx, dy = ACTIONS[action]
+        ny, nx = y + dy, x + dx
+        target.append((ny, nx) if 0 <= ny < height and 0 <= nx < width else (y, x))
+
+    candidate = [
+        target[i] != current[i]
+        and (target[i] in occupant or not BLOCKED[grid[target[i]]])
+        for i in range(n)
+    ]
+    for i in range(n):
+        if candidate[i] and any(
+            candidate[j] and target[j] == target[i] for j in range(i)
+        ):
+            candidate[i] = False
+    for i in range(n):
+        ahead = occupant.get(target[i])
+        if candidate[i] and ahead is not None and target[ahead] == current[i]:
+            candidate[i] = False
+
+    def moves(i, seen):
+        if not candidate[i]:
+            return False
+        ahead = occupant.get(target[i])
+        if ahead is None or ahead in seen:
+            return True  # Free cell ahead, or a cycle
+        return moves(ahead, seen | {i})
+
+    return [moves(i, frozenset()) for i in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_steps_match_reference_and_keep_invariants(seed):
+    rng = np.random.default_rng(seed)
+    grid = np.where(rng.random((12, 15)) < 0.2, WALL, FREE).astype(np.uint8)
+    swarm = Swarm.spawn(grid, 60, seed=seed)
+    for _ in range(50):
+        # Mostly follow a shared heading, so queues and cycles form
+        actions = np.where(
+            rng.random(60) < 0.6, rng.integers(5), rng.integers(5, size=60)
+        )
+        before = swarm.positions.copy()
+        expected = reference_step(grid, before, actions)
+        moved = swarm.step(actions)
+        assert moved.tolist() == expected
+
+        # No two agents on one cell, and every map agrees with the positions
+        cells = swarm.positions[:, 0] * grid.shape[1] + swarm.positions[:, 1]
+        assert np.unique(cells).size == len(cells)
+        assert (grid.ravel()[cells] == AGENT).all()
+        assert (grid == AGENT).sum() == len(cells)
+        assert (swarm.occupant.ravel()[cells] == np.arange(60)).all()
+        assert (swarm.occupant != NO_AGENT).sum() == len(cells)
+        assert not (grid == WALL).ravel()[cells].any()
+        steps = np.abs(swarm.positions - before).sum(axis=1)
+        assert (steps == moved).all()
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from game.simulation import DEBRIS, WALL
+from game.visibility import VisibilityEngine, opaque_mask
+
+
+def random_grid(rng, height, width, density=0.15):
+    grid = np.zeros((height, width), dtype=np.uint8)
+    blocked = rng.random((height, width)) < density
+    grid[blocked] = rng.choice([WALL, DEBRIS], size=blocked.sum())
+    return grid
+
+
+def reference_visible(engine, grid, position):
+    """A cell is seen when it is on the grid and every cell before it on its
+    ray, the agent's own included, is transparent."""
+    opaque = opaque_mask(grid)
+    height, width = grid.shape
+    y0, x0 = position
+    visible = np.zeros(len(engine.offsets), dtype=bool)
+    for i, (dy, dx) in enumerate(engine.offsets.tolist()):
+        y, x = y0 + dy, x0 + dx
+        if not (0 <= y < height and 0 <= x < width):
+            continue
+        visible[i] = True
+        node = i
+        while node != 0:
+            node = engine.parents[node]
+            py, px = engine.offsets[node]
+            visible[i] &= not opaque[y0 + py, x0 + px]
+    return visible
+
+
+def seen_cells(engine, positions, visible):
+    _, y, x = engine.cells(positions, visible)
+    return set(zip(y.tolist(), x.tolist()))
+
+
+@pytest.mark.parametrize("radius", [1, 3, 8])
+def test_open_ground_is_fully_visible(radius):
+    engine = VisibilityEngine(np.zeros((40, 40), dtype=np.uint8), radius)
+    visible = engine.visible([(20, 20), (19, 25)])
+    assert visible.all()
+    cells = seen_cells(engine, [(20, 20)], visible[:1])
+    expected = {
+        (y, x)
+        for y in range(40)
+        for x in range(40)
+        if (y - 20) ** 2 + (x - 20) ** 2 <= radius**2
+    }
+    assert cells == expected
+
+
+def test_wall_shadows_cells_behind_it():
+    grid = np.zeros((21, 21), dtype=np.uint8)
+    grid[10, 13] = WALL
+    engine = VisibilityEngine(grid, radius=6)
+    cells = seen_cells(engine, [(10, 10)], engine.visible([(10, 10)]))
+    assert {(10, 11), (10, 12), (10, 13)} <= cells  # The wall itself is seen
+    assert not {(10, 14), (10, 15), (10, 16)} & cells
+    assert {(9, 15), (11, 15), (4, 10), (16, 10)} <= cells
+    # The view is symmetric about the row through the agent and the wall
+    assert {(20 - y, x) for y, x in cells} == cells
+
+
+def test_agent_on_opaque_cell_sees_only_itself():
+    grid = np.zeros((9, 9), dtype=np.uint8)
+    grid[4, 4] = DEBRIS
+    engine = VisibilityEngine(grid, radius=3)
+    assert seen_cells(engine, [(4, 4)], engine.visible([(4, 4)])) == {(4, 4)}
+
+
+@pytest.mark.parametrize("position", [(0, 0), (0, 6), (4, 12), (8, 0), (8, 12)])
+def test_agents_at_the_grid_edge(position):
+    grid = np.zeros((9, 13), dtype=np.uint8)
+    engine = VisibilityEngine(grid, radius=5)
+    visible = engine.visible([position])
+    y0, x0 = position
+    expected = {
+        (y, x)
+        for y in range(9)
+        for x in range(13)
+        if (y - y0) ** 2 + (x - x0) ** 2 <= 25
+    }
+    assert seen_cells(engine, [position], visible) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_visible_matches_ray_walk(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(rng, 17, 23, 0.25)
+    engine = VisibilityEngine(grid, radius=6)
+    positions = np.stack([rng.integers(17, size=12), rng.integers(23, size=12)], 1)
+    visible = engine.visible(positions)
+    for row, position in zip(visible, positions):
+        assert np.array_equal(row, reference_visible(engine, grid, position))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_update_after_invalidate_matches_cold_visible(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(rng, 30, 40)
+    engine = VisibilityEngine(grid, radius=5)
+    positions = np.stack([rng.integers(30, size=20), rng.integers(40, size=20)], 1)
+    engine.update(positions)
+    for _ in range(15):
+        # Change cells next to agents, so their cached masks go stale
+        for agent in rng.integers(20, size=3):
+            y = np.clip(positions[agent, 0] + rng.integers(-5, 6), 0, 29)
+            x = np.clip(positions[agent, 1] + rng.integers(-5, 6), 0, 39)
+            grid[y, x] = WALL if grid[y, x] == 0 else 0
+            engine.invalidate(y, x)
+        moving = rng.random(20) < 0.3
+        positions[moving] = np.clip(
+            positions[moving] + rng.integers(-1, 2, size=(moving.sum(), 2)),
+            0,
+            (29, 39),
+        )
+        count = rng.integers(15, 21)  # Agents may also leave the swarm
+        visible = engine.update(positions[:count])
+        cold = VisibilityEngine(grid, radius=5).visible(positions[:count])
+        assert np.array_equal(visible, cold)
+        assert np.array_equal(engine.opaque[5:-5, 5:-5], opaque_mask(grid))
+
+
+def test_windows_place_offsets_around_the_agent():
+    grid = np.zeros((11, 11), dtype=np.uint8)
+    grid[5, 7] = WALL
+    engine = VisibilityEngine(grid, radius=3)
+    windows = engine.windows(engine.visible([(5, 5)]))
+    assert windows.shape == (1, 7, 7)
+    assert windows[0, 3, 3] and windows[0, 3, 5]
+    assert not windows[0, 3, 6]
+    assert not windows[0, 0, 0]  # Outside the disk
@@ -0,0 +1,50 @@
+import numpy as np
+
+from game.distance import passable_mask
+from game.entities import AGENT, VICTIM
+from game.simulation import DEBRIS, WALL
+from game.world import BUILDING, OPEN, World
+
+
+def random_grid(rng, height, width):
+    grid = rng.choice([0, 0, 0, WALL, DEBRIS], size=(height, width))
+    grid = grid.astype(np.uint8)
+    cells = rng.choice(height * width, size=12, replace=False)
+    grid.ravel()[cells[:6]] = AGENT
+    grid.ravel()[cells[6:]] = VICTIM
+    return grid
+
+
+def entity_mask(grid):
+    return np.isin(grid, [AGENT, VICTIM])
+
+
+def test_from_grid_round_trips_generated_grid():
+    grid = random_grid(np.random.default_rng(0), 23, 37)
+    world = World.from_grid(grid)
+    assert np.array_equal(world.to_grid(), grid)
+    assert np.array_equal(world.passable(), passable_mask(grid))
+    assert np.array_equal(world.free(), passable_mask(grid) & ~entity_mask(grid))
+
+
+def test_cached_masks_follow_changes():
+    rng = np.random.default_rng(1)
+    world = World.from_grid(random_grid(rng, 20, 30))
+    passable, free = world.passable(), world.free()
+    for _ in range(200):
+        y, x = rng.integers(20), rng.integers(30)
+        change = rng.integers(3)
+        if change == 0:
+            world.set_terrain(y, x, rng.choice([OPEN, BUILDING]))
+        elif change == 1:
+            world.set_hazard(y, x, rng.integers(256))
+        elif world.free()[y, x]:
+            world.entities.add(VICTIM, y, x)
+
+        fresh = World(world.terrain.copy())
+        fresh.hazard = world.hazard
+        occupied = entity_mask(world.to_grid())
+        # The views handed out earlier see every update
+        assert np.array_equal(passable, fresh.passable())
+        assert np.array_equal(free, fresh.passable() & ~occupied)
+    assert not passable.flags.writeable